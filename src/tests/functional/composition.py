@@ -1,31 +1,34 @@
 import numpy as np
 import rasterio
-from rasterio.enums import Resampling
 
-# Step 1: Define the size of the raster and synthetic data for bands
+from tiffcomposer.core.composition import BandSource, compose
+
+# Step 1: Define the size of the raster and synthetic band generators
 width, height = 10000, 10000  # Dimensions of the raster
-bands = {
-    'a': np.random.randint(0, 256, (height, width), dtype=np.uint8),
-    'b': np.random.randint(0, 256, (height, width), dtype=np.uint8),
-    'c': np.random.randint(0, 256, (height, width), dtype=np.uint8)
-}
 
-# Step 2: Create the TIFF file
-output_file = 'multi_band_example.tif'
-with rasterio.open(
-    output_file,
-    'w',
-    driver='GTiff',
-    height=height,
+
+def random_band(seed):
+    """Build a window reader producing random data for one band."""
+    def read(window):
+        rng = np.random.default_rng((seed, window.row_off, window.col_off))
+        return rng.integers(
+            0, 256, (window.height, window.width), dtype=np.uint8
+        )
+    return read
+
+
+bands = {name: random_band(seed) for seed, name in enumerate("abc")}
+
+# Step 2: Create the TIFF file window by window
+output_file = compose(
+    [BandSource(reader, name=name) for name, reader in bands.items()],
+    'multi_band_example.tif',
     width=width,
-    count=len(bands),
+    height=height,
     dtype=np.uint8,
     crs='+proj=latlong',
     transform=rasterio.transform.from_origin(-180, 90, 0.01, 0.01)
-) as dst:
-    for idx, (band_name, band_data) in enumerate(bands.items(), start=1):
-        dst.write(band_data, idx)
-        dst.set_band_description(idx, band_name)
+)
 
 print(f"Multi-band TIFF file created: {output_file}")
 
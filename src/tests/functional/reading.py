@@ -2,6 +2,7 @@ from pprint import pprint
 
 import rasterio
 from rasterio.plot import show
+from rasterio.vrt import WarpedVRT
 
 # Function to extract and display extensive information about a TIFF file
 
@@ -26,11 +27,12 @@ def read_tiff(file_path, target_crs="EPSG:4326"):
 
                 # Conver to target crs if necessary:
                 if target_crs is not None and src.crs != target_crs:
-                    band_data = src.read(
-                        idx,
-                        out_shape=(src.height, src.width),
+                    with WarpedVRT(
+                        src,
+                        crs=target_crs,
                         resampling=rasterio.enums.Resampling.bilinear
-                    )
+                    ) as vrt:
+                        band_data = vrt.read(idx)
                     reprojected = True
                     print(f"Band {idx} reprojected to {target_crs}")
                 else:
@@ -4,7 +4,9 @@ import matplotlib.pyplot as plt
 import rasterio
 
 from tiffcomposer.core.coordinates import GeoCoordinate, GeoCoordinateExtent
-from tiffcomposer.utils.extent import get_population_density_in_extent
+from tiffcomposer.utils.dataset import default_pool
+from tiffcomposer.utils.extent import get_population_density_stats
+from tiffcomposer.utils.nodata import mask_nodata
 from tiffcomposer.utils.pixel import get_value_from_coordinates
 
 FILE_PATH = os.path.join(
@@ -16,11 +18,9 @@ MADRID = GeoCoordinate(40.4168, -3.7026)  # Madrid, Spain
 
 # Open the TIFF file
 with rasterio.open(FILE_PATH) as src:
-    # Read the image data as a 2D array
-    data = src.read(1)
-
-    # Set any data value lower than 0 to 0
-    data[data < 0] = 0
+    # Read the image data as a 2D array, masking the nodata pixels without
+    # copying it
+    data = mask_nodata(src.read(1), src.nodata)
 
     print(src.crs)  # EPSG:4326
     print(src.bounds)  # Bounding box of the image
@@ -44,45 +44,32 @@ with rasterio.open(FILE_PATH) as src:
     plt.show()
 
 
-# Open the TIFF file to get the affine transform and image dimensions
-with rasterio.open(FILE_PATH) as src:
-    value = get_value_from_coordinates(MADRID, src, data)
-    if value is not None:
-        print(f"Population density at {MADRID}: {value} people/km^2")
-    else:
-        print("Coordinates are outside the image bounds.")
-
+# Utilities accept a path: the reader is opened once and reused from the pool
+value = get_value_from_coordinates(MADRID, FILE_PATH, data.data)
+if value is not None:
+    print(f"Population density at {MADRID}: {value} people/km^2")
+else:
+    print("Coordinates are outside the image bounds or hold no data.")
 
-with rasterio.open(FILE_PATH) as src:
-    extent_r = 1
-    extent = GeoCoordinateExtent(
-        GeoCoordinate(
-            MADRID.latitude + extent_r,
-            MADRID.longitude - extent_r
-        ),
-        GeoCoordinate(
-            MADRID.latitude - extent_r,
-            MADRID.longitude + extent_r
-        )
-    )
 
-    mean_density = get_population_density_in_extent(
-        extent,
-        src,
-        mode="mean"
+extent_r = 1
+extent = GeoCoordinateExtent(
+    GeoCoordinate(
+        MADRID.latitude + extent_r,
+        MADRID.longitude - extent_r
+    ),
+    GeoCoordinate(
+        MADRID.latitude - extent_r,
+        MADRID.longitude + extent_r
     )
-    print(f"Mean population density in the extent: {mean_density} people/km^2")
-
-    max_density = get_population_density_in_extent(
-        extent,
-        src,
-        mode="max"
-    )
-    print(f"Max population density in the extent: {max_density} people/km^2")
+)
 
-    min_density = get_population_density_in_extent(
-        extent,
-        src,
-        mode="min"
-    )
-    print(f"Min population density in the extent: {min_density} people/km^2")
+# Compute every statistic in a single pass over the raster
+density = get_population_density_stats(
+    extent, FILE_PATH, ["mean", "max", "min", "p90"]
+)
+print(f"Mean population density in the extent: {density['mean']} people/km^2")
+print(f"Max population density in the extent: {density['max']} people/km^2")
+print(f"Min population density in the extent: {density['min']} people/km^2")
+print(f"90th percentile in the extent: {density['p90']} people/km^2")
+print(default_pool.stats)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+NODATA = -99999.0
+
+
+@pytest.fixture
+def raster_data():
+    rng = np.random.default_rng(0)
+    data = rng.uniform(0, 100, (96, 128)).astype(np.float32)
+    data[:8, :8] = NODATA
+    data[40:44, 60:70] = 0
+    return data
+
+
+@pytest.fixture
+def raster_path(tmp_path, raster_data):
+    path = tmp_path / "raster.tif"
+    height, width = raster_data.shape
+
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        height=height,
+        width=width,
+        count=1,
+        dtype=raster_data.dtype,
+        crs="EPSG:4326",
+        transform=from_origin(-4, 42, 0.05, 0.05),
+        nodata=NODATA,
+        tiled=True,
+        blockxsize=32,
+        blockysize=32,
+        compress="lzw",
+    ) as dst:
+        dst.write(raster_data, 1)
+
+    return path
+
+
+@pytest.fixture
+def src(raster_path):
+    with rasterio.open(raster_path) as dataset:
+        yield dataset
@@ -0,0 +1,146 @@
+import asyncio
+
+import numpy as np
+import pytest
+import rasterio
+
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateExtent)
+from tiffcomposer.utils import extent
+from tiffcomposer.utils.aio import AsyncRasterReader
+from tiffcomposer.utils.extent import (clip_tiff_to_extent,
+                                       get_population_density_in_extent)
+from tiffcomposer.utils.pixel import (get_value_from_coordinates,
+                                      sample_coordinates)
+from tiffcomposer.utils.summed_area import build_summed_area_table
+from tiffcomposer.utils.zonal import zonal_stats
+
+EXTENT = GeoCoordinateExtent.from_bounds(-3.2, 39.1, -0.9, 41.3)
+
+
+def test_async_queries_match_sync(raster_path):
+    coordinate = GeoCoordinate(40.1, -2.3)
+    points = GeoCoordinateArray([40.1, 39.0, 50.0], [-2.3, 1.0, 0.0])
+
+    async def main():
+        async with AsyncRasterReader(raster_path) as reader:
+            return await asyncio.gather(
+                reader.get_value_from_coordinates(coordinate),
+                reader.get_value_from_coordinates(GeoCoordinate(50, 0)),
+                reader.clip_tiff_to_extent(EXTENT),
+                reader.get_population_density_in_extent(EXTENT, "max"),
+                reader.zonal_stats([EXTENT], ("mean", "count")),
+                reader.sample_coordinates(points),
+            )
+
+    value, outside, clipped, density, stats, sampled = asyncio.run(main())
+
+    assert value == get_value_from_coordinates(coordinate, raster_path)
+    assert outside is None
+    assert np.array_equal(clipped, clip_tiff_to_extent(raster_path, EXTENT))
+    assert density == get_population_density_in_extent(
+        EXTENT, raster_path, "max"
+    )
+    assert stats == zonal_stats(raster_path, [EXTENT], ("mean", "count"))
+    assert np.array_equal(
+        sampled, sample_coordinates(points, raster_path), equal_nan=True
+    )
+
+
+def test_async_density_uses_summed_area_table(raster_path, monkeypatch):
+    build_summed_area_table(raster_path)
+    # Answering from the table reads no pixels
+    monkeypatch.setattr(extent, "clip_tiff_to_extent", None)
+    monkeypatch.setattr(AsyncRasterReader, "_read", None)
+
+    async def main():
+        async with AsyncRasterReader(raster_path) as reader:
+            return await reader.get_population_density_in_extent(EXTENT)
+
+    assert asyncio.run(main()) == get_population_density_in_extent(
+        EXTENT, raster_path
+    )
+
+
+def test_concurrent_reads_are_coalesced(raster_path):
+    coordinates = [GeoCoordinate(41.9 - i * 0.01, -3.9) for i in range(20)]
+
+    async def main():
+        async with AsyncRasterReader(raster_path, max_workers=2) as reader:
+            values = await asyncio.gather(*(
+                reader.get_value_from_coordinates(c) for c in coordinates
+            ))
+            return values, reader.cache.stats
+
+    values, stats = asyncio.run(main())
+
+    assert values == [
+        get_value_from_coordinates(c, raster_path) for c in coordinates
+    ]
+    assert stats["misses"] == 1
+
+
+def test_timeout_and_cancellation(raster_path):
+    async def main():
+        async with AsyncRasterReader(raster_path) as reader:
+            with pytest.raises(TimeoutError):
+                await reader.clip_tiff_to_extent(EXTENT, timeout=0)
+
+            task = asyncio.create_task(reader.clip_tiff_to_extent(EXTENT))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            return await reader.clip_tiff_to_extent(EXTENT, timeout=10)
+
+    clipped = asyncio.run(main())
+    assert np.array_equal(clipped, clip_tiff_to_extent(raster_path, EXTENT))
+
+
+def test_concurrent_extent_queries_share_reads(raster_path, monkeypatch):
+    reads = []
+    read = rasterio.io.DatasetReader.read
+
+    def counted(self, *args, **kwargs):
+        reads.append(kwargs.get("window"))
+        return read(self, *args, **kwargs)
+
+    extents = [
+        GeoCoordinateExtent.from_bounds(-3.2 + 0.02 * i, 39.1, -0.9, 41.3)
+        for i in range(8)
+    ]
+    points = GeoCoordinateArray([40.1, 39.5, 41.0], [-2.3, -1.5, -3.0])
+
+    async def main():
+        async with AsyncRasterReader(raster_path, max_workers=2) as reader:
+            return await asyncio.gather(
+                *(reader.get_population_density_in_extent(e, "max")
+                  for e in extents),
+                reader.zonal_stats(extents, ("mean", "p50")),
+                reader.sample_coordinates(points, method="bicubic"),
+            )
+
+    monkeypatch.setattr(rasterio.io.DatasetReader, "read", counted)
+    *densities, zones, sampled = asyncio.run(main())
+    monkeypatch.undo()
+
+    assert densities == [
+        get_population_density_in_extent(e, raster_path, "max")
+        for e in extents
+    ]
+    assert zones == zonal_stats(raster_path, extents, ("mean", "p50"))
+    assert np.array_equal(
+        sampled,
+        sample_coordinates(points, raster_path, method="bicubic"),
+        equal_nan=True
+    )
+    # Each block under the extents is decoded once for every query
+    blocks = {
+        (row // 32, col // 32)
+        for window in (extent.extent_to_window(raster_path, e)
+                       for e in extents)
+        for row in range(window.row_off, window.row_off + window.height)
+        for col in range(window.col_off, window.col_off + window.width)
+    }
+    assert len(reads) == len(blocks) > 1
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.warp import reproject
+
+from tiffcomposer.core.alignment import TargetGrid
+from tiffcomposer.core.composition import compose
+from tiffcomposer.core.coordinates import GeoCoordinate, GeoCoordinateExtent
+
+
+def write_raster(path, data, transform, crs="EPSG:4326", nodata=None):
+    with rasterio.open(
+        path, "w", driver="GTiff", height=data.shape[0],
+        width=data.shape[1], count=1, dtype=data.dtype, crs=crs,
+        transform=transform, nodata=nodata
+    ) as dst:
+        dst.write(data, 1)
+    return path
+
+
+def test_target_grid_from_extent():
+    extent = GeoCoordinateExtent(
+        GeoCoordinate(42, -4),
+        GeoCoordinate(40, -1)
+    )
+    grid = TargetGrid.from_extent(extent, 0.5)
+    assert (grid.width, grid.height) == (6, 4)
+    assert grid.transform == from_origin(-4, 42, 0.5, 0.5)
+
+    with pytest.raises(ValueError):
+        TargetGrid.from_extent(extent, 0)
+
+
+def test_target_grid_from_sources(tmp_path, src):
+    window_transform = src.window_transform(((10, 30), (90, 140)))
+    data = np.ones((20, 50), dtype=np.float32)
+    path = write_raster(tmp_path / "shifted.tif", data, window_transform)
+
+    with rasterio.open(path) as shifted:
+        union = TargetGrid.from_sources([src, shifted])
+        assert union.transform == src.transform
+        assert (union.height, union.width) == (src.height, 140)
+        assert union.offset_in(src) == (0, 0)
+        assert union.offset_in(shifted) == (-10, -90)
+
+        intersection = TargetGrid.from_sources([src, shifted], intersect=True)
+        assert (intersection.height, intersection.width) == (20, 38)
+
+
+def test_compose_aligns_shifted_sources(tmp_path, raster_path, src):
+    window_transform = src.window_transform(((10, 30), (90, 140)))
+    data = np.full((20, 50), 7, dtype=np.float32)
+    path = write_raster(
+        tmp_path / "shifted.tif", data, window_transform, nodata=src.nodata
+    )
+
+    output = compose([raster_path, path], tmp_path / "aligned.tif")
+
+    with rasterio.open(output) as dst:
+        assert dst.transform == src.transform
+        assert (dst.height, dst.width) == (src.height, 140)
+        np.testing.assert_array_equal(
+            dst.read(1, window=((0, src.height), (0, src.width))),
+            src.read(1)
+        )
+        shifted = dst.read(2)
+        np.testing.assert_array_equal(shifted[10:30, 90:140], 7)
+        assert (shifted[:10] == src.nodata).all()
+
+
+def test_compose_reprojects_sources(tmp_path, raster_path, src):
+    grid = TargetGrid.from_sources([src], crs="EPSG:3857")
+    projected = np.zeros((grid.height, grid.width), dtype=np.float32)
+    reproject(
+        src.read(1), projected,
+        src_transform=src.transform, src_crs=src.crs,
+        dst_transform=grid.transform, dst_crs=grid.crs,
+        src_nodata=src.nodata, dst_nodata=src.nodata
+    )
+    path = write_raster(
+        tmp_path / "projected.tif", projected, grid.transform,
+        crs="EPSG:3857", nodata=src.nodata
+    )
+
+    target = TargetGrid(src.width, src.height, src.transform, src.crs)
+    output = compose([raster_path, path], tmp_path / "out.tif", grid=target)
+
+    with rasterio.open(output) as dst:
+        assert dst.crs == src.crs
+        original, warped = dst.read(1), dst.read(2)
+        valid = (original != src.nodata) & (warped != src.nodata)
+        assert valid.mean() > 0.8
+        assert np.corrcoef(original[valid], warped[valid])[0, 1] > 0.5
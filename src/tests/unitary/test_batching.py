@@ -0,0 +1,92 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tiffcomposer.core.coordinates import GeoCoordinate
+from tiffcomposer.utils.batching import PointBatcher
+from tiffcomposer.utils.pixel import get_value_from_coordinates
+
+COORDINATES = [
+    GeoCoordinate(41.9 - 0.07 * i, -3.9 + 0.09 * i) for i in range(60)
+] + [GeoCoordinate(50, 0), GeoCoordinate(0, 0)]
+
+
+def test_batched_lookups_match_sync(raster_path):
+    expected = [
+        get_value_from_coordinates(c, raster_path) for c in COORDINATES
+    ]
+    published = []
+
+    with PointBatcher(raster_path, max_batch=16, max_delay=0.05,
+                      on_batch=lambda *args: published.append(args)) as batcher:
+        with ThreadPoolExecutor(8) as executor:
+            values = list(executor.map(
+                batcher.get_value_from_coordinates, COORDINATES
+            ))
+
+    assert values == expected
+    stats = batcher.stats
+    assert stats["requests"] == len(COORDINATES)
+    assert stats["max_batch_size"] <= 16
+    assert stats["batches"] < len(COORDINATES)
+    assert len(published) == stats["batches"]
+    assert sum(size for size, _ in published) == len(COORDINATES)
+
+
+def test_batched_lookups_async(raster_path):
+    async def main(batcher):
+        return await asyncio.gather(*(
+            batcher.get_value_from_coordinates_async(c) for c in COORDINATES
+        ))
+
+    with PointBatcher(raster_path, max_delay=0.01) as batcher:
+        values = asyncio.run(main(batcher))
+
+    assert values == [
+        get_value_from_coordinates(c, raster_path) for c in COORDINATES
+    ]
+    assert batcher.stats["batches"] == 1
+
+
+def test_closed_batcher(raster_path):
+    batcher = PointBatcher(raster_path)
+    future = batcher.submit(COORDINATES[0])
+    batcher.close()
+
+    assert future.done()
+    with pytest.raises(RuntimeError):
+        batcher.submit(COORDINATES[0])
+    with pytest.raises(ValueError):
+        PointBatcher(raster_path, max_batch=0)
+
+
+def test_failing_callback(raster_path):
+    def on_batch(size, latency):
+        raise RuntimeError("metrics backend down")
+
+    with PointBatcher(raster_path, max_delay=0, on_batch=on_batch) \
+            as batcher:
+        first = batcher.get_value_from_coordinates(COORDINATES[0], 5)
+        second = batcher.get_value_from_coordinates(COORDINATES[1], 5)
+
+    assert first == get_value_from_coordinates(COORDINATES[0], raster_path)
+    assert second == get_value_from_coordinates(COORDINATES[1], raster_path)
+    assert batcher.stats["callback_errors"] == 2
+
+
+@pytest.mark.filterwarnings(
+    "ignore::pytest.PytestUnhandledThreadExceptionWarning"
+)
+def test_stopped_worker(raster_path):
+    def on_batch(size, latency):
+        raise SystemExit
+
+    batcher = PointBatcher(raster_path, max_delay=0, on_batch=on_batch)
+    batcher.get_value_from_coordinates(COORDINATES[0], 5)
+    batcher._thread.join(5)
+
+    assert not batcher._thread.is_alive()
+    with pytest.raises(RuntimeError):
+        batcher.submit(COORDINATES[1])
+    batcher.close()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from tiffcomposer.utils.blocks import iter_block_windows, iter_window_blocks
+
+
+@pytest.fixture(params=["tiled", "stripped"])
+def layout_path(request, tmp_path, raster_data):
+    path = tmp_path / f"{request.param}.tif"
+    height, width = raster_data.shape
+    options = (
+        {"tiled": True, "blockxsize": 32, "blockysize": 16}
+        if request.param == "tiled" else {"blockysize": 3}
+    )
+
+    with rasterio.open(
+        path, "w", driver="GTiff", height=height, width=width, count=1,
+        dtype=raster_data.dtype, transform=from_origin(-4, 42, 0.05, 0.05),
+        **options
+    ) as dst:
+        dst.write(raster_data, 1)
+
+    return path
+
+
+@pytest.mark.parametrize("window", [
+    Window(0, 0, 128, 96),
+    Window(33, 17, 1, 1),
+    Window(5, 7, 60, 40),
+    Window(100, 90, 28, 6),
+    Window(10, 10, 0, 5),
+])
+def test_window_blocks_match_band_blocks(layout_path, window):
+    row_min, col_min = window.row_off, window.col_off
+    row_max, col_max = row_min + window.height, col_min + window.width
+    expected = []
+    for block in iter_block_windows(layout_path, min_pixels=1000):
+        rows = slice(max(row_min, block.row_off),
+                     min(row_max, block.row_off + block.height))
+        cols = slice(max(col_min, block.col_off),
+                     min(col_max, block.col_off + block.width))
+        if rows.stop > rows.start and cols.stop > cols.start:
+            expected.append(Window.from_slices(rows, cols))
+
+    assert list(
+        iter_window_blocks(layout_path, window, min_pixels=1000)
+    ) == expected
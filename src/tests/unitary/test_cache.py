@@ -0,0 +1,162 @@
+import gc
+import os
+import subprocess
+import sys
+import uuid
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pytest
+from rasterio.windows import Window
+
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateExtent)
+from tiffcomposer.utils.cache import BlockCache, _attach_segment
+from tiffcomposer.utils.extent import clip_tiff_to_extent
+from tiffcomposer.utils.pixel import sample_coordinates
+from tiffcomposer.utils.zonal import zonal_stats
+
+EXTENT = GeoCoordinateExtent(GeoCoordinate(41.9, -3.9), GeoCoordinate(40, -1))
+
+
+@pytest.mark.parametrize("window", [
+    Window(0, 0, 128, 96),
+    Window(5, 7, 20, 10),
+    Window(30, 20, 40, 50),
+    Window(0, 0, 0, 0),
+])
+def test_block_cache_read(src, raster_data, window):
+    cache = BlockCache()
+    data = cache.read(src, window=window)
+    np.testing.assert_array_equal(data, raster_data[window.toslices()])
+    np.testing.assert_array_equal(cache.read(src, window=window), data)
+
+
+def test_block_cache_single_block_view(src):
+    cache = BlockCache()
+    view = cache.read(src, window=Window(5, 7, 20, 10))
+    block = cache.get_block(src, 1, 0, 0)
+    assert np.shares_memory(view, block)
+    assert not view.flags.writeable
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_block_cache_eviction(src):
+    block_bytes = 32 * 32 * 4
+    cache = BlockCache(max_bytes=2 * block_bytes)
+    cache.read(src)
+    assert len(cache) == 2
+    assert cache.stats["bytes"] == 2 * block_bytes
+    assert cache.stats["evictions"] == 10
+    cache.clear()
+    assert cache.stats["bytes"] == 0
+
+    with pytest.raises(ValueError):
+        BlockCache(max_bytes=-1)
+
+
+def test_block_cache_shared(src, raster_data):
+    namespace = uuid.uuid4().hex
+    publisher = BlockCache(shared=True, namespace=namespace)
+    consumer = BlockCache(shared=True, namespace=namespace)
+
+    try:
+        publisher.read(src)
+        data = consumer.read(src)
+        np.testing.assert_array_equal(data, raster_data)
+        assert consumer.stats["shared_hits"] == 12
+        assert consumer.stats["misses"] == 0
+    finally:
+        consumer.clear()
+        publisher.clear()
+
+
+def _published(cache):
+    return [cache._shared._name(key) for key in cache._shared._owned]
+
+
+def _unlinked(names):
+    for name in names:
+        try:
+            _attach_segment(name).close()
+        except FileNotFoundError:
+            continue
+        return False
+    return True
+
+
+def test_block_cache_shared_unlinked_when_dropped(src):
+    cache = BlockCache(shared=True, namespace=uuid.uuid4().hex)
+    cache.read(src)
+    names = _published(cache)
+
+    assert len(names) == 12
+    assert not _unlinked(names)
+
+    del cache
+    gc.collect()
+    assert _unlinked(names)
+
+
+def test_block_cache_shared_unlinked_at_exit(raster_path):
+    script = (
+        "import sys\n"
+        "from tiffcomposer.utils.cache import BlockCache\n"
+        "cache = BlockCache(shared=True, namespace=sys.argv[2])\n"
+        "cache.read(sys.argv[1])\n"
+        "print(*(cache._shared._name(key) for key in cache._shared._owned))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script, str(raster_path), uuid.uuid4().hex],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    )
+    names = result.stdout.split()
+
+    assert len(names) == 12
+    assert _unlinked(names)
+    assert "leaked" not in result.stderr
+
+
+def test_readers_use_block_cache(src):
+    cache = BlockCache()
+    coordinates = GeoCoordinateArray([41.5, 40.2], [-3.5, -1.1])
+
+    np.testing.assert_array_equal(
+        clip_tiff_to_extent(src, EXTENT, cache=cache),
+        clip_tiff_to_extent(src, EXTENT)
+    )
+    np.testing.assert_array_equal(
+        sample_coordinates(coordinates, src, cache=cache),
+        sample_coordinates(coordinates, src)
+    )
+    assert zonal_stats(src, [EXTENT], cache=cache) == zonal_stats(src, [EXTENT])
+    assert cache.stats["hits"] > 0
+
+
+def test_attach_segment_untracked(monkeypatch):
+    register = resource_tracker.register
+    unregistered = []
+    segment = shared_memory.SharedMemory(create=True, size=64)
+    monkeypatch.setattr(
+        resource_tracker, "unregister",
+        lambda name, rtype: unregistered.append((name, rtype))
+    )
+
+    try:
+        attached = _attach_segment(segment.name)
+        attached.close()
+    finally:
+        monkeypatch.undo()
+        segment.close()
+        segment.unlink()
+
+    # The tracker itself is never patched, only the attached name is dropped
+    assert resource_tracker.register is register
+    if sys.version_info < (3, 13):
+        assert unregistered == [(segment._name, "shared_memory")]
+    else:
+        assert unregistered == []
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import rasterio
+
+from tiffcomposer.core.composition import (BandSource, CompositionError,
+                                           compose, iter_windows)
+
+
+def test_iter_windows():
+    windows = list(iter_windows(100, 40, tile_size=32))
+    assert len(windows) == 8
+    assert sum(w.width * w.height for w in windows) == 100 * 40
+    assert (windows[-1].width, windows[-1].height) == (4, 8)
+
+
+def test_compose(tmp_path, raster_path, raster_data):
+    gradient = np.arange(raster_data.size, dtype=np.float32).reshape(
+        raster_data.shape
+    )
+
+    def ones(window):
+        return np.ones((window.height, window.width))
+
+    output = compose(
+        [
+            BandSource(raster_path, name="population"),
+            BandSource(gradient, name="gradient"),
+            BandSource(ones, name="ones"),
+        ],
+        tmp_path / "composed.tif",
+        tile_size=32,
+        max_workers=3
+    )
+
+    with rasterio.open(raster_path) as reference, \
+            rasterio.open(output) as dst:
+        assert dst.count == 3
+        assert dst.descriptions == ("population", "gradient", "ones")
+        assert dst.transform == reference.transform
+        assert dst.crs == reference.crs
+        assert dst.nodata == reference.nodata
+        assert dst.block_shapes == [(32, 32)] * 3
+        np.testing.assert_array_equal(dst.read(1), raster_data)
+        np.testing.assert_array_equal(dst.read(2), gradient)
+        np.testing.assert_array_equal(dst.read(3), 1)
+
+
+def test_compose_errors(tmp_path, raster_path):
+    with pytest.raises(CompositionError):
+        compose([], tmp_path / "empty.tif")
+
+    with pytest.raises(CompositionError):
+        compose(
+            [raster_path, np.zeros((3, 3), dtype=np.float32)],
+            tmp_path / "mismatch.tif"
+        )
+
+    with pytest.raises(CompositionError):
+        compose([lambda window: None], tmp_path / "callable.tif")
+
+    with pytest.raises(CompositionError):
+        BandSource(np.zeros(3))
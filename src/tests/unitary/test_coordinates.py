@@ -1,6 +1,13 @@
+import numpy as np
 import pytest
 
-from tiffcomposer.core.coordinates import GeoCoordinate, GeoCoordinateError
+from affine import Affine
+from rasterio.windows import Window
+
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateError,
+                                           GeoCoordinateExtent)
+from tiffcomposer.utils.extent import extent_to_window
 
 
 def test_geocoordinate_initialization():
@@ -131,3 +138,182 @@ def test_geocoordinate_sub():
     result = coord1 - coord2
     assert result.latitude == 5
     assert result.longitude == 15
+
+
+def test_geocoordinatearray_initialization():
+    coords = GeoCoordinateArray([10, 20, 30], [40, 50, 60])
+    assert len(coords) == 3
+    assert coords.latitudes.dtype == np.float64
+    assert coords.longitudes.tolist() == [40, 50, 60]
+
+    with pytest.raises(GeoCoordinateError):
+        GeoCoordinateArray([10, -100], [20, 20])
+
+    with pytest.raises(GeoCoordinateError):
+        GeoCoordinateArray([10, 10], [20, 200])
+
+    with pytest.raises(GeoCoordinateError):
+        GeoCoordinateArray([10, np.nan], [20, 20])
+
+    with pytest.raises(GeoCoordinateError):
+        GeoCoordinateArray([10, 20], [20])
+
+
+def test_geocoordinatearray_inverted():
+    inverted = GeoCoordinateArray([10, 20], [30, 40]).inverted
+    assert inverted.latitudes.tolist() == [30, 40]
+    assert inverted.longitudes.tolist() == [10, 20]
+
+    with pytest.raises(GeoCoordinateError):
+        GeoCoordinateArray([10], [120]).inverted
+
+
+def test_geocoordinatearray_getitem():
+    coords = GeoCoordinateArray([10, 20, 30], [40, 50, 60])
+    assert coords[1] == GeoCoordinate(20, 50)
+    assert coords[1:] == GeoCoordinateArray([20, 30], [50, 60])
+    assert len(coords[coords.latitudes > 15]) == 2
+
+
+def test_geocoordinatearray_to_tuple():
+    latitudes, longitudes = GeoCoordinateArray([10, 20], [30, 40]).to_tuple()
+    assert latitudes.tolist() == [10, 20]
+    assert longitudes.tolist() == [30, 40]
+
+
+def test_geocoordinatearray_array_round_trip():
+    coords = GeoCoordinateArray([10, 20], [30, 40])
+    assert coords.to_array().tolist() == [[10, 30], [20, 40]]
+    assert GeoCoordinateArray.from_array(coords.to_array()) == coords
+
+    with pytest.raises(GeoCoordinateError):
+        GeoCoordinateArray.from_array([10, 20, 30])
+
+
+def test_geocoordinatearray_coordinates_round_trip():
+    points = [GeoCoordinate(10, 30), GeoCoordinate(20, 40)]
+    coords = GeoCoordinateArray.from_coordinates(points)
+    assert coords == GeoCoordinateArray([10, 20], [30, 40])
+    assert coords.to_coordinates() == points
+    assert list(coords) == points
+
+
+def test_geocoordinatearray_add():
+    coords = GeoCoordinateArray([10, 20], [30, 40])
+    result = coords + GeoCoordinate(5, 5)
+    assert result == GeoCoordinateArray([15, 25], [35, 45])
+
+    result = coords + GeoCoordinateArray([1, 2], [3, 4])
+    assert result == GeoCoordinateArray([11, 22], [33, 44])
+
+    with pytest.raises(GeoCoordinateError):
+        coords + GeoCoordinate(80, 0)
+
+    with pytest.raises(GeoCoordinateError):
+        coords + GeoCoordinateArray([1], [1])
+
+
+def test_geocoordinatearray_sub():
+    coords = GeoCoordinateArray([10, 20], [30, 40])
+    result = coords - GeoCoordinate(5, 5)
+    assert result == GeoCoordinateArray([5, 15], [25, 35])
+
+    with pytest.raises(GeoCoordinateError):
+        coords - 5
+
+
+def test_geocoordinate_distance_to_step():
+    coord1 = GeoCoordinate(0, 0)
+    coord2 = GeoCoordinate(60, 10)
+    stepped = coord1.distance_to(coord2, step=1e-4)
+    midpoint = coord1.distance_to(coord2)
+    integrated = coord1.distance_to(coord2, method="integrated")
+    assert integrated == pytest.approx(stepped, rel=1e-5)
+    assert integrated != pytest.approx(midpoint, rel=1e-6)
+
+
+def test_geocoordinate_distance_to_vincenty():
+    # Flinders Peak to Buninyong, Vincenty's (1975) reference line
+    coord1 = GeoCoordinate(-37.95103341666667, 144.42486788888888)
+    coord2 = GeoCoordinate(-37.65282113888889, 143.92649552777777)
+    distance = coord1.distance_to(coord2, method="vincenty")
+    assert distance == pytest.approx(54972.271, abs=1e-3)
+    assert coord1.distance_to(coord1, method="vincenty") == 0
+
+    with pytest.raises(ValueError):
+        coord1.distance_to(coord2, method="unknown")
+
+
+def test_geocoordinateextent_bounds():
+    extent = GeoCoordinateExtent(GeoCoordinate(40, -3), GeoCoordinate(42, -4))
+    assert extent.bounds == (-4, 40, -3, 42)
+
+    extent = GeoCoordinateExtent.from_bounds(-4, 40, -3, 42)
+    assert extent.to_tuple() == (-4, 40, -3, 42)
+
+
+def test_geocoordinateextent_intersection_union():
+    a = GeoCoordinateExtent.from_bounds(0, 0, 10, 10)
+    b = GeoCoordinateExtent.from_bounds(5, -5, 15, 5)
+
+    assert a.intersection(b).bounds == (5, 0, 10, 5)
+    assert a.union(b).bounds == (0, -5, 15, 10)
+    assert a.intersection(GeoCoordinateExtent.from_bounds(11, 0, 12, 1)) is None
+
+    with pytest.raises(GeoCoordinateError):
+        a.union((0, 0, 1, 1))
+
+
+def test_geocoordinateextent_contains():
+    extent = GeoCoordinateExtent.from_bounds(0, 0, 10, 10)
+    points = GeoCoordinateArray([5, 10, 11, -1], [5, 0, 5, 5])
+
+    assert extent.contains(GeoCoordinate(5, 5))
+    assert not extent.contains(GeoCoordinate(5, 11))
+    assert extent.contains(points).tolist() == [True, True, False, False]
+
+
+def test_geocoordinateextent_buffer():
+    extent = GeoCoordinateExtent.from_bounds(-4, 40, -3, 42)
+    left, bottom, right, top = extent.buffer(10_000).bounds
+
+    corner = GeoCoordinate(top, right)
+    assert corner.distance_to(GeoCoordinate(42, -3)) >= 10_000
+    assert GeoCoordinate(42, -3).distance_to(
+        GeoCoordinate(42, right)
+    ) == pytest.approx(10_000, rel=0.01)
+    assert extent.buffer(0) == extent
+
+    polar = GeoCoordinateExtent.from_bounds(0, 85, 10, 89).buffer(200_000)
+    assert polar.bounds[::2] == (-180, 180)
+    assert polar.bounds[3] == 90
+
+    with pytest.raises(ValueError):
+        extent.buffer(-1)
+
+
+def test_geocoordinateextent_snap():
+    transform = Affine(0.5, 0, -4, 0, -0.5, 42)
+    extent = GeoCoordinateExtent.from_bounds(-3.8, 40.2, -2.7, 41.1)
+
+    assert extent.snap(transform).bounds == (-4, 40, -2.5, 41.5)
+    assert extent.snap(transform, outward=False).bounds == (-3.5, 40.5, -3, 41)
+
+    with pytest.raises(ValueError):
+        extent.snap(Affine(0.5, 0.1, -4, 0, -0.5, 42))
+
+
+def test_geocoordinateextent_split(src):
+    extent = GeoCoordinateExtent.from_bounds(-3.93, 38.52, 1.21, 41.97)
+    tiles = list(extent.split(src.transform, (30, 20), shape=src.shape))
+    windows = [extent_to_window(src, tile) for tile in tiles]
+
+    covered = np.zeros(src.shape, dtype=int)
+    for window in windows:
+        covered[window.toslices()] += 1
+
+    full = extent_to_window(src, extent.snap(src.transform))
+    assert full == Window(1, 0, 104, 70)
+    assert covered[full.toslices()].min() == 1
+    assert covered.sum() == full.width * full.height
+    assert all(w.width <= 30 and w.height <= 20 for w in windows)
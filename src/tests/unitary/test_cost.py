@@ -0,0 +1,206 @@
+import heapq
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.crs import CRS
+from rasterio.transform import from_origin
+from rasterio.warp import transform as warp_transform
+
+from tiffcomposer.core.coordinates import GeoCoordinate, GeoCoordinateArray
+from tiffcomposer.core.distance import distances
+from tiffcomposer.utils import cost
+from tiffcomposer.utils.cost import DIRECTIONS, cost_distance
+
+NODATA = -1.0
+TRANSFORM = from_origin(-4, 42, 0.05, 0.05)
+
+
+def center(row, col):
+    return GeoCoordinate(42 - 0.05 * (row + 0.5), -4 + 0.05 * (col + 0.5))
+
+
+def dijkstra(data, source, step):
+    cost = np.where(data == NODATA, np.nan, data.astype(np.float64))
+    height, width = data.shape
+    expected = np.full(data.shape, np.inf)
+    expected[source] = 0
+    heap = [(0.0, *source)]
+    while heap:
+        distance, row, col = heapq.heappop(heap)
+        if distance > expected[row, col]:
+            continue
+        for dr, dc in DIRECTIONS:
+            r, c = row + dr, col + dc
+            if 0 <= r < height and 0 <= c < width \
+                    and not np.isnan(cost[r, c]):
+                candidate = distance \
+                    + (cost[row, col] + cost[r, c]) / 2 * step(dr, dc)
+                if candidate < expected[r, c]:
+                    expected[r, c] = candidate
+                    heapq.heappush(heap, (candidate, r, c))
+    return expected
+
+
+@pytest.fixture
+def cost_path(tmp_path):
+    path = tmp_path / "cost.tif"
+    data = np.ones((40, 50), dtype=np.float32)
+    # A wall with a single gap at row 35
+    data[:, 25] = NODATA
+    data[35, 25] = 1
+
+    with rasterio.open(
+        path, "w", driver="GTiff", height=40, width=50, count=1,
+        dtype="float32", crs="EPSG:4326", transform=TRANSFORM,
+        nodata=NODATA, tiled=True, blockxsize=16, blockysize=16,
+    ) as dst:
+        dst.write(data, 1)
+        dst.set_band_description(1, "cost")
+
+    return path
+
+
+def test_geodesic_step_lengths(cost_path):
+    surface = cost_distance(cost_path, center(5, 2), band="cost")
+
+    # Straight moves along a row add up the geodesic step lengths
+    steps = GeoCoordinateArray.from_coordinates(
+        [center(5, col) for col in range(2, 13)]
+    )
+    expected = distances(steps[:-1], steps[1:]).sum()
+    assert surface.cost(center(5, 12)) == pytest.approx(expected)
+
+    # East-west steps are shorter than north-south ones at this latitude
+    assert surface.cost(center(5, 3)) < surface.cost(center(6, 2))
+    assert surface.cost(center(5, 2)) == 0
+
+
+def test_least_cost_path_through_gap(cost_path):
+    surface = cost_distance(cost_path, center(5, 5))
+    points, costs = surface.least_cost_path(center(5, 45))
+
+    assert points[0] == center(5, 5)
+    assert points[-1] == center(5, 45)
+    assert center(35, 25) in points.to_coordinates()
+    assert np.all(np.diff(costs) > 0)
+    assert costs[-1] == surface.cost(center(5, 45))
+
+    with pytest.raises(ValueError):
+        surface.least_cost_path(center(10, 25))
+
+
+def test_multiple_sources(cost_path):
+    a, b = center(5, 5), center(30, 40)
+    surface = cost_distance(cost_path, [a, b])
+    expected = np.minimum(
+        cost_distance(cost_path, a).to_array(),
+        cost_distance(cost_path, b).to_array()
+    )
+
+    np.testing.assert_allclose(surface.to_array(), expected)
+
+
+def test_memory_mapped(cost_path, tmp_path):
+    surface = cost_distance(cost_path, center(0, 0), workdir=tmp_path)
+
+    assert isinstance(surface.accumulated, np.memmap)
+    np.testing.assert_array_equal(
+        surface.to_array(), cost_distance(cost_path, center(0, 0)).to_array()
+    )
+
+    path = surface.write(tmp_path / "accumulated.tif")
+    with rasterio.open(path) as dataset:
+        data = dataset.read(1)
+    assert np.isnan(data[10, 25])
+    assert data[39, 49] == pytest.approx(surface.to_array()[39, 49])
+
+
+def test_invalid_sources(cost_path):
+    with pytest.raises(ValueError):
+        cost_distance(cost_path, GeoCoordinate(10, 10))
+
+    with pytest.raises(ValueError):
+        cost_distance(cost_path, center(3, 25))
+
+    with pytest.raises(ValueError):
+        cost_distance(cost_path, center(3, 3), band="elevation")
+
+
+def test_matches_dijkstra_without_crs(tmp_path):
+    rng = np.random.default_rng(1)
+    data = rng.uniform(0, 3, (30, 40)).astype(np.float32)
+    data[rng.random(data.shape) < 0.2] = NODATA
+    data[:4, :4] = 1
+    # Zero cost pixels are free to cross, not barriers
+    data[10:15, 5:20] = 0
+
+    path = tmp_path / "plain.tif"
+    with rasterio.open(
+        path, "w", driver="GTiff", height=30, width=40, count=1,
+        dtype="float32", transform=from_origin(0, 90, 2, 3), nodata=NODATA,
+    ) as dst:
+        dst.write(data, 1)
+
+    # Without a CRS, steps are Euclidean in pixel units of the transform
+    expected = dijkstra(data, (1, 1), lambda dr, dc: np.hypot(2 * dc, 3 * dr))
+
+    surface = cost_distance(path, GeoCoordinate(87.0, 3.0))
+    np.testing.assert_allclose(surface.to_array(), expected, rtol=1e-12)
+
+    destination = GeoCoordinate(90 - 3 * 28.5, 2 * 37.5)
+    points, costs = surface.least_cost_path(destination)
+    assert costs[0] == 0
+    assert costs[-1] == pytest.approx(expected[28, 37])
+    assert np.all(np.diff(costs) >= 0)
+
+
+def test_mostly_free_costs(tmp_path, monkeypatch):
+    rng = np.random.default_rng(2)
+    data = rng.uniform(1, 5, (120, 120)).astype(np.float32)
+    # Roads and water masks are mostly free to cross
+    data[rng.random(data.shape) < 0.7] = 0
+    data[rng.random(data.shape) < 0.05] = NODATA
+    data[60, 60] = 1
+
+    path = tmp_path / "free.tif"
+    with rasterio.open(
+        path, "w", driver="GTiff", height=120, width=120, count=1,
+        dtype="float32", transform=from_origin(0, 120, 1, 1), nodata=NODATA,
+    ) as dst:
+        dst.write(data, 1)
+
+    relaxations = []
+    relax = cost._relax
+    monkeypatch.setattr(
+        cost, "_relax",
+        lambda *args: relaxations.append(1) or relax(*args)
+    )
+    surface = cost_distance(path, GeoCoordinate(59.5, 60.5))
+
+    expected = dijkstra(data, (60, 60), lambda dr, dc: np.hypot(dr, dc))
+    np.testing.assert_allclose(surface.to_array(), expected, rtol=1e-12)
+    # Buckets are not one distinct accumulated cost wide
+    assert len(relaxations) < 1000
+
+
+def test_projected_step_lengths():
+    transform = from_origin(-500_000, 8_500_000, 10_000, 10_000)
+    lengths = cost._step_lengths(transform, 20, 30, CRS.from_epsg(3857))
+
+    def coordinate(row, col):
+        x, y = transform * (col + 0.5, row + 0.5)
+        (lon,), (lat,) = warp_transform("EPSG:3857", "EPSG:4326", [x], [y])
+        return GeoCoordinate(lat, lon)
+
+    # Steps are geodesic, shrinking with the Web Mercator scale at ~60N
+    east = DIRECTIONS.index((0, 1))
+    south = DIRECTIONS.index((1, 0))
+    for row in (0, 10, 19):
+        assert lengths[row, east] == pytest.approx(
+            coordinate(row, 15).distance_to(coordinate(row, 16))
+        )
+        assert lengths[row, south] == pytest.approx(
+            coordinate(row, 15).distance_to(coordinate(row + 1, 15))
+        )
+    assert lengths[:, east].max() < 10_000 * 0.6
@@ -0,0 +1,130 @@
+import os
+import signal
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from tiffcomposer.core.coordinates import GeoCoordinate, GeoCoordinateExtent
+from tiffcomposer.utils.dataset import DatasetPool, as_dataset
+from tiffcomposer.utils.extent import clip_tiff_to_extent
+
+EXTENT = GeoCoordinateExtent(GeoCoordinate(41.9, -3.9), GeoCoordinate(40, -1))
+
+
+def test_dataset_pool_hits_and_misses(raster_path):
+    with DatasetPool() as pool:
+        first = pool.get(raster_path)
+        assert pool.get(raster_path) is first
+        assert pool.get(str(raster_path)) is first
+        assert pool.get(raster_path, sharing=False) is not first
+        assert pool.stats == {"hits": 2, "misses": 2, "evictions": 0, "open": 2}
+
+    assert first.closed
+    assert pool.stats["open"] == 0
+
+
+def test_dataset_pool_eviction(raster_path):
+    pool = DatasetPool(max_size=1)
+    first = pool.get(raster_path)
+    pool.get(raster_path, sharing=False)
+    assert first.closed
+    assert pool.stats["evictions"] == 1
+    pool.clear()
+
+    with pytest.raises(ValueError):
+        DatasetPool(max_size=0)
+
+
+def test_dataset_pool_threads(raster_path):
+    pool = DatasetPool()
+    handles = []
+    thread = threading.Thread(target=lambda: handles.append(
+        pool.get(raster_path)
+    ))
+    thread.start()
+    thread.join()
+
+    assert pool.get(raster_path) is not handles[0]
+    # Readers of finished threads are closed
+    assert handles[0].closed
+    assert pool.stats["open"] == 1
+    pool.clear()
+
+
+def test_dataset_pool_thread_churn(raster_path):
+    pool = DatasetPool()
+    handles = []
+
+    for _ in range(50):
+        thread = threading.Thread(target=lambda: handles.append(
+            pool.get(raster_path)
+        ))
+        thread.start()
+        thread.join()
+
+    assert all(handle.closed for handle in handles)
+    assert pool.stats["open"] == 0
+    assert len(pool._caches) == 0
+
+
+def test_dataset_pool_fork(raster_path, monkeypatch):
+    pool = DatasetPool()
+    parent = pool.get(raster_path)
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    child = pool.get(raster_path)
+    assert child is not parent
+    assert not parent.closed
+    assert pool.stats == {"hits": 0, "misses": 1, "evictions": 0, "open": 1}
+    monkeypatch.undo()
+    parent.close()
+    child.close()
+
+
+def test_utilities_accept_paths(raster_path, src):
+    assert as_dataset(src) is src
+    assert as_dataset(raster_path) is as_dataset(raster_path)
+    np.testing.assert_array_equal(
+        clip_tiff_to_extent(raster_path, EXTENT),
+        clip_tiff_to_extent(src, EXTENT)
+    )
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_dataset_pool_fork_while_locked(raster_path):
+    pool = DatasetPool()
+    pool.get(raster_path)
+    locked, release = threading.Event(), threading.Event()
+
+    def hold():
+        with pool._lock:
+            locked.set()
+            release.wait(10)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    locked.wait(10)
+
+    pid = os.fork()
+    if pid == 0:
+        # The lock holder does not exist in the child
+        code = 1
+        try:
+            pool.get(raster_path)
+            code = 0 if pool.stats["open"] == 1 else 2
+        finally:
+            os._exit(code)
+
+    release.set()
+    thread.join()
+    deadline = time.monotonic() + 10
+    while (status := os.waitpid(pid, os.WNOHANG))[0] == 0:
+        if time.monotonic() > deadline:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            pytest.fail("Child deadlocked on the inherited pool lock.")
+        time.sleep(0.01)
+
+    assert os.waitstatus_to_exitcode(status[1]) == 0
+    pool.clear()
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+import tiffcomposer.core.distance as distance_module
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateError)
+from tiffcomposer.core.distance import (VincentyFallbackWarning,
+                                        distance_matrix, distances,
+                                        distances_from, earth_radius)
+
+A = GeoCoordinateArray([0, 40.4168, -33.9, 89], [0, -3.7026, 151.2, -170])
+B = GeoCoordinateArray([0, 41.3874, 51.5, -60], [1, 2.1686, -0.12, 30])
+
+
+def test_earth_radius():
+    latitudes = np.array([0, 30, 45, 90])
+    expected = [GeoCoordinate.earth_radius(lat) for lat in latitudes]
+    assert earth_radius(latitudes) == pytest.approx(expected)
+
+
+def test_distances():
+    expected = [p.distance_to(q) for p, q in zip(A, B)]
+    assert distances(A, B) == pytest.approx(expected)
+
+    with pytest.raises(GeoCoordinateError):
+        distances(A, B[:2])
+
+
+def test_distances_from():
+    origin = GeoCoordinate(40.4168, -3.7026)
+    expected = [origin.distance_to(q) for q in B]
+    assert distances_from(origin, B) == pytest.approx(expected)
+
+    with pytest.raises(GeoCoordinateError):
+        distances_from(A, B)
+
+
+def test_distance_matrix():
+    expected = [[p.distance_to(q) for q in B] for p in A]
+    assert distance_matrix(A, B) == pytest.approx(np.array(expected))
+
+
+def test_distance_matrix_chunks():
+    full = distance_matrix(A, B)
+    out = np.zeros((len(A), len(B)))
+    result = distance_matrix(A, B, chunk_pairs=1, out=out)
+    assert result is out
+    np.testing.assert_array_equal(result, full)
+
+    with pytest.raises(ValueError):
+        distance_matrix(A, B, out=np.zeros((1, 1)))
+
+
+@pytest.mark.parametrize("method", ["integrated", "vincenty"])
+def test_distance_methods(method):
+    expected = [p.distance_to(q, method=method) for p, q in zip(A, B)]
+    assert distances(A, B, method=method) == pytest.approx(expected)
+
+    expected = [[p.distance_to(q, method=method) for q in B] for p in A]
+    result = distance_matrix(A, B, chunk_pairs=3, method=method)
+    assert result == pytest.approx(np.array(expected))
+
+
+def test_vincenty_antipodal_fallback():
+    a = GeoCoordinateArray([0.0, 40.4], [0.0, -3.7])
+    b = GeoCoordinateArray([0.5, 41.4], [179.7, 2.2])
+    with pytest.warns(VincentyFallbackWarning, match="1 nearly antipodal"):
+        result = distances(a, b, method="vincenty")
+
+    # The converging pair is unaffected by the nearly antipodal one
+    assert result[1] == pytest.approx(
+        a[1].distance_to(b[1], method="vincenty")
+    )
+    assert result[0] == pytest.approx(
+        distances(a[:1], b[:1], method="integrated")[0]
+    )
+    with pytest.warns(VincentyFallbackWarning):
+        assert np.isfinite(distance_matrix(a, b, method="vincenty")).all()
+
+
+def test_integrated_chunks_count_nodes(monkeypatch):
+    sizes = []
+    integrated = distance_module.integrated_radius
+
+    def recorded(latitudes1, latitudes2):
+        sizes.append(latitudes1.size * distance_module._GL_NODES.size)
+        return integrated(latitudes1, latitudes2)
+
+    monkeypatch.setattr(distance_module, "integrated_radius", recorded)
+    distance_matrix(A, B, chunk_pairs=16 * len(B), method="integrated")
+
+    assert max(sizes) <= 16 * len(B)
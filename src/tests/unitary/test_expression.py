@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+import rasterio
+from affine import Affine
+from rasterio.windows import Window
+
+from tiffcomposer.core.composition import BandSource, compose
+from tiffcomposer.utils.expression import Bands, BandExpression, where
+
+NODATA = -99999
+
+
+@pytest.fixture
+def composed(tmp_path, raster_path, raster_data):
+    nir = np.arange(raster_data.size, dtype=np.float32).reshape(
+        raster_data.shape
+    ) + 1
+
+    return compose(
+        [
+            BandSource(raster_path, name="red"),
+            BandSource(nir, name="nir"),
+        ],
+        tmp_path / "composed.tif",
+        nodata=NODATA,
+        tile_size=32
+    )
+
+
+def _bands(path):
+    with rasterio.open(path) as src:
+        red, nir = src.read().astype(np.float64)
+    return red, nir, red == NODATA
+
+
+def test_ndvi(composed):
+    b = Bands(composed)
+    ndvi = (b["nir"] - b["red"]) / (b["nir"] + b["red"])
+    red, nir, hidden = _bands(composed)
+
+    window = Window(0, 0, 40, 24)
+    result = ndvi.evaluate(window)
+    expected = (nir - red) / (nir + red)
+    expected[hidden] = np.nan
+
+    assert result == pytest.approx(
+        expected[window.toslices()], nan_ok=True
+    )
+    assert np.isnan(result[:8, :8]).all()
+
+
+def test_shared_bands_read_once(composed, monkeypatch):
+    b = Bands(composed)
+    expression = (b["nir"] - b[1]) / (b["nir"] + b["red"]) * 2 + b[2]
+    reads = []
+    read = BandExpression.read
+
+    def counted(self, window):
+        reads.append(self.band)
+        return read(self, window)
+
+    monkeypatch.setattr(BandExpression, "read", counted)
+    expression.evaluate(Window(0, 0, 16, 16))
+
+    assert sorted(reads) == [1, 2]
+    # Intermediates reuse a few window buffers
+    assert len(expression._compiled().slot_types) <= 3
+
+
+def test_where_and_comparisons(composed):
+    b = Bands(composed)
+    red, nir, hidden = _bands(composed)
+    expression = where((b["red"] > 0) & ~(b["nir"] < 100), -b["red"], 1.5)
+
+    window = Window(8, 32, 80, 16)
+    result = expression.evaluate(window)
+    expected = np.where((red > 0) & ~(nir < 100), -red, 1.5)
+
+    assert result == pytest.approx(expected[window.toslices()])
+
+    out = np.empty((16, 80), dtype=np.float32)
+    assert expression.evaluate(window, out=out) is out
+
+
+def test_write(tmp_path, composed):
+    b = Bands(composed)
+    red, nir, hidden = _bands(composed)
+    output = (abs(b["red"]) ** 0.5 * 2 - 1).write(
+        tmp_path / "result.tif", name="index", max_workers=2
+    )
+
+    with rasterio.open(output) as dst:
+        assert dst.count == 1
+        assert dst.descriptions == ("index",)
+        assert dst.dtypes[0] == "float32"
+        assert np.isnan(dst.nodata)
+        result = dst.read(1)
+
+    expected = np.abs(red) ** 0.5 * 2 - 1
+    expected[hidden] = np.nan
+    assert result == pytest.approx(expected, rel=1e-6, nan_ok=True)
+
+
+def test_compose_source(tmp_path, composed):
+    b = Bands(composed)
+    output = compose(
+        [BandSource(composed, band=2), BandSource(b["nir"] / 2, "half")],
+        tmp_path / "stack.tif",
+        tile_size=32
+    )
+
+    with rasterio.open(output) as dst:
+        nir, half = dst.read()
+
+    assert half == pytest.approx(nir / 2)
+
+
+def test_invalid_expressions(tmp_path, composed):
+    b = Bands(composed)
+
+    with pytest.raises(ValueError):
+        b["swir"]
+    with pytest.raises(TypeError):
+        b["red"] + "1"
+    with pytest.raises(ValueError):
+        (b["red"] > 0).write(tmp_path / "mask.tif", dtype="uint8")
+
+
+def test_bands_on_other_grids(tmp_path, raster_path, raster_data):
+    with rasterio.open(raster_path) as src:
+        profile = src.profile
+
+    shifted = tmp_path / "shifted.tif"
+    profile["transform"] *= Affine.translation(1, 0)
+    with rasterio.open(shifted, "w", **profile) as dst:
+        dst.write(raster_data, 1)
+
+    total = BandExpression(raster_path, 1) + BandExpression(shifted, 1)
+    with pytest.raises(ValueError):
+        total.shape
+    with pytest.raises(ValueError):
+        total.evaluate(Window(0, 0, 8, 8))
+    with pytest.raises(ValueError):
+        total.write(tmp_path / "total.tif")
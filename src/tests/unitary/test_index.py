@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateError)
+from tiffcomposer.core.distance import distance_matrix
+from tiffcomposer.core.index import GeoSpatialIndex
+
+rng = np.random.default_rng(0)
+POINTS = GeoCoordinateArray(
+    np.concatenate([rng.uniform(-90, 90, 400), rng.uniform(35, 45, 400)]),
+    np.concatenate([rng.uniform(-180, 180, 400), rng.uniform(-10, 5, 400)])
+)
+QUERIES = GeoCoordinateArray(
+    [40.4, 41.0, 89.9, -89.5, 0.0, 10.0],
+    [-3.7, 2.0, 45.0, -120.0, 179.9, -179.95]
+)
+
+
+@pytest.mark.parametrize("cell_size", [0.5, 2.0, 30.0])
+def test_query_nearest(cell_size):
+    index = GeoSpatialIndex(POINTS, cell_size=cell_size)
+    distances, indices = index.query_nearest(QUERIES, k=5)
+    expected = np.sort(distance_matrix(QUERIES, POINTS), axis=1)[:, :5]
+
+    assert distances == pytest.approx(expected)
+    assert np.take_along_axis(
+        distance_matrix(QUERIES, POINTS), indices, axis=1
+    ) == pytest.approx(distances)
+
+
+@pytest.mark.parametrize("radius", [0.0, 50_000, 500_000, 3_000_000])
+def test_query_radius(radius):
+    index = GeoSpatialIndex(POINTS, cell_size=1.0)
+    distances, indices = index.query_radius(QUERIES, radius)
+    matrix = distance_matrix(QUERIES, POINTS)
+
+    for row, found, found_distances in zip(matrix, indices, distances):
+        assert set(found) == set(np.flatnonzero(row <= radius))
+        assert np.all(np.diff(found_distances) >= 0)
+
+
+def test_single_coordinate():
+    index = GeoSpatialIndex(POINTS)
+    point = GeoCoordinate(40.4, -3.7)
+    distances, indices = index.query_nearest(point, k=2)
+    assert distances.shape == indices.shape == (1, 2)
+
+
+def test_invalid_queries():
+    index = GeoSpatialIndex(POINTS)
+
+    with pytest.raises(ValueError):
+        index.query_nearest(QUERIES, k=len(POINTS) + 1)
+    with pytest.raises(ValueError):
+        index.query_radius(QUERIES, -1)
+    with pytest.raises(GeoCoordinateError):
+        index.query_nearest([(0, 0)])
+    with pytest.raises(ValueError):
+        GeoSpatialIndex(POINTS, cell_size=0)
+
+
+def test_save_load(tmp_path):
+    index = GeoSpatialIndex(POINTS, cell_size=2.0)
+    path = tmp_path / "index.npz"
+    index.save(path)
+    loaded = GeoSpatialIndex.load(path)
+
+    assert len(loaded) == len(index)
+    assert loaded.coordinates == index.coordinates
+    for a, b in zip(index.query_nearest(QUERIES, 3),
+                    loaded.query_nearest(QUERIES, 3)):
+        assert np.array_equal(a, b)
+
+
+@pytest.mark.parametrize("radius", [500_000, 3_000_000])
+def test_antimeridian_uneven_cells(radius):
+    # 7 degree cells do not divide 360, so the last column is narrower
+    points = GeoCoordinateArray(
+        np.append(rng.uniform(-30, 30, 200), 11.25),
+        np.append(rng.uniform(-180, 180, 200), -165.45)
+    )
+    queries = GeoCoordinateArray([7.42, 10.0], [168.03, 179.9])
+    index = GeoSpatialIndex(points, cell_size=7)
+    matrix = distance_matrix(queries, points)
+
+    _, indices = index.query_radius(queries, radius)
+    for row, found in zip(matrix, indices):
+        assert set(found) == set(np.flatnonzero(row <= radius))
+
+    # Across the antimeridian, 2,943 km away from the first query
+    if radius > 2_943_000:
+        assert len(points) - 1 in indices[0]
+
+    distances, _ = index.query_nearest(queries, k=3)
+    assert distances == pytest.approx(np.sort(matrix, axis=1)[:, :3])
+
+
+def test_chunked_queries():
+    index = GeoSpatialIndex(POINTS, cell_size=30.0)
+    queries = GeoCoordinateArray(
+        rng.uniform(35, 45, 50), rng.uniform(-10, 5, 50)
+    )
+
+    distances, indices = index.query_nearest(queries, k=3, chunk_pairs=100)
+    expected = index.query_nearest(queries, k=3)
+    assert distances == pytest.approx(expected[0])
+    assert (indices == expected[1]).all()
+
+    _, found = index.query_radius(queries, 100_000, chunk_pairs=100)
+    _, expected = index.query_radius(queries, 100_000)
+    assert all(
+        (a == b).all() for a, b in zip(found, expected)
+    )
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateExtent)
+from tiffcomposer.utils.extent import clip_tiff_to_extent
+from tiffcomposer.utils.memmap import map_band
+from tiffcomposer.utils.pixel import (get_value_from_coordinates,
+                                      sample_coordinates)
+
+LAYOUTS = [
+    {"tiled": True, "blockxsize": 32, "blockysize": 16},
+    {"blockysize": 8},
+    {},
+    {"tiled": True, "blockxsize": 32, "blockysize": 32, "interleave": "band"},
+    {"blockysize": 8, "interleave": "band"},
+]
+
+WINDOWS = [
+    Window(0, 0, 100, 70),
+    Window(3, 5, 10, 7),
+    Window(30, 10, 50, 40),
+    Window(99, 69, 1, 1),
+]
+
+
+def write_raw(path, count, **options):
+    data = np.arange(count * 70 * 100, dtype=np.int32).reshape(count, 70, 100)
+    with rasterio.open(
+        path, "w", driver="GTiff", width=100, height=70, count=count,
+        dtype=data.dtype, crs="EPSG:4326",
+        transform=from_origin(-4, 42, 0.05, 0.05), **options
+    ) as dst:
+        dst.write(data)
+    return data
+
+
+@pytest.mark.parametrize("count", [1, 3])
+@pytest.mark.parametrize("options", LAYOUTS)
+def test_map_band(tmp_path, count, options):
+    path = tmp_path / "raw.tif"
+    data = write_raw(path, count, **options)
+
+    with rasterio.open(path) as src:
+        for band in range(1, count + 1):
+            mapped = map_band(src, band)
+            assert mapped is not None
+            assert mapped.tiled == options.get("tiled", False)
+
+            for window in WINDOWS:
+                np.testing.assert_array_equal(
+                    mapped.read(window),
+                    data[band - 1][window.toslices()]
+                )
+
+            rows = np.array([0, 17, 69, 40])
+            cols = np.array([0, 33, 99, 64])
+            np.testing.assert_array_equal(
+                mapped.take(rows, cols),
+                data[band - 1, rows, cols]
+            )
+
+
+def test_map_band_zero_copy(tmp_path):
+    path = tmp_path / "raw.tif"
+    write_raw(path, 1, blockysize=8)
+
+    with rasterio.open(path) as src:
+        mapped = map_band(src)
+        window = mapped.read(Window(3, 5, 10, 7))
+        assert isinstance(window.base, np.memmap)
+        assert not window.flags.writeable
+
+
+def test_map_band_compressed(src):
+    assert map_band(src) is None
+
+
+def test_readers_use_memmap(tmp_path):
+    path = tmp_path / "raw.tif"
+    data = write_raw(path, 1, blockysize=8)[0]
+    extent = GeoCoordinateExtent(
+        GeoCoordinate(41.9, -3.9),
+        GeoCoordinate(40.5, -1.2)
+    )
+    coordinates = GeoCoordinateArray([41.99, 40.0, 50.0], [-3.99, 0.0, 0.0])
+
+    with rasterio.open(path) as src:
+        clipped = clip_tiff_to_extent(src, extent)
+        assert not clipped.flags.writeable
+        np.testing.assert_array_equal(clipped, src.read(1, window=(
+            (2, 30), (2, 56)
+        )))
+
+        values = sample_coordinates(coordinates, src)
+        np.testing.assert_array_equal(values[:2], [data[0, 0], data[40, 80]])
+        assert np.isnan(values[2])
+
+        assert get_value_from_coordinates(coordinates[1], src) == data[40, 80]
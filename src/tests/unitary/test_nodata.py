@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from tiffcomposer.core.coordinates import (GeoCoordinate,
+                                           GeoCoordinateExtent)
+from tiffcomposer.utils.extent import (clip_tiff_to_extent,
+                                       get_population_density_in_extent)
+from tiffcomposer.utils.nodata import mask_nodata, reduce_valid, valid_mask
+from tiffcomposer.utils.pixel import get_value_from_coordinates
+
+DATA = np.array([[-5.0, 0.0, np.nan], [3.0, -1.0, 7.0]], dtype=np.float32)
+
+
+def test_valid_mask():
+    assert valid_mask(DATA, -1.0).tolist() == [
+        [True, True, False], [True, False, True]
+    ]
+    assert valid_mask(DATA, None).tolist() == [
+        [True, True, False], [True, True, True]
+    ]
+    assert valid_mask(np.arange(4), None).all()
+
+
+def test_mask_nodata_is_a_view():
+    data = DATA.copy()
+    masked = mask_nodata(data, -1.0)
+
+    assert np.shares_memory(masked.data, data)
+    assert masked.count() == 4
+    assert masked.sum() == pytest.approx(5.0)
+
+
+@pytest.mark.parametrize("mode, expected", [
+    ("mean", 1.25), ("sum", 5.0), ("max", 7.0), ("min", -5.0), ("count", 4),
+])
+def test_reduce_valid(mode, expected):
+    assert reduce_valid(DATA, mode, -1.0) == pytest.approx(expected)
+
+
+def test_reduce_valid_integers():
+    data = np.array([[0, 9], [255, 4]], dtype=np.uint8)
+
+    assert reduce_valid(data, "mean", 255) == pytest.approx(13 / 3)
+    assert reduce_valid(data, "min", 255) == 0
+    assert reduce_valid(data, "max", 255) == 9
+
+
+def test_reduce_valid_empty():
+    data = np.full((2, 2), -1.0)
+
+    assert np.isnan(reduce_valid(data, "mean", -1.0))
+    assert np.isnan(reduce_valid(data, "max", -1.0))
+    assert reduce_valid(data, "sum", -1.0) == 0
+    assert reduce_valid(data, "count", -1.0) == 0
+
+    with pytest.raises(ValueError):
+        reduce_valid(data, "median", -1.0)
+
+
+def test_population_density_keeps_zeros(src, raster_data):
+    # Pixels 36:48 x 56:74, around the block of zeros
+    extent = GeoCoordinateExtent.from_bounds(-1.2, 39.6, -0.3, 40.2)
+    expected = raster_data[36:48, 56:74]
+
+    assert get_population_density_in_extent(extent, src, "min") == 0
+    assert get_population_density_in_extent(extent, src) == pytest.approx(
+        expected.mean()
+    )
+
+
+def test_nodata_excluded(src, raster_data):
+    # Pixels 0:12 x 0:12, overlapping the nodata corner
+    extent = GeoCoordinateExtent.from_bounds(-4, 41.4, -3.4, 42)
+    expected = raster_data[:12, :12]
+    expected = expected[expected != src.nodata]
+
+    assert get_population_density_in_extent(extent, src) == pytest.approx(
+        expected.mean()
+    )
+    assert clip_tiff_to_extent(src, extent, masked=True).count() == \
+        expected.size
+    assert get_value_from_coordinates(
+        GeoCoordinate(41.99, -3.99), src, raster_data
+    ) is None
@@ -0,0 +1,169 @@
+import os
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from tiffcomposer.core.composition import compose
+from tiffcomposer.core.coordinates import GeoCoordinateExtent
+from tiffcomposer.utils import overviews
+from tiffcomposer.utils.extent import (extent_to_window,
+                                       get_population_density_in_extent)
+from tiffcomposer.utils.overviews import (Pyramid, build_pyramid,
+                                          extent_stats, open_pyramid,
+                                          pyramid_path)
+from tiffcomposer.utils.zonal import zonal_stats
+
+STATS = ("mean", "min", "max", "sum", "count")
+
+
+def test_pyramid_levels_are_exact(src, raster_data):
+    pyramid = Pyramid.build(src, factors=(4, 8, 32))
+    valid = raster_data != src.nodata
+
+    assert pyramid.factors == [4, 8, 32]
+    for factor, (total, count, low, high) in pyramid.levels.items():
+        assert total.sum() == pytest.approx(raster_data[valid].sum())
+        assert count.sum() == valid.sum()
+        assert low.min() == raster_data[valid].min()
+        assert high.max() == raster_data[valid].max()
+
+    # Aligned windows are answered exactly by the coarsest level
+    window = Window(32, 0, 64, 64)
+    assert pyramid.select(window) == (32, Window(1, 0, 2, 2))
+    expected = raster_data[window.toslices()]
+    expected = expected[expected != src.nodata]
+    assert pyramid.stats(window, ("mean", "count")) == pytest.approx(
+        {"mean": expected.mean(), "count": expected.size}
+    )
+
+
+def test_pyramid_selection_tolerance(src):
+    pyramid = Pyramid.build(src, factors=(4, 16))
+    window = Window(3, 5, 50, 41)
+
+    assert pyramid.select(window) is None
+    assert pyramid.select(window, tolerance=0.2)[0] == 4
+    assert pyramid.select(window, tolerance=1.0)[0] == 16
+
+    with pytest.raises(ValueError):
+        Pyramid.build(src, factors=(4, 6))
+
+
+def test_extent_stats(raster_path):
+    extent = GeoCoordinateExtent.from_bounds(-3.2, 39.1, -0.9, 41.3)
+    exact = zonal_stats(raster_path, [extent], STATS)[0]
+
+    assert extent_stats(raster_path, extent, STATS) == pytest.approx(exact)
+
+    build_pyramid(raster_path, factors=(4, 8))
+    assert open_pyramid(raster_path) is not None
+    assert extent_stats(raster_path, extent, STATS) == pytest.approx(exact)
+
+    pyramid = open_pyramid(raster_path)
+    window = extent_to_window(raster_path, extent)
+    assert pyramid.select(window, tolerance=0.25) is not None
+
+    approximate = extent_stats(raster_path, extent, STATS, tolerance=0.25)
+    assert approximate == pyramid.stats(window, STATS, tolerance=0.25)
+    assert approximate["mean"] == pytest.approx(exact["mean"], rel=0.05)
+
+    with pytest.raises(ValueError):
+        extent_stats(raster_path, extent, ("p50",))
+
+
+def test_extent_stats_reduce_blocks(raster_path, monkeypatch):
+    reads = []
+    read = overviews.read_window
+
+    def counted(src, band, window, cache=None):
+        reads.append(window)
+        return read(src, band, window, cache)
+
+    monkeypatch.setattr(overviews, "read_window", counted)
+    extent = GeoCoordinateExtent.from_bounds(-3.2, 39.1, -0.9, 41.3)
+
+    assert extent_stats(raster_path, extent, STATS) == pytest.approx(
+        zonal_stats(raster_path, [extent], STATS)[0]
+    )
+    # The window spans 2x2 blocks, each reduced on its own
+    assert len(reads) == 4
+
+    # Only nodata pixels
+    empty = extent_stats(
+        raster_path, GeoCoordinateExtent.from_bounds(-4, 41.65, -3.65, 42),
+        STATS
+    )
+    assert empty["count"] == 0 and empty["sum"] == 0
+    assert np.isnan(empty["mean"]) and np.isnan(empty["min"])
+
+
+def test_extent_paths_use_pyramid(raster_path, monkeypatch):
+    extent = GeoCoordinateExtent.from_bounds(-3.2, 39.1, -0.9, 41.3)
+    exact = zonal_stats(raster_path, [extent], STATS)[0]
+    build_pyramid(raster_path, factors=(4, 8))
+    approximate = extent_stats(raster_path, extent, STATS, tolerance=0.25)
+
+    # Answered from the pyramid without reading any pixel
+    monkeypatch.setattr("tiffcomposer.utils.zonal.read_window", None)
+    monkeypatch.setattr("tiffcomposer.utils.extent.read_window", None)
+    assert zonal_stats(raster_path, [extent], STATS, tolerance=0.25) \
+        == [approximate]
+    assert get_population_density_in_extent(
+        extent, raster_path, "max", tolerance=0.25
+    ) == approximate["max"]
+    monkeypatch.undo()
+
+    # Without tolerance the unaligned extent is read exactly
+    assert zonal_stats(raster_path, [extent], STATS)[0] \
+        == pytest.approx(exact)
+    assert get_population_density_in_extent(extent, raster_path, "max") \
+        == exact["max"]
+
+
+def test_opened_pyramids_are_cached(raster_path, monkeypatch):
+    build_pyramid(raster_path, factors=(4, 8))
+    extent = GeoCoordinateExtent.from_bounds(-3.2, 39.1, -0.9, 41.3)
+    loads = []
+    load = Pyramid.load.__func__
+
+    def counted(cls, path):
+        loads.append(path)
+        return load(cls, path)
+
+    monkeypatch.setattr(Pyramid, "load", classmethod(counted))
+    first = extent_stats(raster_path, extent, STATS, tolerance=0.25)
+
+    assert extent_stats(raster_path, extent, STATS, tolerance=0.25) == first
+    assert open_pyramid(raster_path) is open_pyramid(raster_path)
+    assert len(loads) == 1
+
+
+def test_stale_pyramid(tmp_path, raster_path, raster_data):
+    pyramid = build_pyramid(raster_path, factors=(4,))
+    loaded = Pyramid.load(pyramid_path(raster_path))
+
+    assert loaded.factors == pyramid.factors
+    assert loaded.key == pyramid.key
+    assert loaded.is_fresh(raster_path)
+
+    stat = os.stat(raster_path)
+    os.utime(raster_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with rasterio.open(raster_path) as src:
+        assert open_pyramid(src) is None
+
+
+def test_compose_pyramids(tmp_path, raster_data):
+    path = compose([raster_data, raster_data * 2], tmp_path / "out.tif",
+                   transform=from_origin(-4, 42, 0.05, 0.05),
+                   crs="EPSG:4326", tile_size=32, pyramids=True)
+
+    for band in (1, 2):
+        pyramid = open_pyramid(path, band)
+        assert pyramid is not None
+        assert pyramid.band == band
+        assert pyramid.levels[4][0].sum() == pytest.approx(
+            band * raster_data.astype(np.float64).sum()
+        )
@@ -0,0 +1,83 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from tiffcomposer.core.coordinates import GeoCoordinateExtent
+from tiffcomposer.utils import parallel
+from tiffcomposer.utils.extent import get_population_density_in_extent
+from tiffcomposer.utils.parallel import map_extents
+
+CONTEXT = multiprocessing.get_context("spawn")
+
+
+@pytest.fixture
+def extents():
+    rng = np.random.default_rng(1)
+    left = rng.uniform(-3.5, 1.5, 60)
+    top = rng.uniform(38, 41.5, 60)
+    return [
+        GeoCoordinateExtent.from_bounds(x, y - 0.4, x + 0.6, y)
+        for x, y in zip(left, top)
+    ]
+
+
+def test_map_extents_ordered(raster_path, extents):
+    expected = [
+        get_population_density_in_extent(extent, raster_path, "max")
+        for extent in extents
+    ]
+    results = list(map_extents(raster_path, extents, max_workers=2,
+                               chunk_size=7, mp_context=CONTEXT, mode="max"))
+
+    assert [index for index, _ in results] == list(range(len(extents)))
+    assert [value for _, value in results] == pytest.approx(expected)
+
+
+def test_map_extents_unordered(raster_path, extents):
+    results = dict(map_extents(raster_path, extents, ordered=False,
+                               max_workers=2, chunk_size=5, max_pending=1,
+                               mp_context=CONTEXT))
+
+    assert sorted(results) == list(range(len(extents)))
+    assert results[3] == pytest.approx(
+        get_population_density_in_extent(extents[3], raster_path)
+    )
+
+
+def test_map_extents_errors(raster_path, extents):
+    with pytest.raises(ValueError):
+        list(map_extents(raster_path, extents, max_workers=1,
+                         mp_context=CONTEXT, mode="median"))
+
+    with pytest.raises(ValueError):
+        list(map_extents(raster_path, extents, chunk_size=0))
+
+
+def test_map_extents_ordered_memory_is_bounded(raster_path, monkeypatch):
+    # Extents sweep back and forth, far from their locality order
+    extents = [
+        GeoCoordinateExtent.from_bounds(x, 39.0, x + 0.1, 39.1)
+        for x in np.tile(np.r_[np.linspace(-3.5, 1.5, 10),
+                               np.linspace(1.5, -3.5, 10)], 10)
+    ]
+    submitted = []
+    submit = parallel.ProcessPoolExecutor.submit
+
+    def counted(self, *args):
+        # Called as submit(_run_chunk, path, func, chunk, ...)
+        submitted.append(len(args[3]))
+        return submit(self, *args)
+
+    monkeypatch.setattr(parallel.ProcessPoolExecutor, "submit", counted)
+    outstanding = []
+    results = []
+    for result in map_extents(raster_path, extents, max_workers=2,
+                              chunk_size=4, max_pending=2,
+                              mp_context=CONTEXT):
+        results.append(result)
+        outstanding.append(sum(submitted) - len(results))
+
+    assert [index for index, _ in results] == list(range(len(extents)))
+    # In flight and held back results stay within a few windows
+    assert max(outstanding) <= 3 * 2 * 4
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from tiffcomposer.core.coordinates import GeoCoordinateArray
+from tiffcomposer.utils.pixel import (get_value_from_coordinates,
+                                      sample_coordinates)
+
+COORDINATES = GeoCoordinateArray(
+    [41.99, 40.0, 37.21, 39.123, 50.0, 41.0],
+    [-3.99, 0.0, 2.39, -1.456, 0.0, 3.0]
+)
+
+
+def test_sample_coordinates(src, raster_data):
+    values = sample_coordinates(COORDINATES, src)
+
+    for coordinate, value in zip(COORDINATES, values):
+        expected = get_value_from_coordinates(coordinate, src, raster_data)
+        if expected is None:
+            assert np.isnan(value)
+        else:
+            assert value == expected
+
+
+def test_sample_coordinates_masked(src):
+    values = sample_coordinates(COORDINATES, src, masked=True)
+    assert values.dtype == np.float32
+    # The first point lies on a nodata pixel
+    assert values.mask.tolist() == [True] + [False] * 3 + [True] * 2
+
+
+def test_sample_coordinates_empty(src):
+    values = sample_coordinates(GeoCoordinateArray([], []), src)
+    assert values.shape == (0,)
+
+
+@pytest.fixture
+def ramp_path(tmp_path):
+    path = tmp_path / "ramp.tif"
+    rows, cols = np.mgrid[:64, :80]
+
+    with rasterio.open(
+        path, "w", driver="GTiff", height=64, width=80, count=1,
+        dtype="float64", crs="EPSG:4326",
+        transform=from_origin(-4, 42, 0.05, 0.05), tiled=True,
+        blockxsize=16, blockysize=16,
+    ) as dst:
+        dst.write(2 * rows + 3 * cols + 0.01 * rows**2, 1)
+
+    return path
+
+
+@pytest.mark.parametrize("method", ["bilinear", "bicubic"])
+def test_interpolated_sampling(ramp_path, method):
+    rng = np.random.default_rng(3)
+    rows = rng.uniform(2, 62, 500)
+    cols = rng.uniform(2, 78, 500)
+    coordinates = GeoCoordinateArray(42 - 0.05 * rows, -4 + 0.05 * cols)
+
+    values = sample_coordinates(coordinates, ramp_path, method=method)
+
+    # Pixel centers sit at half-integer pixel coordinates
+    rows, cols = rows - 0.5, cols - 0.5
+    expected = 2 * rows + 3 * cols + 0.01 * rows**2
+    if method == "bicubic":
+        assert values == pytest.approx(expected)
+    else:
+        assert values == pytest.approx(expected, abs=0.01 / 4)
+
+
+def test_interpolated_sampling_nodata(src, raster_data):
+    # Pixel coordinates (8.3, 8.3): the neighbour centers are (7, 7), a
+    # nodata pixel, (7, 8), (8, 7) and (8, 8)
+    coordinates = GeoCoordinateArray(
+        [42 - 0.05 * 8.3, 42 - 0.05 * 4, 50.0],
+        [-4 + 0.05 * 8.3, -4 + 0.05 * 4, 0.0]
+    )
+
+    weights = np.array([0.2 * 0.8, 0.8 * 0.2, 0.8 * 0.8])
+    neighbours = raster_data[[7, 8, 8], [8, 7, 8]]
+    expected = np.dot(weights, neighbours) / weights.sum()
+
+    for method in ("bilinear", "bicubic"):
+        values = sample_coordinates(coordinates, src, masked=True,
+                                    method=method)
+
+        assert values.dtype == np.float64
+        assert values.mask.tolist() == [False, True, True]
+        assert values[0] == pytest.approx(expected)
+
+    with pytest.raises(ValueError):
+        sample_coordinates(coordinates, src, method="cubic")
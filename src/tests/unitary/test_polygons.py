@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from rasterio.features import geometry_mask
+from shapely.geometry import MultiPolygon, Polygon, box
+
+from tiffcomposer.core.coordinates import GeoCoordinateExtent
+from tiffcomposer.utils import zonal
+from tiffcomposer.utils.zonal import PolygonMasks, polygon_stats, zonal_stats
+
+STATS = ("mean", "min", "max", "sum", "count", "std", "p50")
+
+TRIANGLE = Polygon([(-3.91, 41.93), (1.52, 40.18), (-2.03, 37.46)])
+ISLANDS = MultiPolygon([box(-3.5, 40.0, -3.0, 40.5), box(0.0, 38.5, 1.0, 39.0)])
+
+
+def expected_stats(src, raster_data, polygon):
+    inside = geometry_mask([polygon], raster_data.shape, src.transform,
+                           invert=True)
+    values = raster_data[inside & (raster_data != src.nodata)]
+    values = values.astype(np.float64)
+    return {
+        "mean": values.mean(), "min": values.min(), "max": values.max(),
+        "sum": values.sum(), "count": values.size, "std": values.std(),
+        "p50": np.percentile(values, 50),
+    }
+
+
+def test_polygon_stats(src, raster_data):
+    results = polygon_stats(src, [TRIANGLE, ISLANDS], STATS)
+
+    for polygon, result in zip((TRIANGLE, ISLANDS), results):
+        expected = expected_stats(src, raster_data, polygon)
+
+        # Percentiles are estimated within 1%
+        assert result.pop("p50") == pytest.approx(expected.pop("p50"),
+                                                  rel=0.02)
+        assert result == pytest.approx(expected)
+
+
+def test_box_matches_zonal_stats(src):
+    extent = GeoCoordinateExtent.from_bounds(-3.5, 38.0, 0.5, 41.0)
+    polygon = box(*extent.bounds)
+
+    assert polygon_stats(src, [polygon], STATS)[0] == pytest.approx(
+        zonal_stats(src, [extent], STATS)[0]
+    )
+    assert polygon_stats(src, [polygon], STATS, fractional=True)[0] == \
+        pytest.approx(zonal_stats(src, [extent], STATS)[0])
+
+
+def test_fractional_coverage(src, raster_data):
+    # Covers 2.5 x 2 pixels away from nodata
+    polygon = box(-1.0, 39.0, -1.0 + 0.125, 39.1)
+    result = polygon_stats(src, [polygon], ("count", "sum", "mean"),
+                           fractional=True)[0]
+
+    assert result["count"] == pytest.approx(5.0)
+    values = raster_data[58:60, 60:63].astype(np.float64)
+    weights = np.array([[1, 1, 0.5], [1, 1, 0.5]])
+    assert result["sum"] == pytest.approx((values * weights).sum())
+    assert result["mean"] == pytest.approx(result["sum"] / 5)
+
+
+def test_masks_reused_across_bands(src):
+    masks = PolygonMasks(src, [TRIANGLE, ISLANDS, box(10, 10, 11, 11)])
+    first = polygon_stats(src, masks, ("mean", "count"))
+    cached = dict(masks._masks)
+    second = polygon_stats(src, masks, ("mean", "count"))
+
+    assert first == second
+    assert all(masks._masks[key] is mask for key, mask in cached.items())
+    assert first[2]["count"] == 0 and np.isnan(first[2]["mean"])
+
+    with pytest.raises(ValueError):
+        PolygonMasks(src, [TRIANGLE.exterior])
+
+
+def test_masks_in_strips_with_bounded_cache(src, monkeypatch):
+    polygons = [TRIANGLE, ISLANDS]
+    whole = PolygonMasks(src, polygons, fractional=True)
+    expected = [whole.mask(i) for i in range(len(polygons))]
+
+    # Rasterize a single supersampled row at a time
+    monkeypatch.setattr(zonal, "_STRIP_SUBPIXELS", 1)
+    masks = PolygonMasks(
+        src, polygons, fractional=True,
+        cache_bytes=max(mask.nbytes for mask in expected)
+    )
+
+    for i, mask in enumerate(expected):
+        np.testing.assert_array_equal(masks.mask(i), mask)
+    assert list(masks._masks) == [1]
+    assert masks._cached_bytes <= masks.cache_bytes
+
+    uncached = PolygonMasks(src, polygons, fractional=True, cache_bytes=0)
+    assert polygon_stats(src, uncached, ("mean", "count")) \
+        == polygon_stats(src, masks, ("mean", "count"))
+    assert not uncached._masks
+
+
+def test_uncached_masks_rasterize_each_block_once(src, monkeypatch):
+    polygons = [TRIANGLE, ISLANDS]
+    expected = polygon_stats(src, polygons, STATS, fractional=True)
+    pixels = []
+
+    def counted(geometries, out_shape, **kwargs):
+        pixels.append(out_shape[0] * out_shape[1])
+        return geometry_mask(geometries, out_shape, **kwargs)
+
+    monkeypatch.setattr(zonal, "geometry_mask", counted)
+    masks = PolygonMasks(src, polygons, fractional=True, cache_bytes=0)
+
+    assert polygon_stats(src, masks, STATS) == expected
+    # Every subpixel of the polygon windows is rasterized exactly once
+    areas = (masks.windows[:, 1] - masks.windows[:, 0]) \
+        * (masks.windows[:, 3] - masks.windows[:, 2])
+    assert sum(pixels) == areas.sum() * masks.supersample ** 2
+    assert len(pixels) > len(polygons)
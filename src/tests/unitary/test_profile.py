@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateError)
+from tiffcomposer.core.distance import distances, great_circle_points
+from tiffcomposer.utils.pixel import sample_coordinates
+from tiffcomposer.utils.profile import profile, profiles
+
+START = GeoCoordinate(41.5, -3.5)
+END = GeoCoordinate(37.5, 1.8)
+
+
+def test_great_circle_points():
+    lats, lons = great_circle_points(0, 0, 0, 90, np.linspace(0, 1, 4))
+    assert lats == pytest.approx([0, 0, 0, 0])
+    assert lons == pytest.approx([0, 30, 60, 90])
+
+    # The arc between two points at 60N over the pole passes it
+    lat, lon = great_circle_points(60, 0, 60, 180, 0.5)
+    assert lat == pytest.approx(90)
+
+    lats, lons = great_circle_points(10, 20, 10, 20, np.array([0, 0.5]))
+    assert lats == pytest.approx([10, 10])
+    assert lons == pytest.approx([20, 20])
+
+
+def test_profile(src):
+    spacing = 5000
+    distance, values, points = profile(src, START, END, spacing)
+    total = START.distance_to(END)
+
+    assert points[0] == START
+    assert points[-1].latitude == pytest.approx(END.latitude)
+    assert points[-1].longitude == pytest.approx(END.longitude)
+    assert distance[0] == 0
+    assert distance[-1] == pytest.approx(total, rel=1e-5)
+    assert np.diff(distance).max() <= spacing
+    assert len(points) == np.ceil(total / spacing) + 1
+    np.testing.assert_array_equal(values, sample_coordinates(points, src))
+
+
+def test_profiles_batched(src):
+    polylines = [
+        GeoCoordinateArray([41.5, 37.5], [-3.5, 1.8]),
+        GeoCoordinateArray([40.0], [0.0]),
+        GeoCoordinateArray([41.0, 39.0, 39.0], [-2.0, -2.0, 2.0]),
+    ]
+    results = profiles(src, polylines, 10_000, method="bilinear")
+
+    assert len(results) == 3
+    assert results[1][0].tolist() == [0]
+    for polyline, (distance, values, points) in zip(polylines, results):
+        assert len(distance) == len(values) == len(points)
+        np.testing.assert_allclose(
+            values, sample_coordinates(points, src, method="bilinear")
+        )
+        assert distance[-1] == pytest.approx(
+            distances(polyline[:-1], polyline[1:]).sum(), rel=1e-5
+        )
+
+    first = profile(src, START, END, 10_000)
+    assert results[0][0] == pytest.approx(first[0])
+
+
+def test_profile_invalid(src):
+    with pytest.raises(ValueError):
+        profile(src, START, END, 0)
+
+    with pytest.raises(GeoCoordinateError):
+        profile(src, START, (37.5, 1.8), 1000)
+
+    with pytest.raises(ValueError):
+        profiles(src, [GeoCoordinateArray([], [])], 1000)
@@ -0,0 +1,105 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from tiffcomposer.core.coordinates import GeoCoordinateExtent
+from tiffcomposer.utils.extent import (clip_tiff_to_extent,
+                                       get_population_density_stats)
+from tiffcomposer.utils.reducer import QuantileSketch, StreamingReducer
+
+STATS = ["mean", "min", "max", "sum", "count", "std", "var", "p10", "p50"]
+
+
+def expected_stats(values):
+    return {
+        "mean": values.mean(), "min": values.min(), "max": values.max(),
+        "sum": values.sum(), "count": values.size, "std": values.std(),
+        "var": values.var(), "p10": np.percentile(values, 10),
+        "p50": np.percentile(values, 50),
+    }
+
+
+def test_reducer_matches_numpy():
+    values = np.random.default_rng(1).normal(1e6, 3.0, 10_000)
+    reducer = StreamingReducer(STATS)
+
+    for chunk in np.array_split(values, 37):
+        reducer.update(chunk)
+
+    result = reducer.result()
+    expected = expected_stats(values)
+
+    assert list(result) == STATS
+    for name in ("p10", "p50"):
+        assert result.pop(name) == pytest.approx(expected.pop(name), rel=0.02)
+    assert result == pytest.approx(expected)
+
+
+def test_reducer_merge():
+    values = np.random.default_rng(2).uniform(-50, 50, 5000)
+    parts = []
+
+    for chunk in np.array_split(values, 4):
+        reducer = StreamingReducer(STATS)
+        reducer.update(chunk)
+        # Partial reducers travel between processes
+        parts.append(pickle.loads(pickle.dumps(reducer)))
+
+    merged = StreamingReducer(STATS)
+    for part in parts:
+        merged.merge(part)
+
+    whole = StreamingReducer(STATS)
+    whole.update(values)
+
+    assert merged.result() == pytest.approx(whole.result())
+
+
+def test_reducer_weighted():
+    reducer = StreamingReducer(["mean", "sum", "count"])
+    reducer.update(np.array([1.0, 3.0]), np.array([0.5, 1.5]))
+
+    assert reducer.result() == pytest.approx(
+        {"mean": 2.5, "sum": 5.0, "count": 2.0}
+    )
+
+
+def test_reducer_empty():
+    result = StreamingReducer(STATS).result()
+
+    assert result["count"] == 0
+    assert result["sum"] == 0
+    assert all(np.isnan(result[name]) for name in ("mean", "var", "p50"))
+
+    with pytest.raises(ValueError):
+        StreamingReducer(["median"])
+
+
+def test_quantile_sketch():
+    values = np.concatenate((
+        -np.geomspace(1e-3, 1e3, 500),
+        np.zeros(100),
+        np.geomspace(1, 1e6, 400)
+    ))
+    sketch = QuantileSketch(0.01)
+    sketch.update(values)
+
+    for q in (0, 0.1, 0.45, 0.52, 0.9, 1):
+        exact = np.sort(values)[int(q * (values.size - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.01, abs=0)
+
+    # Memory depends on the range of the values, not on their number
+    sketch.update(np.tile(values, 20))
+    assert sketch._positive[0].size < 2000
+
+
+def test_population_density_stats(src):
+    extent = GeoCoordinateExtent.from_bounds(-3.9, 38.1, 1.1, 41.9)
+    data = clip_tiff_to_extent(src, extent, masked=True).compressed()
+    result = get_population_density_stats(extent, src, STATS)
+    expected = expected_stats(data.astype(np.float64))
+
+    for name in ("p10", "p50"):
+        assert result.pop(name) == pytest.approx(expected.pop(name), rel=0.02)
+    assert result == pytest.approx(expected)
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+from rasterio.windows import Window
+
+from tiffcomposer.core.coordinates import GeoCoordinateExtent
+from tiffcomposer.utils.extent import get_population_density_in_extent
+from tiffcomposer.utils.summed_area import (SummedAreaTable,
+                                            build_summed_area_table,
+                                            open_summed_area_table,
+                                            summed_area_path)
+
+EXTENT = GeoCoordinateExtent.from_bounds(-3.2, 39.1, -0.9, 41.3)
+
+WINDOWS = [
+    Window(0, 0, 128, 96),
+    Window(5, 3, 40, 50),
+    Window(60, 40, 10, 4),
+    Window(10, 10, 0, 5),
+]
+
+
+@pytest.mark.parametrize("positive_only", [False, True])
+def test_summed_area_table(src, raster_data, positive_only):
+    table = SummedAreaTable.build(src, positive_only=positive_only)
+
+    assert table.shape == raster_data.shape
+    for window in WINDOWS:
+        data = raster_data[window.toslices()].astype(np.float64)
+        valid = data > 0 if positive_only else data != src.nodata
+
+        assert table.sum(window) == pytest.approx(data[valid].sum())
+        assert table.count(window) == valid.sum()
+        if valid.any():
+            assert table.mean(window) == pytest.approx(data[valid].mean())
+        else:
+            assert np.isnan(table.mean(window))
+
+
+def test_population_density_uses_sidecar(raster_path):
+    expected = {
+        mode: get_population_density_in_extent(EXTENT, raster_path, mode)
+        for mode in ("mean", "sum")
+    }
+    assert open_summed_area_table(raster_path) is None
+
+    table = build_summed_area_table(raster_path)
+    assert isinstance(table.table, np.memmap)
+    assert open_summed_area_table(raster_path) is table
+    assert open_summed_area_table(raster_path, positive_only=True) is None
+
+    for mode, value in expected.items():
+        assert get_population_density_in_extent(
+            EXTENT, raster_path, mode
+        ) == pytest.approx(value)
+
+
+def test_sidecar_invalidated_on_change(raster_path):
+    build_summed_area_table(raster_path)
+    assert os.path.exists(summed_area_path(raster_path))
+
+    with open(raster_path, "r+b") as file:
+        file.seek(-1, os.SEEK_END)
+        last = file.read(1)
+        file.seek(-1, os.SEEK_END)
+        file.write(bytes([last[0] ^ 0xFF]))
+
+    assert open_summed_area_table(raster_path) is None
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from rasterio.transform import from_origin
+
+from tiffcomposer.utils.transform import (_inverse, pixel_to_world,
+                                          world_to_pixel)
+
+TRANSFORM = from_origin(-4, 42, 0.05, 0.05)
+
+
+def test_world_to_pixel_axes():
+    # One pixel east and three pixels south of the origin
+    rows, cols = world_to_pixel(TRANSFORM, [-3.95], [41.85])
+
+    assert rows == pytest.approx([3])
+    assert cols == pytest.approx([1])
+
+
+def test_round_trip(src):
+    rows = np.array([0, 5, 95])
+    cols = np.array([0, 100, 127])
+    lons, lats = pixel_to_world(src, rows, cols)
+
+    assert lons.tolist() == pytest.approx([-3.975, 1.025, 2.375])
+    assert lats.tolist() == pytest.approx([41.975, 41.725, 37.225])
+    assert [a.tolist() for a in world_to_pixel(src, lons, lats, "floor")] \
+        == [rows.tolist(), cols.tolist()]
+
+    corners = pixel_to_world(src, rows, cols, center=False)
+    assert [a.tolist() for a in world_to_pixel(src, *corners, "floor")] \
+        == [rows.tolist(), cols.tolist()]
+
+
+def test_snap_modes():
+    lons = np.array([-4 + 0.05 * 2.7, -4 + 0.05 * 3 - 1e-12])
+    lats = np.array([42 - 0.05 * 1.2, 42 - 0.05 * 4.5])
+
+    rows, cols = world_to_pixel(TRANSFORM, lons, lats, "floor")
+    assert rows.tolist() == [1, 4]
+    # Floating point noise does not move points off a pixel edge
+    assert cols.tolist() == [2, 3]
+
+    rows, cols = world_to_pixel(TRANSFORM, lons, lats, "round")
+    assert rows.dtype == np.int64
+    assert cols.tolist() == [3, 3]
+
+    rows, cols, row_weights, col_weights = world_to_pixel(
+        TRANSFORM, lons, lats, "bilinear"
+    )
+    assert rows.tolist() == [0, 4]
+    assert cols.tolist() == [2, 2]
+    assert row_weights == pytest.approx([0.7, 0.0])
+    assert col_weights == pytest.approx([0.2, 0.5])
+
+
+def test_inverse_cached():
+    _inverse.cache_clear()
+    world_to_pixel(TRANSFORM, [0.0], [40.0])
+    world_to_pixel(TRANSFORM, [1.0], [39.0], "floor")
+
+    assert _inverse.cache_info().hits == 1
+
+
+def test_unknown_snap_mode():
+    with pytest.raises(ValueError):
+        world_to_pixel(TRANSFORM, [0.0], [40.0], "ceil")
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from tiffcomposer.core.coordinates import GeoCoordinate, GeoCoordinateExtent
+from tiffcomposer.utils.extent import clip_tiff_to_extent
+from tiffcomposer.utils.zonal import zonal_stats
+
+EXTENTS = [
+    GeoCoordinateExtent(GeoCoordinate(41.9, -3.9), GeoCoordinate(40.5, -1.2)),
+    GeoCoordinateExtent(GeoCoordinate(41.0, -2.0), GeoCoordinate(39.5, 2.0)),
+    GeoCoordinateExtent(GeoCoordinate(43.0, -6.0), GeoCoordinate(36.0, 5.0)),
+]
+OUTSIDE = GeoCoordinateExtent(
+    GeoCoordinate(45.0, -10.0),
+    GeoCoordinate(44.0, -9.0)
+)
+
+
+def test_zonal_stats(src):
+    stats = ["mean", "min", "max", "sum", "count", "std", "var", "p50",
+             "p90"]
+    results = zonal_stats(src, EXTENTS, stats=stats)
+
+    for extent, result in zip(EXTENTS, results):
+        data = clip_tiff_to_extent(src, extent).astype(np.float64)
+        data = data[data != src.nodata]
+        assert list(result) == stats
+        assert result["mean"] == pytest.approx(data.mean())
+        assert result["min"] == pytest.approx(data.min())
+        assert result["max"] == pytest.approx(data.max())
+        assert result["sum"] == pytest.approx(data.sum())
+        assert result["count"] == data.size
+        assert result["std"] == pytest.approx(data.std())
+        assert result["var"] == pytest.approx(data.var())
+        assert result["p50"] == pytest.approx(np.percentile(data, 50),
+                                              rel=0.02)
+        assert result["p90"] == pytest.approx(np.percentile(data, 90),
+                                              rel=0.02)
+
+
+def test_zonal_stats_empty_extent(src):
+    result, = zonal_stats(src, [OUTSIDE], stats=["mean", "count", "sum"])
+    assert np.isnan(result["mean"])
+    assert result["count"] == 0
+    assert result["sum"] == 0
+
+
+def test_zonal_stats_unknown_statistic(src):
+    with pytest.raises(ValueError):
+        zonal_stats(src, EXTENTS, stats=["median"])
+
+    with pytest.raises(ValueError):
+        zonal_stats(src, EXTENTS, stats=["p101"])
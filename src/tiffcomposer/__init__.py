@@ -1 +1,5 @@
-from .core.coordinates import GeoCoordinate, GeoCoordinateExtent
+from .core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                               GeoCoordinateExtent)
+from .core.composition import BandSource, CompositionError, compose
+from .core.alignment import TargetGrid
+from .core.index import GeoSpatialIndex
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from math import ceil, floor, isclose
+
+import rasterio
+from affine import Affine
+from rasterio.crs import CRS
+from rasterio.transform import from_origin
+from rasterio.warp import calculate_default_transform, transform_bounds
+
+from .coordinates import PIXEL_TOLERANCE, GeoCoordinateExtent
+
+# Geographic CRS of GeoCoordinate values
+GEOGRAPHIC_CRS = CRS.from_epsg(4326)
+
+# Relative tolerance when comparing pixel sizes and snapping bounds
+ALIGNMENT_TOLERANCE = 1e-9
+
+
+class TargetGrid:
+    """Pixel grid that every band of a composition is resampled into."""
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        transform: Affine,
+        crs: str | CRS
+    ) -> None:
+        if width <= 0 or height <= 0:
+            raise ValueError("Grid width and height must be positive.")
+
+        self.width = width
+        self.height = height
+        self.transform = transform
+        self.crs = CRS.from_user_input(crs)
+
+    @property
+    def resolution(self) -> tuple[float, float]:
+        """Get the (x, y) pixel size of the grid.
+
+        Returns:
+            tuple[float, float]: The pixel size in CRS units.
+        """
+        return self.transform.a, -self.transform.e
+
+    @classmethod
+    def from_extent(
+        cls,
+        extent: GeoCoordinateExtent,
+        resolution: float | tuple[float, float],
+        crs: str | CRS = GEOGRAPHIC_CRS
+    ) -> TargetGrid:
+        """Create a north-up grid covering a geographic extent.
+
+        Args:
+            extent (GeoCoordinateExtent): The extent to cover.
+            resolution (float | tuple[float, float]): The (x, y) pixel size
+                in units of `crs`.
+            crs (str | CRS, optional): The grid CRS. Defaults to EPSG:4326.
+
+        Returns:
+            TargetGrid: The grid.
+        """
+        crs = CRS.from_user_input(crs)
+        bounds = extent.bounds
+
+        if crs != GEOGRAPHIC_CRS:
+            bounds = transform_bounds(GEOGRAPHIC_CRS, crs, *bounds)
+
+        return cls._from_bounds(bounds, resolution, crs)
+
+    @classmethod
+    def from_sources(
+        cls,
+        sources: Sequence[rasterio.io.DatasetReader],
+        crs: str | CRS | None = None,
+        resolution: float | tuple[float, float] | None = None,
+        intersect: bool = False
+    ) -> TargetGrid:
+        """Create a grid covering several datasets.
+
+        The grid uses the CRS of the first dataset and the finest pixel
+        size of all datasets unless given. When the first dataset shares
+        the grid CRS and pixel size, the grid is snapped to its pixel
+        lattice so that it can be read without resampling.
+
+        Args:
+            sources (Sequence[rasterio.io.DatasetReader]): The datasets.
+            crs (str | CRS | None, optional): The grid CRS.
+            resolution (float | tuple[float, float] | None, optional): The
+                (x, y) pixel size in units of `crs`.
+            intersect (bool, optional): Cover the intersection of the
+                datasets instead of their union. Defaults to False.
+
+        Returns:
+            TargetGrid: The grid.
+        """
+        if not sources:
+            raise ValueError("At least one source is required.")
+
+        crs = CRS.from_user_input(crs) if crs is not None else sources[0].crs
+        all_bounds = []
+        resolutions = []
+
+        for src in sources:
+            if src.crs == crs:
+                all_bounds.append(tuple(src.bounds))
+                resolutions.append(src.res)
+                continue
+
+            all_bounds.append(transform_bounds(src.crs, crs, *src.bounds))
+            transform, _, _ = calculate_default_transform(
+                src.crs, crs, src.width, src.height, *src.bounds
+            )
+            resolutions.append((transform.a, -transform.e))
+
+        lefts, bottoms, rights, tops = zip(*all_bounds)
+
+        if intersect:
+            bounds = (max(lefts), max(bottoms), min(rights), min(tops))
+            if bounds[0] >= bounds[2] or bounds[1] >= bounds[3]:
+                raise ValueError("Sources do not intersect.")
+        else:
+            bounds = (min(lefts), min(bottoms), max(rights), max(tops))
+
+        if resolution is None:
+            resolution = (
+                min(res[0] for res in resolutions),
+                min(res[1] for res in resolutions)
+            )
+
+        anchor = sources[0]
+        if anchor.crs == crs and _same_resolution(anchor.res, resolution):
+            bounds = _snap_bounds(bounds, anchor.transform)
+
+        return cls._from_bounds(bounds, resolution, crs)
+
+    @classmethod
+    def _from_bounds(
+        cls,
+        bounds: tuple[float, float, float, float],
+        resolution: float | tuple[float, float],
+        crs: CRS
+    ) -> TargetGrid:
+        """Create a north-up grid from bounds and a pixel size.
+
+        Args:
+            bounds (tuple[float, float, float, float]): The (left, bottom,
+                right, top) bounds.
+            resolution (float | tuple[float, float]): The (x, y) pixel size.
+            crs (CRS): The grid CRS.
+
+        Returns:
+            TargetGrid: The grid.
+        """
+        if isinstance(resolution, (int, float)):
+            resolution = (resolution, resolution)
+
+        x_res, y_res = resolution
+
+        if x_res <= 0 or y_res <= 0:
+            raise ValueError("Resolution must be positive.")
+
+        left, bottom, right, top = bounds
+        width = max(1, ceil((right - left) / x_res - ALIGNMENT_TOLERANCE))
+        height = max(1, ceil((top - bottom) / y_res - ALIGNMENT_TOLERANCE))
+
+        return cls(width, height, from_origin(left, top, x_res, y_res), crs)
+
+    def offset_in(
+        self,
+        src: rasterio.io.DatasetReader
+    ) -> tuple[int, int] | None:
+        """Get the pixel offset of the grid within a dataset's lattice.
+
+        Args:
+            src (rasterio.io.DatasetReader): The dataset.
+
+        Returns:
+            tuple[int, int] | None: The (row, col) of the grid origin in
+            dataset pixels, or None if the dataset must be resampled.
+        """
+        if src.crs != self.crs:
+            return None
+
+        a, b, _, d, e, _ = src.transform[:6]
+        if b != 0 or d != 0 or not _same_resolution((a, -e), self.resolution):
+            return None
+
+        col, row = ~src.transform * (self.transform.c, self.transform.f)
+
+        if not (
+            isclose(col, round(col), abs_tol=PIXEL_TOLERANCE)
+            and isclose(row, round(row), abs_tol=PIXEL_TOLERANCE)
+        ):
+            return None
+
+        return round(row), round(col)
+
+    def __str__(self) -> str:
+        return f"{self.width}x{self.height} grid in {self.crs}"
+
+    def __repr__(self) -> str:
+        return (
+            f"TargetGrid(width={self.width}, height={self.height}, "
+            f"crs={self.crs})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TargetGrid):
+            return NotImplemented
+
+        return (
+            self.width == other.width
+            and self.height == other.height
+            and self.transform == other.transform
+            and self.crs == other.crs
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.width, self.height, tuple(self.transform)))
+
+
+def _same_resolution(
+    first: tuple[float, float],
+    second: float | tuple[float, float]
+) -> bool:
+    """Check whether two pixel sizes are equal within tolerance.
+
+    Args:
+        first (tuple[float, float]): The first (x, y) pixel size.
+        second (float | tuple[float, float]): The second pixel size.
+
+    Returns:
+        bool: True if both pixel sizes match.
+    """
+    if isinstance(second, (int, float)):
+        second = (second, second)
+
+    return all(
+        isclose(x, y, rel_tol=ALIGNMENT_TOLERANCE)
+        for x, y in zip(first, second)
+    )
+
+
+def _snap_bounds(
+    bounds: tuple[float, float, float, float],
+    transform: Affine
+) -> tuple[float, float, float, float]:
+    """Expand bounds outwards onto a north-up pixel lattice.
+
+    Args:
+        bounds (tuple[float, float, float, float]): The (left, bottom,
+            right, top) bounds.
+        transform (Affine): The lattice transform.
+
+    Returns:
+        tuple[float, float, float, float]: The snapped bounds.
+    """
+    left, bottom, right, top = bounds
+    x_res, y_res = transform.a, -transform.e
+    x0, y0 = transform.c, transform.f
+
+    def down(value: float, origin: float, step: float) -> float:
+        return origin + floor((value - origin) / step + ALIGNMENT_TOLERANCE) \
+            * step
+
+    def up(value: float, origin: float, step: float) -> float:
+        return origin + ceil((value - origin) / step - ALIGNMENT_TOLERANCE) \
+            * step
+
+    return (
+        down(left, x0, x_res),
+        down(bottom, y0, y_res),
+        up(right, x0, x_res),
+        up(top, y0, y_res),
+    )
@@ -0,0 +1,479 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor,
+                                wait)
+
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.enums import Resampling
+from rasterio.vrt import WarpedVRT
+from rasterio.windows import Window
+
+from .alignment import TargetGrid
+
+# Default output tile size in pixels
+DEFAULT_TILE_SIZE = 512
+
+WindowReader = Callable[[Window], np.ndarray]
+
+
+class CompositionError(Exception):
+    """Custom exception for band composition errors."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+
+class BandSource:
+    """Source of a single band of a composition.
+
+    A source may be a raster file path (one of its bands is used), a 2D
+    array, or a callable that receives a `Window` and returns the data of
+    that window. Files are opened lazily, once per worker thread, so that
+    windows can be decoded concurrently.
+
+    File sources bound to a `TargetGrid` that does not match their own
+    pixel lattice are reprojected and resampled window by window through a
+    `WarpedVRT`. Files already on the grid lattice are read directly.
+    """
+
+    def __init__(
+        self,
+        source: str | os.PathLike | np.ndarray | WindowReader,
+        name: str | None = None,
+        band: int = 1,
+        resampling: Resampling = Resampling.nearest
+    ) -> None:
+        if not (
+            isinstance(source, (str, os.PathLike, np.ndarray))
+            or callable(source)
+        ):
+            raise CompositionError(
+                "Band source must be a path, an array or a callable."
+            )
+
+        if isinstance(source, np.ndarray) and source.ndim != 2:
+            raise CompositionError("Array band sources must be 2D.")
+
+        self.source = source
+        self.name = name
+        self.band = band
+        self.resampling = resampling
+        self._grid: TargetGrid | None = None
+        self._offset: tuple[int, int] | None = None
+        self._fill: float = 0
+        self._local = threading.local()
+        self._handles: list[rasterio.io.DatasetReader] = []
+        self._lock = threading.Lock()
+
+    @property
+    def is_file(self) -> bool:
+        """Check whether the source is a raster file.
+
+        Returns:
+            bool: True if the source is a path.
+        """
+        return isinstance(self.source, (str, os.PathLike))
+
+    @property
+    def shape(self) -> tuple[int, int] | None:
+        """Get the (height, width) of the source, if known.
+
+        Returns:
+            tuple[int, int] | None: The shape, None for callables.
+        """
+        if isinstance(self.source, np.ndarray):
+            return self.source.shape  # type: ignore[return-value]
+
+        if self.is_file:
+            if self._grid is not None:
+                return self._grid.height, self._grid.width
+
+            dataset = self.dataset()
+            return dataset.height, dataset.width
+
+        return None
+
+    def bind(self, grid: TargetGrid, fill: float | None = None) -> None:
+        """Bind a file source to the output grid.
+
+        Args:
+            grid (TargetGrid): The output grid.
+            fill (float | None, optional): Value of output pixels not
+                covered by the source. Defaults to None, meaning 0.
+        """
+        if not self.is_file:
+            raise CompositionError("Only file sources can be bound to a grid.")
+
+        self._grid = grid
+        self._offset = grid.offset_in(self.dataset())
+        self._fill = fill if fill is not None else 0
+
+    def dataset(self) -> rasterio.io.DatasetReader:
+        """Get the calling thread's handle of a file source.
+
+        Returns:
+            rasterio.io.DatasetReader: The opened dataset.
+        """
+        dataset = getattr(self._local, "dataset", None)
+
+        if dataset is None:
+            dataset = rasterio.open(self.source)
+            self._local.dataset = dataset
+            with self._lock:
+                self._handles.append(dataset)
+
+        return dataset
+
+    def _warped(self) -> WarpedVRT:
+        """Get the calling thread's warped view of a file source.
+
+        Returns:
+            WarpedVRT: The dataset warped into the bound grid.
+        """
+        vrt = getattr(self._local, "vrt", None)
+
+        if vrt is None:
+            grid = self._grid
+            vrt = WarpedVRT(
+                self.dataset(),
+                crs=grid.crs,
+                transform=grid.transform,
+                width=grid.width,
+                height=grid.height,
+                resampling=self.resampling,
+                nodata=self._fill
+            )
+            self._local.vrt = vrt
+            with self._lock:
+                # Close the view before its dataset
+                self._handles.insert(0, vrt)
+
+        return vrt
+
+    def _read_file(self, window: Window) -> np.ndarray:
+        """Read a window of the bound grid from a file source.
+
+        Args:
+            window (Window): The window to read, in grid pixels.
+
+        Returns:
+            np.ndarray: The 2D window data.
+        """
+        if self._grid is None:
+            return self.dataset().read(self.band, window=window)
+
+        if self._offset is None:
+            return self._warped().read(self.band, window=window)
+
+        # Aligned lattice: shift the window instead of resampling
+        dataset = self.dataset()
+        row, col = self._offset
+        shifted = Window(
+            window.col_off + col,
+            window.row_off + row,
+            window.width,
+            window.height
+        )
+        inside = (
+            shifted.col_off >= 0 and shifted.row_off >= 0
+            and shifted.col_off + shifted.width <= dataset.width
+            and shifted.row_off + shifted.height <= dataset.height
+        )
+
+        if inside:
+            return dataset.read(self.band, window=shifted)
+
+        return dataset.read(
+            self.band,
+            window=shifted,
+            boundless=True,
+            fill_value=self._fill
+        )
+
+    def read(self, window: Window) -> np.ndarray:
+        """Read a window of the source.
+
+        Args:
+            window (Window): The window to read.
+
+        Returns:
+            np.ndarray: The 2D window data.
+        """
+        if self.is_file:
+            return self._read_file(window)
+
+        if isinstance(self.source, np.ndarray):
+            return self.source[window.toslices()]
+
+        data = np.asarray(self.source(window))
+
+        if data.shape != (window.height, window.width):
+            raise CompositionError(
+                f"Band source returned shape {data.shape} for a "
+                f"{window.height}x{window.width} window."
+            )
+
+        return data
+
+    def close(self) -> None:
+        """Close every dataset handle opened by the source."""
+        with self._lock:
+            for dataset in self._handles:
+                dataset.close()
+            self._handles.clear()
+
+        self._local = threading.local()
+
+    def __str__(self) -> str:
+        return f"Band source {self.name or self.source!r}"
+
+    def __repr__(self) -> str:
+        return f"BandSource(name={self.name!r}, band={self.band})"
+
+
+def iter_windows(
+    width: int,
+    height: int,
+    tile_size: int = DEFAULT_TILE_SIZE
+) -> Iterator[Window]:
+    """Iterate over a raster grid in row-major tiles.
+
+    Args:
+        width (int): The raster width in pixels.
+        height (int): The raster height in pixels.
+        tile_size (int, optional): The tile size in pixels. Defaults to
+            DEFAULT_TILE_SIZE.
+
+    Yields:
+        Window: The tile windows, clipped to the raster edges.
+    """
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            yield Window(
+                col,
+                row,
+                min(tile_size, width - col),
+                min(tile_size, height - row)
+            )
+
+
+def _same_grid(
+    first: rasterio.io.DatasetReader,
+    second: rasterio.io.DatasetReader
+) -> bool:
+    """Check whether two datasets share the same pixel grid.
+
+    Args:
+        first (rasterio.io.DatasetReader): The first dataset.
+        second (rasterio.io.DatasetReader): The second dataset.
+
+    Returns:
+        bool: True if CRS, transform and shape match.
+    """
+    return (
+        first.crs == second.crs
+        and first.transform == second.transform
+        and first.shape == second.shape
+    )
+
+
+def _as_sources(
+    sources: Sequence[BandSource | str | os.PathLike | np.ndarray]
+) -> list[BandSource]:
+    """Wrap raw band sources into BandSource objects.
+
+    Args:
+        sources (Sequence[BandSource | str | os.PathLike | np.ndarray]): The
+            band sources.
+
+    Returns:
+        list[BandSource]: The wrapped sources.
+    """
+    if not sources:
+        raise CompositionError("At least one band source is required.")
+
+    return [
+        source if isinstance(source, BandSource) else BandSource(source)
+        for source in sources
+    ]
+
+
+def compose(
+    sources: Sequence[BandSource | str | os.PathLike | np.ndarray],
+    path: str | os.PathLike,
+    width: int | None = None,
+    height: int | None = None,
+    transform: Affine | None = None,
+    crs: str | rasterio.crs.CRS | None = None,
+    dtype: str | np.dtype | None = None,
+    nodata: float | None = None,
+    grid: TargetGrid | None = None,
+    tile_size: int = DEFAULT_TILE_SIZE,
+    compress: str = "deflate",
+    max_workers: int | None = None,
+    pyramids: bool = False
+) -> str:
+    """Compose several band sources into one tiled multi-band GeoTIFF.
+
+    The output is produced window by window: worker threads read and
+    convert the windows of every band, and the main thread writes each
+    finished window as soon as it is ready. At most two windows per worker
+    are in flight, so peak memory stays at a few tiles regardless of the
+    raster size. Compression is multithreaded by GDAL.
+
+    Grid parameters not given explicitly are taken from `grid` or, when
+    file sources disagree on their grids, from a common grid computed with
+    `TargetGrid.from_sources`. File sources are then reprojected into it
+    per window. Otherwise they are taken from the first file source.
+
+    Args:
+        sources (Sequence[BandSource | str | os.PathLike | np.ndarray]): The
+            band sources, in output band order.
+        path (str | os.PathLike): The output file path.
+        width (int | None, optional): Output width in pixels.
+        height (int | None, optional): Output height in pixels.
+        transform (Affine | None, optional): Output affine transform.
+        crs (str | rasterio.crs.CRS | None, optional): Output CRS.
+        dtype (str | np.dtype | None, optional): Output dtype. Defaults to
+            the first file or array source dtype.
+        nodata (float | None, optional): Output nodata value.
+        grid (TargetGrid | None, optional): Output grid, overriding `width`,
+            `height`, `transform` and `crs`.
+        tile_size (int, optional): Output tile size, a multiple of 16.
+            Defaults to DEFAULT_TILE_SIZE.
+        compress (str, optional): GDAL compression. Defaults to 'deflate'.
+        max_workers (int | None, optional): Number of worker threads.
+            Defaults to the executor default.
+        pyramids (bool, optional): Whether to build the sum/count overview
+            pyramid sidecar of every output band. Defaults to False.
+
+    Returns:
+        str: The output file path.
+    """
+    sources = _as_sources(sources)
+
+    if tile_size <= 0 or tile_size % 16:
+        raise CompositionError("Tile size must be a positive multiple of 16.")
+
+    files = [source for source in sources if source.is_file]
+    reference = files[0].dataset() if files else None
+
+    if grid is None and reference is not None and any(
+        not _same_grid(source.dataset(), reference) for source in files[1:]
+    ):
+        grid = TargetGrid.from_sources([source.dataset() for source in files])
+
+    if grid is not None:
+        width, height = grid.width, grid.height
+        transform, crs = grid.transform, grid.crs
+
+    if reference is not None:
+        width = width if width is not None else reference.width
+        height = height if height is not None else reference.height
+        transform = transform if transform is not None \
+            else reference.transform
+        crs = crs if crs is not None else reference.crs
+        nodata = nodata if nodata is not None else reference.nodata
+
+    if dtype is None:
+        for source in sources:
+            if source.is_file:
+                dtype = source.dataset().dtypes[source.band - 1]
+                break
+            if isinstance(source.source, np.ndarray):
+                dtype = source.source.dtype
+                break
+        else:
+            raise CompositionError(
+                "Output dtype is required when every source is a callable."
+            )
+
+    if width is None or height is None:
+        shapes = [s.shape for s in sources if s.shape is not None]
+        if not shapes:
+            raise CompositionError(
+                "Output width and height are required when every source is "
+                "a callable."
+            )
+        height, width = shapes[0]
+
+    if grid is not None:
+        for source in files:
+            source.bind(grid, nodata)
+
+    for source in sources:
+        if source.shape not in (None, (height, width)):
+            raise CompositionError(
+                f"{source} has shape {source.shape}, expected "
+                f"{(height, width)}."
+            )
+
+    profile = {
+        "driver": "GTiff",
+        "width": width,
+        "height": height,
+        "count": len(sources),
+        "dtype": dtype,
+        "crs": crs,
+        "transform": transform if transform is not None else Affine.identity(),
+        "nodata": nodata,
+        "tiled": True,
+        "blockxsize": tile_size,
+        "blockysize": tile_size,
+        "compress": compress,
+        "num_threads": "ALL_CPUS",
+        "bigtiff": "IF_SAFER",
+    }
+
+    def render(window: Window) -> tuple[Window, np.ndarray]:
+        data = np.empty(
+            (len(sources), window.height, window.width),
+            dtype=dtype
+        )
+        for index, source in enumerate(sources):
+            data[index] = source.read(window)
+        return window, data
+
+    if max_workers is None:
+        # Same default as ThreadPoolExecutor
+        max_workers = min(32, (os.cpu_count() or 1) + 4)
+
+    try:
+        with rasterio.open(path, "w", **profile) as dst, \
+                ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, source in enumerate(sources, start=1):
+                if source.name is not None:
+                    dst.set_band_description(index, source.name)
+
+            def flush(futures: set[Future]) -> None:
+                for future in futures:
+                    window, data = future.result()
+                    dst.write(data, window=window)
+
+            pending: set[Future] = set()
+
+            for window in iter_windows(width, height, tile_size):
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    flush(done)
+
+                pending.add(executor.submit(render, window))
+
+            flush(pending)
+    finally:
+        for source in sources:
+            source.close()
+
+    if pyramids:
+        from ..utils.overviews import build_pyramid
+
+        with rasterio.open(path) as dataset:
+            for band in range(1, len(sources) + 1):
+                build_pyramid(dataset, band)
+
+    return os.fspath(path)
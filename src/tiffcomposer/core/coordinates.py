@@ -1,8 +1,15 @@
 from __future__ import annotations
 
-from math import atan2, cos, radians, sin, sqrt
+from collections.abc import Callable, Iterable, Iterator
+from math import (atan2, ceil, cos, degrees, floor, isclose, radians, sin,
+                  sqrt)
 
 import numpy as np
+from affine import Affine
+from numpy.typing import ArrayLike
+
+# Absolute tolerance, in pixels, when snapping coordinates to a pixel grid
+PIXEL_TOLERANCE = 1e-6
 
 
 class GeoCoordinateError(Exception):
@@ -97,7 +104,12 @@ class GeoCoordinate:
 
         return radius
 
-    def distance_to(self, other: GeoCoordinate, step: float = 0) -> float:
+    def distance_to(
+        self,
+        other: GeoCoordinate,
+        step: float = 0,
+        method: str = "haversine"
+    ) -> float:
         """
         Calculate the distance to another GeoCoordinate, accounting for Earth's radius variation.
 
@@ -105,15 +117,36 @@ class GeoCoordinate:
             other (GeoCoordinate): The other geographic coordinate.
             step (float, optional): Step size in radians for intermediate calculations.
                                     If 0, calculates directly without intermediate steps.
+                                    Only used by the 'haversine' method.
+            method (str, optional): Distance method. 'haversine' scales the great circle
+                                    angle by the radius at the midpoint (or at each step),
+                                    'integrated' by the radius averaged along the path at
+                                    constant cost (the limit of a vanishing step), and
+                                    'vincenty' solves the geodesic on the WGS84 ellipsoid.
+                                    Defaults to 'haversine'.
 
         Returns:
             float: The distance in meters.
         """
+        from .distance import (DISTANCE_METHODS, earth_radius,
+                               integrated_radius, vincenty)
+
         if not isinstance(other, GeoCoordinate):
             raise GeoCoordinateError(
                 "Cannot calculate distance to a non-GeoCoordinate object."
             )
 
+        if method not in DISTANCE_METHODS:
+            raise ValueError(
+                f"Method must be one of {', '.join(DISTANCE_METHODS)}."
+            )
+
+        if method == "vincenty":
+            return float(vincenty(
+                self.latitude, self.longitude,
+                other.latitude, other.longitude
+            ))
+
         # Convert degrees to radians
         lat1 = radians(self.latitude)
         lon1 = radians(self.longitude)
@@ -128,6 +161,12 @@ class GeoCoordinate:
         a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
         c = 2 * atan2(sqrt(a), sqrt(1 - a))
 
+        # Mean radius along the path, integrated by quadrature
+        if method == "integrated":
+            return float(
+                integrated_radius(self.latitude, other.latitude)
+            ) * c
+
         # Direct calculation if step is 0
         if step == 0:
             midpoint_lat = (self.latitude + other.latitude) / 2
@@ -144,8 +183,7 @@ class GeoCoordinate:
         interpolated_lats = lat1 + fractions * dlat
 
         # Calculate Earth's radius for each interpolated point
-        radii = np.array([self.earth_radius(np.degrees(lat))
-                         for lat in interpolated_lats])
+        radii = earth_radius(np.degrees(interpolated_lats))
 
         # Approximate distance for each segment and sum them up
         segment_distances = radii[:-1] * (c / steps)
@@ -267,6 +305,298 @@ class GeoCoordinate:
         )
 
 
+class GeoCoordinateArray:
+    """Columnar array of geographic coordinates.
+
+    Latitudes and longitudes are stored as two contiguous float64 NumPy
+    arrays, so that millions of points can be validated, transformed and
+    exported without instantiating a `GeoCoordinate` per point.
+    """
+
+    def __init__(
+        self,
+        latitudes: ArrayLike,
+        longitudes: ArrayLike
+    ) -> None:
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+
+        if latitudes.ndim != 1 or longitudes.ndim != 1:
+            raise GeoCoordinateError(
+                "Latitudes and longitudes must be one-dimensional arrays."
+            )
+
+        if latitudes.shape != longitudes.shape:
+            raise GeoCoordinateError(
+                "Latitudes and longitudes must have the same length."
+            )
+
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+
+    @classmethod
+    def _from_valid(
+        cls,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray
+    ) -> GeoCoordinateArray:
+        """Create an array from already validated values.
+
+        Args:
+            latitudes (np.ndarray): Validated float64 latitudes.
+            longitudes (np.ndarray): Validated float64 longitudes.
+
+        Returns:
+            GeoCoordinateArray: The GeoCoordinateArray object.
+        """
+        instance = cls.__new__(cls)
+        instance._latitudes = latitudes
+        instance._longitudes = longitudes
+        return instance
+
+    @property
+    def latitudes(self) -> np.ndarray:
+        """Get coordinate latitudes.
+
+        Returns:
+            np.ndarray: The latitude values.
+        """
+        return self._latitudes
+
+    @latitudes.setter
+    def latitudes(self, values: ArrayLike) -> None:
+        """Set coordinate latitudes.
+
+        Args:
+            values (ArrayLike): The latitude values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+
+        if not np.all((values >= -90) & (values <= 90)):
+            raise GeoCoordinateError(
+                "Latitude must be between -90 and 90 degrees."
+            )
+
+        if hasattr(self, "_longitudes") \
+                and values.shape != self._longitudes.shape:
+            raise GeoCoordinateError(
+                "Latitudes and longitudes must have the same length."
+            )
+
+        self._latitudes = values
+
+    @property
+    def longitudes(self) -> np.ndarray:
+        """Get coordinate longitudes.
+
+        Returns:
+            np.ndarray: The longitude values.
+        """
+        return self._longitudes
+
+    @longitudes.setter
+    def longitudes(self, values: ArrayLike) -> None:
+        """Set coordinate longitudes.
+
+        Args:
+            values (ArrayLike): The longitude values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+
+        if not np.all((values >= -180) & (values <= 180)):
+            raise GeoCoordinateError(
+                "Longitude must be between -180 and 180 degrees."
+            )
+
+        if hasattr(self, "_latitudes") \
+                and values.shape != self._latitudes.shape:
+            raise GeoCoordinateError(
+                "Latitudes and longitudes must have the same length."
+            )
+
+        self._longitudes = values
+
+    @property
+    def inverted(self) -> GeoCoordinateArray:
+        """Get the inverted coordinates.
+
+        Returns:
+            GeoCoordinateArray: The inverted GeoCoordinateArray object.
+        """
+        return GeoCoordinateArray(self.longitudes, self.latitudes)
+
+    def to_tuple(self) -> tuple[np.ndarray, np.ndarray]:
+        """Convert the GeoCoordinateArray to a tuple of arrays.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The latitudes and longitudes.
+        """
+        return self.latitudes, self.longitudes
+
+    def to_array(self) -> np.ndarray:
+        """Convert the GeoCoordinateArray to an (N, 2) array.
+
+        Returns:
+            np.ndarray: The latitude and longitude columns.
+        """
+        return np.column_stack((self.latitudes, self.longitudes))
+
+    def to_coordinates(self) -> list[GeoCoordinate]:
+        """Convert the GeoCoordinateArray to a list of GeoCoordinate objects.
+
+        Returns:
+            list[GeoCoordinate]: The GeoCoordinate objects.
+        """
+        return [
+            GeoCoordinate(latitude, longitude)
+            for latitude, longitude in zip(
+                self.latitudes.tolist(),
+                self.longitudes.tolist()
+            )
+        ]
+
+    @classmethod
+    def from_array(cls, values: ArrayLike) -> GeoCoordinateArray:
+        """Create a GeoCoordinateArray from an (N, 2) array.
+
+        Args:
+            values (ArrayLike): The latitude and longitude columns.
+
+        Returns:
+            GeoCoordinateArray: The GeoCoordinateArray object.
+        """
+        values = np.asarray(values, dtype=np.float64)
+
+        if values.ndim != 2 or values.shape[1] != 2:
+            raise GeoCoordinateError(
+                "Coordinate array must have shape (N, 2)."
+            )
+
+        return cls(values[:, 0], values[:, 1])
+
+    @classmethod
+    def from_coordinates(
+        cls,
+        coordinates: Iterable[GeoCoordinate]
+    ) -> GeoCoordinateArray:
+        """Create a GeoCoordinateArray from GeoCoordinate objects.
+
+        Args:
+            coordinates (Iterable[GeoCoordinate]): The GeoCoordinate objects.
+
+        Returns:
+            GeoCoordinateArray: The GeoCoordinateArray object.
+        """
+        coordinates = list(coordinates)
+
+        if not all(isinstance(c, GeoCoordinate) for c in coordinates):
+            raise GeoCoordinateError(
+                "All elements must be GeoCoordinate objects."
+            )
+
+        # Values were already validated by each GeoCoordinate
+        return cls._from_valid(
+            np.fromiter(
+                (c.latitude for c in coordinates),
+                dtype=np.float64,
+                count=len(coordinates)
+            ),
+            np.fromiter(
+                (c.longitude for c in coordinates),
+                dtype=np.float64,
+                count=len(coordinates)
+            )
+        )
+
+    def _coerce_operand(
+        self,
+        other: object,
+        operation: str
+    ) -> tuple[np.ndarray | float, np.ndarray | float]:
+        """Get the latitude and longitude operands for an arithmetic op.
+
+        Args:
+            other (object): A GeoCoordinate or a same-length array.
+            operation (str): Operation name, used in error messages.
+
+        Returns:
+            tuple[np.ndarray | float, np.ndarray | float]: The operands.
+        """
+        if isinstance(other, GeoCoordinate):
+            return other.latitude, other.longitude
+
+        if isinstance(other, GeoCoordinateArray):
+            if len(other) != len(self):
+                raise GeoCoordinateError(
+                    f"Cannot {operation} GeoCoordinateArray objects of "
+                    "different lengths."
+                )
+
+            return other.latitudes, other.longitudes
+
+        raise GeoCoordinateError(
+            f"Cannot {operation} GeoCoordinateArray with non-GeoCoordinate "
+            "object."
+        )
+
+    def __len__(self) -> int:
+        return self.latitudes.shape[0]
+
+    def __getitem__(self, key: object) -> GeoCoordinate | GeoCoordinateArray:
+        if isinstance(key, (int, np.integer)):
+            return GeoCoordinate(
+                float(self.latitudes[key]),
+                float(self.longitudes[key])
+            )
+
+        return GeoCoordinateArray._from_valid(
+            self.latitudes[key],  # type: ignore[index]
+            self.longitudes[key]  # type: ignore[index]
+        )
+
+    def __iter__(self) -> Iterator[GeoCoordinate]:
+        return iter(self.to_coordinates())
+
+    def __str__(self) -> str:
+        return f"{len(self)} coordinates"
+
+    def __repr__(self) -> str:
+        return f"GeoCoordinateArray(n={len(self)})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GeoCoordinateArray):
+            raise GeoCoordinateError(
+                "Cannot compare GeoCoordinateArray with non-GeoCoordinateArray"
+                " object."
+            )
+
+        return (
+            np.array_equal(self.latitudes, other.latitudes)
+            and np.array_equal(self.longitudes, other.longitudes)
+        )
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __add__(self, other: object) -> GeoCoordinateArray:
+        latitudes, longitudes = self._coerce_operand(other, "add")
+
+        return GeoCoordinateArray(
+            self.latitudes + latitudes,
+            self.longitudes + longitudes
+        )
+
+    def __sub__(self, other: object) -> GeoCoordinateArray:
+        latitudes, longitudes = self._coerce_operand(other, "subtract")
+
+        return GeoCoordinateArray(
+            self.latitudes - latitudes,
+            self.longitudes - longitudes
+        )
+
+
 class GeoCoordinateExtent:
     """Geographic coordinate extent class."""
 
@@ -321,6 +651,304 @@ class GeoCoordinateExtent:
             "top": self.end.latitude
         }
 
+    @property
+    def bounds(self) -> tuple[float, float, float, float]:
+        """Get the normalized bounds of the extent.
+
+        The start and end coordinates may be given in any corner order, the
+        bounds are always sorted.
+
+        Returns:
+            tuple[float, float, float, float]: The (left, bottom, right, top)
+            bounds in degrees.
+        """
+        left, bottom, right, top = self.to_tuple()
+
+        return (
+            min(left, right), min(bottom, top),
+            max(left, right), max(bottom, top)
+        )
+
+    @classmethod
+    def from_bounds(
+        cls,
+        left: float,
+        bottom: float,
+        right: float,
+        top: float
+    ) -> GeoCoordinateExtent:
+        """Create an extent from its bounds.
+
+        Args:
+            left (float): Western longitude in degrees.
+            bottom (float): Southern latitude in degrees.
+            right (float): Eastern longitude in degrees.
+            top (float): Northern latitude in degrees.
+
+        Returns:
+            GeoCoordinateExtent: The extent, from its north-west corner to
+            its south-east corner.
+        """
+        return cls(GeoCoordinate(top, left), GeoCoordinate(bottom, right))
+
+    def _check_extent(self, other: object) -> None:
+        """Check that an operand is a GeoCoordinateExtent.
+
+        Args:
+            other (object): The operand.
+        """
+        if not isinstance(other, GeoCoordinateExtent):
+            raise GeoCoordinateError(
+                "Operand must be a GeoCoordinateExtent object."
+            )
+
+    def intersection(
+        self,
+        other: GeoCoordinateExtent
+    ) -> GeoCoordinateExtent | None:
+        """Get the intersection with another extent.
+
+        Args:
+            other (GeoCoordinateExtent): The other extent.
+
+        Returns:
+            GeoCoordinateExtent | None: The shared extent, None if the
+            extents do not overlap. Extents sharing only an edge yield a
+            degenerate extent.
+        """
+        self._check_extent(other)
+        left, bottom, right, top = self.bounds
+        other_left, other_bottom, other_right, other_top = other.bounds
+
+        left, right = max(left, other_left), min(right, other_right)
+        bottom, top = max(bottom, other_bottom), min(top, other_top)
+
+        if left > right or bottom > top:
+            return None
+
+        return GeoCoordinateExtent.from_bounds(left, bottom, right, top)
+
+    def union(self, other: GeoCoordinateExtent) -> GeoCoordinateExtent:
+        """Get the smallest extent containing this and another extent.
+
+        Args:
+            other (GeoCoordinateExtent): The other extent.
+
+        Returns:
+            GeoCoordinateExtent: The bounding extent of both extents.
+        """
+        self._check_extent(other)
+        left, bottom, right, top = self.bounds
+        other_left, other_bottom, other_right, other_top = other.bounds
+
+        return GeoCoordinateExtent.from_bounds(
+            min(left, other_left), min(bottom, other_bottom),
+            max(right, other_right), max(top, other_top)
+        )
+
+    def contains(
+        self,
+        points: GeoCoordinate | GeoCoordinateArray
+    ) -> bool | np.ndarray:
+        """Check whether points lie inside the extent, edges included.
+
+        Args:
+            points (GeoCoordinate | GeoCoordinateArray): The points.
+
+        Returns:
+            bool | np.ndarray: Whether the coordinate is inside the extent,
+            or a boolean mask for coordinate arrays.
+        """
+        left, bottom, right, top = self.bounds
+
+        if isinstance(points, GeoCoordinate):
+            return (
+                left <= points.longitude <= right
+                and bottom <= points.latitude <= top
+            )
+
+        if not isinstance(points, GeoCoordinateArray):
+            raise GeoCoordinateError(
+                "Points must be a GeoCoordinate or GeoCoordinateArray object."
+            )
+
+        return (
+            (points.longitudes >= left) & (points.longitudes <= right)
+            & (points.latitudes >= bottom) & (points.latitudes <= top)
+        )
+
+    def buffer(self, distance: float) -> GeoCoordinateExtent:
+        """Expand the extent by a distance on every side.
+
+        Degrees of latitude are converted with the WGS84 radius at the
+        central latitude of the extent. Degrees of longitude are converted
+        at the latitude farthest from the equator, so the buffer is never
+        narrower than the distance. Buffers reaching a pole span every
+        longitude.
+
+        Args:
+            distance (float): The buffer distance in meters.
+
+        Returns:
+            GeoCoordinateExtent: The buffered extent, clamped to valid
+            coordinates.
+        """
+        if distance < 0:
+            raise ValueError("Buffer distance must be non-negative.")
+
+        left, bottom, right, top = self.bounds
+        radius = GeoCoordinate.earth_radius((bottom + top) / 2)
+        delta = degrees(distance / radius)
+
+        bottom, top = max(-90.0, bottom - delta), min(90.0, top + delta)
+        farthest = max(abs(bottom), abs(top))
+
+        if farthest >= 90:
+            left, right = -180.0, 180.0
+        else:
+            delta = degrees(
+                distance / (GeoCoordinate.earth_radius(farthest)
+                            * cos(radians(farthest)))
+            )
+            left, right = max(-180.0, left - delta), min(180.0, right + delta)
+
+        return GeoCoordinateExtent.from_bounds(left, bottom, right, top)
+
+    def _pixel_bounds(
+        self,
+        transform: Affine,
+        outward: bool = True
+    ) -> tuple[int, int, int, int]:
+        """Get the pixel edges of the extent in a raster grid.
+
+        Args:
+            transform (Affine): The raster affine transform.
+            outward (bool, optional): Whether to include partially covered
+                pixels. Defaults to True.
+
+        Returns:
+            tuple[int, int, int, int]: The (col_min, row_min, col_max,
+            row_max) pixel edges.
+        """
+        if transform.b != 0 or transform.d != 0:
+            raise ValueError("Transform must not be rotated or sheared.")
+
+        left, bottom, right, top = self.bounds
+        col_a, row_a = ~transform * (left, top)
+        col_b, row_b = ~transform * (right, bottom)
+
+        def to_edge(value: float, rounding: Callable[[float], int]) -> int:
+            nearest = round(value)
+            if isclose(value, nearest, abs_tol=PIXEL_TOLERANCE):
+                return nearest
+            return rounding(value)
+
+        low, high = (floor, ceil) if outward else (ceil, floor)
+
+        return (
+            to_edge(min(col_a, col_b), low), to_edge(min(row_a, row_b), low),
+            to_edge(max(col_a, col_b), high), to_edge(max(row_a, row_b), high)
+        )
+
+    @staticmethod
+    def _from_pixel_bounds(
+        transform: Affine,
+        col_min: int,
+        row_min: int,
+        col_max: int,
+        row_max: int
+    ) -> GeoCoordinateExtent:
+        """Create an extent from pixel edges in a raster grid.
+
+        Args:
+            transform (Affine): The raster affine transform.
+            col_min (int): The first column.
+            row_min (int): The first row.
+            col_max (int): The column past the last one.
+            row_max (int): The row past the last one.
+
+        Returns:
+            GeoCoordinateExtent: The extent covered by the pixels.
+        """
+        x_a, y_a = transform * (col_min, row_min)
+        x_b, y_b = transform * (col_max, row_max)
+
+        return GeoCoordinateExtent.from_bounds(
+            min(x_a, x_b), min(y_a, y_b), max(x_a, x_b), max(y_a, y_b)
+        )
+
+    def snap(
+        self,
+        transform: Affine,
+        outward: bool = True
+    ) -> GeoCoordinateExtent:
+        """Snap the extent to the pixel edges of a raster grid.
+
+        Args:
+            transform (Affine): The raster affine transform.
+            outward (bool, optional): Whether to grow the extent to cover
+                partially covered pixels, or shrink it to the fully covered
+                ones. Defaults to True.
+
+        Returns:
+            GeoCoordinateExtent: The pixel-aligned extent.
+        """
+        col_min, row_min, col_max, row_max = self._pixel_bounds(
+            transform, outward
+        )
+
+        return self._from_pixel_bounds(
+            transform,
+            col_min, row_min,
+            max(col_min, col_max), max(row_min, row_max)
+        )
+
+    def split(
+        self,
+        transform: Affine,
+        tile_size: int | tuple[int, int],
+        shape: tuple[int, int] | None = None
+    ) -> Iterator[GeoCoordinateExtent]:
+        """Split the extent into pixel-aligned sub-extents.
+
+        The extent is snapped outward to the raster grid and cut into tiles
+        of whole pixels, in row-major order. Tiles share edges but no
+        pixels, so each pixel of the snapped extent belongs to exactly one
+        tile when converted back to a window.
+
+        Args:
+            transform (Affine): The raster affine transform.
+            tile_size (int | tuple[int, int]): The (width, height) of the
+                tiles in pixels.
+            shape (tuple[int, int] | None, optional): The (height, width) of
+                the raster, to clip the tiles to it. Defaults to None.
+
+        Yields:
+            GeoCoordinateExtent: The sub-extents.
+        """
+        if isinstance(tile_size, int):
+            tile_size = (tile_size, tile_size)
+
+        tile_width, tile_height = tile_size
+        if tile_width <= 0 or tile_height <= 0:
+            raise ValueError("Tile size must be positive.")
+
+        col_min, row_min, col_max, row_max = self._pixel_bounds(transform)
+
+        if shape is not None:
+            height, width = shape
+            col_min, col_max = max(0, col_min), min(width, col_max)
+            row_min, row_max = max(0, row_min), min(height, row_max)
+
+        for row in range(row_min, row_max, tile_height):
+            for col in range(col_min, col_max, tile_width):
+                yield self._from_pixel_bounds(
+                    transform,
+                    col, row,
+                    min(col + tile_width, col_max),
+                    min(row + tile_height, row_max)
+                )
+
     def __str__(self) -> str:
         return f"Start: {self.start}, End: {self.end}"
 
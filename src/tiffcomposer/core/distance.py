@@ -0,0 +1,482 @@
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+
+from .coordinates import GeoCoordinate, GeoCoordinateArray, GeoCoordinateError
+
+# WGS84 ellipsoid parameters
+WGS84_A = 6378137.0  # Equatorial radius [m]
+WGS84_B = 6356752.314245  # Polar radius [m]
+WGS84_F = (WGS84_A - WGS84_B) / WGS84_A  # Flattening
+
+# Default upper bound of pairs evaluated at once by `distance_matrix`
+DEFAULT_CHUNK_PAIRS = 1 << 22
+
+# Gauss-Legendre nodes and weights, mapped from [-1, 1] to [0, 1]
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(16)
+_GL_NODES = (_GL_NODES + 1) / 2
+_GL_WEIGHTS = _GL_WEIGHTS / 2
+
+# Vincenty iteration parameters
+VINCENTY_TOLERANCE = 1e-12
+VINCENTY_MAX_ITERATIONS = 200
+
+DISTANCE_METHODS = ("haversine", "integrated", "vincenty")
+
+
+class VincentyFallbackWarning(RuntimeWarning):
+    """Nearly antipodal pairs fell back to a spherical distance."""
+
+
+def earth_radius(latitudes: np.ndarray) -> np.ndarray:
+    """Calculate Earth's radius at the given latitudes.
+
+    Vectorized counterpart of `GeoCoordinate.earth_radius`.
+
+    Args:
+        latitudes (np.ndarray): Geodetic latitudes in degrees.
+
+    Returns:
+        np.ndarray: Earth's radius at each latitude in meters.
+    """
+    lat_rad = np.radians(latitudes)
+    cos_lat = np.cos(lat_rad)
+    sin_lat = np.sin(lat_rad)
+
+    return np.sqrt(
+        ((WGS84_A**2 * cos_lat)**2 + (WGS84_B**2 * sin_lat)**2) /
+        ((WGS84_A * cos_lat)**2 + (WGS84_B * sin_lat)**2)
+    )
+
+
+def _central_angle(
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    cos_lat1: np.ndarray,
+    lat2: np.ndarray,
+    lon2: np.ndarray,
+    cos_lat2: np.ndarray
+) -> np.ndarray:
+    """Calculate the haversine central angle between coordinates.
+
+    Args:
+        lat1 (np.ndarray): First latitudes in radians.
+        lon1 (np.ndarray): First longitudes in radians.
+        cos_lat1 (np.ndarray): Cosine of the first latitudes.
+        lat2 (np.ndarray): Second latitudes in radians.
+        lon2 (np.ndarray): Second longitudes in radians.
+        cos_lat2 (np.ndarray): Cosine of the second latitudes.
+
+    Returns:
+        np.ndarray: The central angles in radians.
+    """
+    a = np.sin((lat2 - lat1) / 2) ** 2
+    a += cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) / 2) ** 2
+    np.clip(a, 0, 1, out=a)
+
+    return 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def integrated_radius(
+    latitudes1: np.ndarray,
+    latitudes2: np.ndarray
+) -> np.ndarray:
+    """Calculate the mean Earth's radius along linear latitude paths.
+
+    Integrates the WGS84 radius over latitudes interpolated linearly between
+    both ends with Gauss-Legendre quadrature. This is the limit of the
+    `step` path of `GeoCoordinate.distance_to` as the step tends to zero,
+    evaluated at constant cost.
+
+    Args:
+        latitudes1 (np.ndarray): Start latitudes in degrees.
+        latitudes2 (np.ndarray): End latitudes in degrees.
+
+    Returns:
+        np.ndarray: The mean radius along each path in meters.
+    """
+    latitudes1 = np.asarray(latitudes1, dtype=np.float64)[..., np.newaxis]
+    latitudes2 = np.asarray(latitudes2, dtype=np.float64)[..., np.newaxis]
+
+    radii = earth_radius(latitudes1 + _GL_NODES * (latitudes2 - latitudes1))
+
+    return radii @ _GL_WEIGHTS
+
+
+def vincenty(
+    latitudes1: np.ndarray,
+    longitudes1: np.ndarray,
+    latitudes2: np.ndarray,
+    longitudes2: np.ndarray
+) -> np.ndarray:
+    """Calculate ellipsoidal distances with Vincenty's inverse formula.
+
+    Only the pairs that have not converged yet are iterated. Nearly
+    antipodal pairs, for which the formula does not converge, fall back to
+    the 'integrated' spherical distance instead of failing the batch, with
+    a `VincentyFallbackWarning`. Those distances are within about 0.5% of
+    the ellipsoidal ones, the order of the WGS84 flattening.
+
+    Args:
+        latitudes1 (np.ndarray): Start latitudes in degrees.
+        longitudes1 (np.ndarray): Start longitudes in degrees.
+        latitudes2 (np.ndarray): End latitudes in degrees.
+        longitudes2 (np.ndarray): End longitudes in degrees.
+
+    Returns:
+        np.ndarray: The geodesic distances on the WGS84 ellipsoid in meters.
+    """
+    arrays = np.broadcast_arrays(
+        latitudes1, longitudes1, latitudes2, longitudes2
+    )
+    shape = arrays[0].shape
+    latitudes1, longitudes1, latitudes2, longitudes2 = (
+        np.asarray(array, dtype=np.float64).ravel() for array in arrays
+    )
+
+    f = WGS84_F
+    L = np.radians(longitudes2 - longitudes1)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(latitudes1)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(latitudes2)))
+    sin_U1, cos_U1 = np.sin(U1), np.cos(U1)
+    sin_U2, cos_U2 = np.sin(U2), np.cos(U2)
+
+    # Final state of each pair, filled in as it converges
+    sigma = np.empty(L.shape)
+    sin_sigma = np.empty(L.shape)
+    cos_sigma = np.empty(L.shape)
+    cos2_alpha = np.empty(L.shape)
+    cos_2sigma_m = np.empty(L.shape)
+
+    active = np.arange(L.size)
+    lam = L.copy()
+
+    for _ in range(VINCENTY_MAX_ITERATIONS):
+        if active.size == 0:
+            break
+
+        l_sin_U1, l_cos_U1 = sin_U1[active], cos_U1[active]
+        l_sin_U2, l_cos_U2 = sin_U2[active], cos_U2[active]
+        l_lam = lam[active]
+
+        sin_lam, cos_lam = np.sin(l_lam), np.cos(l_lam)
+        l_sin_sigma = np.hypot(
+            l_cos_U2 * sin_lam,
+            l_cos_U1 * l_sin_U2 - l_sin_U1 * l_cos_U2 * cos_lam
+        )
+        l_cos_sigma = l_sin_U1 * l_sin_U2 + l_cos_U1 * l_cos_U2 * cos_lam
+        l_sigma = np.arctan2(l_sin_sigma, l_cos_sigma)
+
+        # Coincident points have a zero sine, guard the divisions below
+        safe_sin_sigma = np.where(l_sin_sigma == 0, 1, l_sin_sigma)
+        sin_alpha = l_cos_U1 * l_cos_U2 * sin_lam / safe_sin_sigma
+        l_cos2_alpha = 1 - sin_alpha**2
+
+        # Equatorial lines have a zero cos^2(alpha)
+        safe_cos2_alpha = np.where(l_cos2_alpha == 0, 1, l_cos2_alpha)
+        l_cos_2sigma_m = np.where(
+            l_cos2_alpha == 0,
+            0,
+            l_cos_sigma - 2 * l_sin_U1 * l_sin_U2 / safe_cos2_alpha
+        )
+
+        C = f / 16 * l_cos2_alpha * (4 + f * (4 - 3 * l_cos2_alpha))
+        lam[active] = L[active] + (1 - C) * f * sin_alpha * (
+            l_sigma + C * l_sin_sigma * (
+                l_cos_2sigma_m
+                + C * l_cos_sigma * (-1 + 2 * l_cos_2sigma_m**2)
+            )
+        )
+
+        done = np.abs(lam[active] - l_lam) < VINCENTY_TOLERANCE
+        finished = active[done]
+        sigma[finished] = l_sigma[done]
+        sin_sigma[finished] = l_sin_sigma[done]
+        cos_sigma[finished] = l_cos_sigma[done]
+        cos2_alpha[finished] = l_cos2_alpha[done]
+        cos_2sigma_m[finished] = l_cos_2sigma_m[done]
+        active = active[~done]
+
+    u2 = cos2_alpha * (WGS84_A**2 - WGS84_B**2) / WGS84_B**2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = B * sin_sigma * (
+        cos_2sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+            - B / 6 * cos_2sigma_m
+            * (-3 + 4 * sin_sigma**2) * (-3 + 4 * cos_2sigma_m**2)
+        )
+    )
+    result = WGS84_B * A * (sigma - delta_sigma)
+
+    # Nearly antipodal pairs that did not converge
+    if active.size:
+        warnings.warn(
+            f"{active.size} nearly antipodal pair(s) did not converge with "
+            f"Vincenty's formula and use the 'integrated' spherical "
+            f"distance instead, within about 0.5%.",
+            VincentyFallbackWarning,
+            stacklevel=2
+        )
+        lat1 = np.radians(latitudes1[active])
+        lat2 = np.radians(latitudes2[active])
+        result[active] = integrated_radius(
+            latitudes1[active], latitudes2[active]
+        ) * _central_angle(
+            lat1, np.radians(longitudes1[active]), np.cos(lat1),
+            lat2, np.radians(longitudes2[active]), np.cos(lat2)
+        )
+
+    return result.reshape(shape)
+
+
+def _as_array(value: object, name: str) -> GeoCoordinateArray:
+    """Coerce a coordinate argument into a GeoCoordinateArray.
+
+    Args:
+        value (object): A GeoCoordinate or GeoCoordinateArray.
+        name (str): Argument name, used in error messages.
+
+    Returns:
+        GeoCoordinateArray: The coordinates as an array.
+    """
+    if isinstance(value, GeoCoordinateArray):
+        return value
+
+    if isinstance(value, GeoCoordinate):
+        return GeoCoordinateArray([value.latitude], [value.longitude])
+
+    raise GeoCoordinateError(
+        f"Argument '{name}' must be a GeoCoordinate or GeoCoordinateArray."
+    )
+
+
+def _check_method(method: str) -> None:
+    """Check that a distance method name is supported.
+
+    Args:
+        method (str): The distance method name.
+    """
+    if method not in DISTANCE_METHODS:
+        raise ValueError(
+            f"Method must be one of {', '.join(DISTANCE_METHODS)}."
+        )
+
+
+def distances(
+    a: GeoCoordinateArray,
+    b: GeoCoordinateArray,
+    method: str = "haversine"
+) -> np.ndarray:
+    """Calculate elementwise distances between two coordinate arrays.
+
+    The methods match those of `GeoCoordinate.distance_to`: 'haversine'
+    scales the central angle by the WGS84 radius at the midpoint latitude,
+    'integrated' by the radius averaged along the path, and 'vincenty'
+    solves the geodesic on the WGS84 ellipsoid.
+
+    Args:
+        a (GeoCoordinateArray): First coordinates.
+        b (GeoCoordinateArray): Second coordinates, same length as `a`.
+        method (str, optional): The distance method. Defaults to
+            'haversine'.
+
+    Returns:
+        np.ndarray: The distances in meters.
+    """
+    _check_method(method)
+    a = _as_array(a, "a")
+    b = _as_array(b, "b")
+
+    if len(a) != len(b):
+        raise GeoCoordinateError(
+            "Cannot calculate elementwise distances between arrays of "
+            "different lengths."
+        )
+
+    if method == "vincenty":
+        return vincenty(a.latitudes, a.longitudes, b.latitudes, b.longitudes)
+
+    lat1 = np.radians(a.latitudes)
+    lat2 = np.radians(b.latitudes)
+
+    c = _central_angle(
+        lat1, np.radians(a.longitudes), np.cos(lat1),
+        lat2, np.radians(b.longitudes), np.cos(lat2)
+    )
+
+    if method == "integrated":
+        return integrated_radius(a.latitudes, b.latitudes) * c
+
+    return earth_radius((a.latitudes + b.latitudes) / 2) * c
+
+
+def distances_from(
+    origin: GeoCoordinate,
+    many: GeoCoordinateArray,
+    method: str = "haversine"
+) -> np.ndarray:
+    """Calculate the distances from one coordinate to many others.
+
+    Args:
+        origin (GeoCoordinate): The origin coordinate.
+        many (GeoCoordinateArray): The destination coordinates.
+        method (str, optional): The distance method, see `distances`.
+            Defaults to 'haversine'.
+
+    Returns:
+        np.ndarray: The distances in meters.
+    """
+    if not isinstance(origin, GeoCoordinate):
+        raise GeoCoordinateError("Origin must be a GeoCoordinate object.")
+
+    return distance_matrix(origin, many, method=method)[0]
+
+
+def distance_matrix(
+    a: GeoCoordinateArray,
+    b: GeoCoordinateArray,
+    chunk_pairs: int = DEFAULT_CHUNK_PAIRS,
+    out: np.ndarray | None = None,
+    method: str = "haversine"
+) -> np.ndarray:
+    """Calculate the distances between every pair of two coordinate sets.
+
+    Rows of `a` are processed in chunks so that temporaries never hold more
+    than `chunk_pairs` values at once (pairs times quadrature nodes for the
+    'integrated' method). Passing a preallocated (or
+    memory-mapped) `out` array keeps the whole computation bounded.
+
+    Args:
+        a (GeoCoordinateArray): Row coordinates (N).
+        b (GeoCoordinateArray): Column coordinates (M).
+        chunk_pairs (int, optional): Maximum number of pairs per chunk.
+            Defaults to DEFAULT_CHUNK_PAIRS.
+        out (np.ndarray | None, optional): Output array of shape (N, M).
+            Defaults to None, which allocates a new one.
+        method (str, optional): The distance method, see `distances`.
+            Defaults to 'haversine'.
+
+    Returns:
+        np.ndarray: The (N, M) distance matrix in meters.
+    """
+    _check_method(method)
+    a = _as_array(a, "a")
+    b = _as_array(b, "b")
+
+    if chunk_pairs < 1:
+        raise ValueError("Chunk size must be a positive number of pairs.")
+
+    n, m = len(a), len(b)
+
+    if out is None:
+        out = np.empty((n, m), dtype=np.float64)
+    elif out.shape != (n, m):
+        raise ValueError(f"Output array must have shape {(n, m)}.")
+
+    lat1 = np.radians(a.latitudes)[:, np.newaxis]
+    lon1 = np.radians(a.longitudes)[:, np.newaxis]
+    cos_lat1 = np.cos(lat1)
+    lat2 = np.radians(b.latitudes)
+    lon2 = np.radians(b.longitudes)
+    cos_lat2 = np.cos(lat2)
+
+    # The integrated radius evaluates every pair at each quadrature node
+    pairs = chunk_pairs
+    if method == "integrated":
+        pairs //= _GL_NODES.size
+
+    rows = max(1, pairs // max(m, 1))
+
+    for start in range(0, n, rows):
+        chunk = slice(start, start + rows)
+        chunk_latitudes = a.latitudes[chunk, np.newaxis]
+
+        if method == "vincenty":
+            out[chunk] = vincenty(
+                chunk_latitudes, a.longitudes[chunk, np.newaxis],
+                b.latitudes, b.longitudes
+            )
+            continue
+
+        c = _central_angle(
+            lat1[chunk], lon1[chunk], cos_lat1[chunk],
+            lat2, lon2, cos_lat2
+        )
+
+        if method == "integrated":
+            radius = integrated_radius(
+                np.broadcast_to(chunk_latitudes, c.shape),
+                np.broadcast_to(b.latitudes, c.shape)
+            )
+        else:
+            radius = earth_radius((chunk_latitudes + b.latitudes) / 2)
+
+        np.multiply(radius, c, out=out[chunk])
+
+    return out
+
+
+def great_circle_points(
+    latitudes1: np.ndarray,
+    longitudes1: np.ndarray,
+    latitudes2: np.ndarray,
+    longitudes2: np.ndarray,
+    fractions: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Interpolate points along great circle arcs.
+
+    Points are spherically interpolated between the unit vectors of the
+    arc ends, so equal fraction steps are equal angular steps. Arrays
+    broadcast against each other. Antipodal ends have no unique arc.
+
+    Args:
+        latitudes1 (np.ndarray): Start latitudes in degrees.
+        longitudes1 (np.ndarray): Start longitudes in degrees.
+        latitudes2 (np.ndarray): End latitudes in degrees.
+        longitudes2 (np.ndarray): End longitudes in degrees.
+        fractions (np.ndarray): Position of each point along its arc, 0 at
+            the start and 1 at the end.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The (latitudes, longitudes) of the
+        points in degrees.
+    """
+    lat1, lon1 = np.radians(latitudes1), np.radians(longitudes1)
+    lat2, lon2 = np.radians(latitudes2), np.radians(longitudes2)
+    fractions = np.asarray(fractions, dtype=np.float64)
+
+    # Unit vectors of the arc ends
+    x1, y1 = np.cos(lat1) * np.cos(lon1), np.cos(lat1) * np.sin(lon1)
+    x2, y2 = np.cos(lat2) * np.cos(lon2), np.cos(lat2) * np.sin(lon2)
+    z1, z2 = np.sin(lat1), np.sin(lat2)
+
+    sin_c = np.sqrt(
+        (y1 * z2 - z1 * y2)**2 + (z1 * x2 - x1 * z2)**2
+        + (x1 * y2 - y1 * x2)**2
+    )
+    c = np.arctan2(sin_c, x1 * x2 + y1 * y2 + z1 * z2)
+
+    # Coincident ends interpolate linearly, the limit of a vanishing arc
+    short = sin_c < 1e-12
+    safe_sin_c = np.where(short, 1, sin_c)
+    w1 = np.where(
+        short, 1 - fractions, np.sin((1 - fractions) * c) / safe_sin_c
+    )
+    w2 = np.where(short, fractions, np.sin(fractions * c) / safe_sin_c)
+
+    x = w1 * x1 + w2 * x2
+    y = w1 * y1 + w2 * y2
+    z = w1 * z1 + w2 * z2
+    latitudes = np.degrees(np.arctan2(z, np.hypot(x, y)))
+    longitudes = np.degrees(np.arctan2(y, x))
+
+    # Keep the arc ends exact
+    return (
+        np.where(fractions == 0, latitudes1,
+                 np.where(fractions == 1, latitudes2, latitudes)),
+        np.where(fractions == 0, longitudes1,
+                 np.where(fractions == 1, longitudes2, longitudes))
+    )
@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import os
+from math import asin, ceil, cos, degrees, floor, radians, sin
+
+import numpy as np
+
+from .coordinates import GeoCoordinate, GeoCoordinateArray, GeoCoordinateError
+from .distance import DEFAULT_CHUNK_PAIRS, WGS84_B, distance_matrix
+
+# Default cell size of the index grid in degrees
+DEFAULT_CELL_SIZE = 1.0
+
+# Relative margin added to search radii to absorb rounding errors
+_SEARCH_MARGIN = 1e-9
+
+
+class GeoSpatialIndex:
+    """Spatial index over geographic coordinates.
+
+    Points are bucketed into a regular latitude/longitude cell grid stored
+    in compressed form (only occupied cells are kept). Queries falling in
+    the same cell are answered together with one vectorized distance
+    matrix against the points of the cells that can hold a match.
+
+    Distances use the same model as `GeoCoordinate.distance_to`: the
+    haversine angle scaled by the WGS84 radius at the midpoint latitude.
+    Since that radius is never below the polar radius, a search angle of
+    `distance / polar_radius` is guaranteed to contain every match.
+    """
+
+    def __init__(
+        self,
+        coordinates: GeoCoordinateArray,
+        cell_size: float = DEFAULT_CELL_SIZE
+    ) -> None:
+        if not isinstance(coordinates, GeoCoordinateArray):
+            raise GeoCoordinateError(
+                "Index coordinates must be a GeoCoordinateArray object."
+            )
+
+        if not 0 < cell_size <= 180:
+            raise ValueError("Cell size must be in (0, 180] degrees.")
+
+        self.coordinates = coordinates
+        self.cell_size = cell_size
+
+        cell_ids = self._cell_ids(coordinates)
+        self._order = np.argsort(cell_ids, kind="stable")
+        self._cells, starts = np.unique(
+            cell_ids[self._order],
+            return_index=True
+        )
+        self._starts = np.append(starts, len(coordinates)).astype(np.int64)
+
+    @property
+    def _rows(self) -> int:
+        """Get the number of cell rows of the grid.
+
+        Returns:
+            int: The number of rows.
+        """
+        return ceil(180 / self.cell_size)
+
+    @property
+    def _cols(self) -> int:
+        """Get the number of cell columns of the grid.
+
+        Returns:
+            int: The number of columns.
+        """
+        return ceil(360 / self.cell_size)
+
+    def _cell_ids(self, coordinates: GeoCoordinateArray) -> np.ndarray:
+        """Get the cell of each coordinate.
+
+        Args:
+            coordinates (GeoCoordinateArray): The coordinates.
+
+        Returns:
+            np.ndarray: The row-major cell ids.
+        """
+        rows = np.minimum(
+            np.floor((coordinates.latitudes + 90) / self.cell_size),
+            self._rows - 1
+        ).astype(np.int64)
+        cols = np.floor(
+            (coordinates.longitudes + 180) / self.cell_size
+        ).astype(np.int64) % self._cols
+
+        return rows * self._cols + cols
+
+    def _candidates(self, cell_id: int, angle: float) -> np.ndarray:
+        """Get the points that may lie within an angle of a cell.
+
+        Args:
+            cell_id (int): The cell containing the queries.
+            angle (float): The search angle in degrees.
+
+        Returns:
+            np.ndarray: The indices of the candidate points.
+        """
+        if angle >= 180:
+            return self._order
+
+        row, col = divmod(cell_id, self._cols)
+        lat_min = row * self.cell_size - 90
+        lat_max = min(lat_min + self.cell_size, 90)
+        lon_min = col * self.cell_size - 180
+
+        first_row = max(0, floor((lat_min - angle + 90) / self.cell_size))
+        last_row = min(
+            self._rows - 1,
+            floor((lat_max + angle + 90) / self.cell_size)
+        )
+
+        # Longitude half-width of a spherical cap around the cell
+        max_lat = max(abs(lat_min), abs(lat_max))
+        ratio = 2.0
+        if lat_max + angle < 90 and lat_min - angle > -90:
+            ratio = sin(radians(angle)) / cos(radians(max_lat))
+
+        occupied_rows, occupied_cols = np.divmod(self._cells, self._cols)
+        mask = (occupied_rows >= first_row) & (occupied_rows <= last_row)
+
+        if ratio < 1:
+            # Compare longitudes rather than column indices, since the last
+            # column is narrower when the cell size does not divide 360
+            half_width = degrees(asin(ratio))
+            lon_max = min(lon_min + self.cell_size, 180)
+            reach = half_width + (lon_max - lon_min) / 2
+
+            cols_min = occupied_cols * self.cell_size - 180
+            cols_max = np.minimum(cols_min + self.cell_size, 180)
+            offsets = (
+                (cols_min + cols_max - lon_min - lon_max) / 2 + 180
+            ) % 360 - 180
+
+            mask &= np.abs(offsets) <= reach + (cols_max - cols_min) / 2
+
+        starts = self._starts[:-1][mask]
+        lengths = self._starts[1:][mask] - starts
+        offsets = np.cumsum(lengths) - lengths
+
+        positions = np.repeat(starts - offsets, lengths)
+        positions += np.arange(lengths.sum())
+
+        return self._order[positions]
+
+    def _groups(
+        self,
+        points: GeoCoordinate | GeoCoordinateArray
+    ) -> tuple[GeoCoordinateArray, list[tuple[int, np.ndarray]]]:
+        """Group query points by the cell containing them.
+
+        Args:
+            points (GeoCoordinate | GeoCoordinateArray): The query points.
+
+        Returns:
+            tuple[GeoCoordinateArray, list[tuple[int, np.ndarray]]]: The
+            query points and, per occupied cell, the query indices.
+        """
+        if isinstance(points, GeoCoordinate):
+            points = GeoCoordinateArray([points.latitude], [points.longitude])
+        elif not isinstance(points, GeoCoordinateArray):
+            raise GeoCoordinateError(
+                "Query points must be a GeoCoordinate or GeoCoordinateArray."
+            )
+
+        cell_ids = self._cell_ids(points)
+        order = np.argsort(cell_ids, kind="stable")
+        cells, starts = np.unique(cell_ids[order], return_index=True)
+
+        return points, [
+            (int(cell), group)
+            for cell, group in zip(cells, np.split(order, starts[1:]))
+        ]
+
+    @staticmethod
+    def _split(
+        group: np.ndarray,
+        candidates: np.ndarray,
+        chunk_pairs: int
+    ) -> list[np.ndarray]:
+        """Split a query group to bound the size of its distance matrices.
+
+        Args:
+            group (np.ndarray): The query indices.
+            candidates (np.ndarray): The candidate point indices.
+            chunk_pairs (int): Maximum number of query-candidate pairs.
+
+        Returns:
+            list[np.ndarray]: The query indices of each part.
+        """
+        rows = max(1, chunk_pairs // max(candidates.size, 1))
+
+        return [group[i:i + rows] for i in range(0, len(group), rows)]
+
+    def query_radius(
+        self,
+        points: GeoCoordinate | GeoCoordinateArray,
+        radius: float,
+        chunk_pairs: int = DEFAULT_CHUNK_PAIRS
+    ) -> tuple[list[np.ndarray], list[np.ndarray]]:
+        """Find the indexed points within a distance of each query point.
+
+        Args:
+            points (GeoCoordinate | GeoCoordinateArray): The query points.
+            radius (float): The search radius in meters.
+            chunk_pairs (int, optional): Maximum number of query-candidate
+                distances held at once. Defaults to DEFAULT_CHUNK_PAIRS.
+
+        Returns:
+            tuple[list[np.ndarray], list[np.ndarray]]: Per query point, the
+            distances in meters and the indices of the matches, sorted by
+            distance.
+        """
+        if radius < 0:
+            raise ValueError("Radius must be a non-negative distance.")
+
+        points, groups = self._groups(points)
+        angle = degrees(radius / WGS84_B) * (1 + _SEARCH_MARGIN)
+        distances: list[np.ndarray] = [np.empty(0)] * len(points)
+        indices: list[np.ndarray] = [np.empty(0, dtype=np.int64)] * len(points)
+
+        for cell, cell_group in groups:
+            candidates = self._candidates(cell, angle)
+            neighbours = self.coordinates[candidates]
+
+            for group in self._split(cell_group, candidates, chunk_pairs):
+                matrix = distance_matrix(
+                    points[group],
+                    neighbours,
+                    chunk_pairs=chunk_pairs
+                )
+
+                for query, row in zip(group, matrix):
+                    matches = np.flatnonzero(row <= radius)
+                    matches = matches[
+                        np.argsort(row[matches], kind="stable")
+                    ]
+                    distances[query] = row[matches]
+                    indices[query] = candidates[matches]
+
+        return distances, indices
+
+    def query_nearest(
+        self,
+        points: GeoCoordinate | GeoCoordinateArray,
+        k: int = 1,
+        chunk_pairs: int = DEFAULT_CHUNK_PAIRS
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the k nearest indexed points of each query point.
+
+        Args:
+            points (GeoCoordinate | GeoCoordinateArray): The query points.
+            k (int, optional): The number of neighbours. Defaults to 1.
+            chunk_pairs (int, optional): Maximum number of query-candidate
+                distances held at once. Defaults to DEFAULT_CHUNK_PAIRS.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The (N, k) distances in meters
+            and indices of the neighbours, sorted by distance.
+        """
+        if not 1 <= k <= len(self):
+            raise ValueError(
+                "Number of neighbours must be between 1 and the number of "
+                "indexed points."
+            )
+
+        points, groups = self._groups(points)
+        distances = np.empty((len(points), k), dtype=np.float64)
+        indices = np.empty((len(points), k), dtype=np.int64)
+
+        # Query groups still to answer, with the search angle to try
+        pending = [(cell, group, self.cell_size) for cell, group in groups]
+
+        while pending:
+            cell, group, angle = pending.pop()
+            candidates = self._candidates(cell, angle)
+
+            if candidates.size < k:
+                pending.append((cell, group, angle * 2))
+                continue
+
+            parts = self._split(group, candidates, chunk_pairs)
+            if len(parts) > 1:
+                pending.extend((cell, part, angle) for part in parts)
+                continue
+
+            matrix = distance_matrix(
+                points[group],
+                self.coordinates[candidates],
+                chunk_pairs=chunk_pairs
+            )
+            nearest = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+            kth = np.take_along_axis(matrix, nearest, axis=1).max()
+            needed = degrees(kth / WGS84_B) * (1 + _SEARCH_MARGIN)
+
+            # Every point closer than the k-th candidate must be searched
+            if needed > angle and angle < 180:
+                pending.append((cell, group, needed))
+                continue
+
+            nearest_distances = np.take_along_axis(matrix, nearest, axis=1)
+            order = np.argsort(nearest_distances, axis=1, kind="stable")
+            distances[group] = np.take_along_axis(
+                nearest_distances, order, axis=1
+            )
+            indices[group] = candidates[np.take_along_axis(
+                nearest, order, axis=1
+            )]
+
+        return distances, indices
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Save the index to an uncompressed NumPy archive.
+
+        Args:
+            path (str | os.PathLike): The file path.
+        """
+        np.savez(
+            path,
+            latitudes=self.coordinates.latitudes,
+            longitudes=self.coordinates.longitudes,
+            cell_size=self.cell_size,
+            order=self._order,
+            cells=self._cells,
+            starts=self._starts,
+        )
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> GeoSpatialIndex:
+        """Load an index saved with `save`, without rebuilding it.
+
+        Args:
+            path (str | os.PathLike): The file path.
+
+        Returns:
+            GeoSpatialIndex: The index.
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            index = cls.__new__(cls)
+            index.coordinates = GeoCoordinateArray(
+                archive["latitudes"],
+                archive["longitudes"]
+            )
+            index.cell_size = float(archive["cell_size"])
+            index._order = archive["order"]
+            index._cells = archive["cells"]
+            index._starts = archive["starts"]
+
+        return index
+
+    def __len__(self) -> int:
+        return len(self.coordinates)
+
+    def __str__(self) -> str:
+        return f"Spatial index of {len(self)} points"
+
+    def __repr__(self) -> str:
+        return f"GeoSpatialIndex(n={len(self)}, cell_size={self.cell_size})"
@@ -0,0 +1,643 @@
+import asyncio
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import groupby
+from typing import Any
+
+import numpy as np
+from rasterio.windows import Window
+
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateExtent)
+
+from .cache import BlockCache, read_window
+from .dataset import as_dataset
+from .extent import _reduce_density, extent_to_window
+from .memmap import map_band
+from .nodata import band_nodata, valid_mask
+from .pixel import (SAMPLING_METHODS, _block_groups, _blend,
+                    _coordinate_to_pixel, _gather, _locate, _neighbours,
+                    _sampled)
+from .reducer import StreamingReducer
+from .summed_area import open_summed_area_table
+from .zonal import _overlapping, _zone_chunks, _zone_windows, zonal_stats
+
+# Default number of threads decoding blocks for an async reader
+DEFAULT_ASYNC_WORKERS = 4
+
+BandLayout = tuple[int, int, int, int, np.dtype, bool, float | None]
+
+
+def _band_layout(path: str, band: int) -> BandLayout:
+    """
+    Gets the block layout of a band.
+
+    Args:
+        path (str): The dataset path.
+        band (int): The band index.
+
+    Returns:
+        BandLayout: The height, width, block height, block width and dtype
+        of the band, whether it can be memory mapped, and its nodata value.
+    """
+    src = as_dataset(path)
+    block_height, block_width = src.block_shapes[band - 1]
+
+    return (
+        src.height, src.width, block_height, block_width,
+        np.dtype(src.dtypes[band - 1]), map_band(src, band) is not None,
+        band_nodata(src, band)
+    )
+
+
+def _assemble(
+    window: Window,
+    block_shape: tuple[int, int],
+    blocks: dict[tuple[int, int], np.ndarray],
+    dtype: np.dtype
+) -> np.ndarray:
+    """
+    Copies the parts of decoded blocks covered by a window into one array.
+
+    Args:
+        window (Window): The window, inside the band.
+        block_shape (tuple[int, int]): The block height and width.
+        blocks (dict[tuple[int, int], np.ndarray]): The blocks covering the
+            window, by block row and column.
+        dtype (np.dtype): The band dtype.
+
+    Returns:
+        np.ndarray: The window data.
+    """
+    block_height, block_width = block_shape
+    row_min, col_min = int(window.row_off), int(window.col_off)
+    row_max = row_min + int(window.height)
+    col_max = col_min + int(window.width)
+    out = np.empty((row_max - row_min, col_max - col_min), dtype=dtype)
+
+    for (block_row, block_col), block in blocks.items():
+        row_off, col_off = block_row * block_height, block_col * block_width
+        rows = slice(max(row_min, row_off),
+                     min(row_max, row_off + block_height))
+        cols = slice(max(col_min, col_off),
+                     min(col_max, col_off + block_width))
+
+        out[rows.start - row_min:rows.stop - row_min,
+            cols.start - col_min:cols.stop - col_min] = block[
+            rows.start - row_off:rows.stop - row_off,
+            cols.start - col_off:cols.stop - col_off
+        ]
+
+    return out
+
+
+def _take(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    block_shape: tuple[int, int],
+    groups: list[tuple[np.ndarray, int, int]],
+    blocks: list[np.ndarray],
+    dtype: np.dtype
+) -> np.ndarray:
+    """
+    Picks the values of many pixels from the decoded blocks holding them.
+
+    Args:
+        rows (np.ndarray): The pixel rows, inside the band.
+        cols (np.ndarray): The pixel columns, inside the band.
+        block_shape (tuple[int, int]): The block height and width.
+        groups (list[tuple[np.ndarray, int, int]]): The pixels of each block
+            (see `_block_groups`).
+        blocks (list[np.ndarray]): The blocks, in the order of `groups`.
+        dtype (np.dtype): The band dtype.
+
+    Returns:
+        np.ndarray: The pixel values.
+    """
+    block_height, block_width = block_shape
+    values = np.empty(rows.shape, dtype=dtype)
+
+    for (group, block_row, block_col), block in zip(groups, blocks):
+        values[group] = block[
+            rows[group] - block_row * block_height,
+            cols[group] - block_col * block_width
+        ]
+
+    return values
+
+
+def _zone_blocks(
+    windows: np.ndarray,
+    layout: BandLayout
+) -> list[tuple[tuple[int, int], Window, np.ndarray]]:
+    """
+    Gets the blocks overlapped by zones, in file order.
+
+    Args:
+        windows (np.ndarray): The (N, 4) row_min, row_max, col_min, col_max
+            windows of the zones.
+        layout (BandLayout): The band layout.
+
+    Returns:
+        list[tuple[tuple[int, int], Window, np.ndarray]]: The block row and
+        column, window and overlapping zones of each block.
+    """
+    height, width, block_height, block_width = layout[:4]
+    filled = windows[
+        (windows[:, 1] > windows[:, 0]) & (windows[:, 3] > windows[:, 2])
+    ]
+    if filled.size == 0:
+        return []
+
+    # Only visit the blocks within the bounds of all the zones
+    plan = []
+    for block_row in range(filled[:, 0].min() // block_height,
+                           (filled[:, 1].max() - 1) // block_height + 1):
+        for block_col in range(filled[:, 2].min() // block_width,
+                               (filled[:, 3].max() - 1) // block_width + 1):
+            row_off = int(block_row) * block_height
+            col_off = int(block_col) * block_width
+            block = Window(
+                col_off, row_off,
+                min(block_width, width - col_off),
+                min(block_height, height - row_off)
+            )
+            hits = _overlapping(windows, block)
+            if hits.size:
+                plan.append(((int(block_row), int(block_col)), block, hits))
+
+    return plan
+
+
+class AsyncRasterReader:
+    """
+    Asynchronous reader of a raster dataset for asyncio applications.
+
+    Opening, decoding and reductions run on a bounded thread pool, each
+    thread with its own dataset handle, so the event loop never blocks on
+    GDAL. Concurrent requests needing the same block share a single read:
+    the first request decodes it into the reader's block cache while later
+    ones await the same future.
+
+    Every query accepts a `timeout` in seconds. Timeouts and cancellation
+    stop the waiting coroutine; block reads shared with other requests keep
+    running so that those requests are not affected.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        max_workers: int = DEFAULT_ASYNC_WORKERS,
+        cache: BlockCache | None = None
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("Number of workers must be at least 1.")
+
+        self.path = os.fspath(path)
+        self.cache = cache if cache is not None else BlockCache()
+        self.coalesced = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers,
+            thread_name_prefix="tiffcomposer"
+        )
+        self._inflight: dict[tuple[int, int, int], asyncio.Future] = {}
+        self._layouts: dict[int, BandLayout] = {}
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs a blocking function on the reader's thread pool.
+
+        Args:
+            func (Callable[..., Any]): The function.
+            *args (Any): Its arguments.
+
+        Returns:
+            Any: The function result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def _layout(self, band: int) -> BandLayout:
+        """
+        Gets the block layout of a band, loading it on first use.
+
+        Args:
+            band (int): The band index.
+
+        Returns:
+            BandLayout: The band layout.
+        """
+        layout = self._layouts.get(band)
+
+        if layout is None:
+            layout = await self._run(_band_layout, self.path, band)
+            self._layouts[band] = layout
+
+        return layout
+
+    async def _block(
+        self,
+        band: int,
+        block_row: int,
+        block_col: int
+    ) -> np.ndarray:
+        """
+        Gets a decoded block, sharing the read with concurrent requests.
+
+        Args:
+            band (int): The band index.
+            block_row (int): The block row.
+            block_col (int): The block column.
+
+        Returns:
+            np.ndarray: The read-only block data.
+        """
+        key = (band, block_row, block_col)
+        future = self._inflight.get(key)
+
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._executor,
+                partial(self.cache.get_block, self.path, *key)
+            )
+            self._inflight[key] = future
+
+            def done(future: asyncio.Future) -> None:
+                self._inflight.pop(key, None)
+                # Mark the error as retrieved if every waiter was cancelled
+                if not future.cancelled():
+                    future.exception()
+
+            future.add_done_callback(done)
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(future)
+
+    async def _read(self, window: Window, band: int) -> np.ndarray:
+        """
+        Reads a window of a band through the coalescing block reads.
+
+        Args:
+            window (Window): The window, inside the band.
+            band (int): The band index.
+
+        Returns:
+            np.ndarray: The window data, read-only when it lies within a
+            single block or is served by a memory map.
+        """
+        height, width, block_height, block_width, dtype, mapped, _ = \
+            await self._layout(band)
+
+        if mapped:
+            return await self._run(read_window, self.path, band, window)
+
+        row_min, col_min = int(window.row_off), int(window.col_off)
+        row_max = row_min + int(window.height)
+        col_max = col_min + int(window.width)
+
+        if row_max <= row_min or col_max <= col_min:
+            return np.empty(
+                (max(0, row_max - row_min), max(0, col_max - col_min)),
+                dtype=dtype
+            )
+
+        keys = [
+            (block_row, block_col)
+            for block_row in range(row_min // block_height,
+                                   (row_max - 1) // block_height + 1)
+            for block_col in range(col_min // block_width,
+                                   (col_max - 1) // block_width + 1)
+        ]
+        blocks = await asyncio.gather(
+            *(self._block(band, *key) for key in keys)
+        )
+
+        if len(keys) == 1:
+            row_off = keys[0][0] * block_height
+            col_off = keys[0][1] * block_width
+            return blocks[0][
+                row_min - row_off:row_max - row_off,
+                col_min - col_off:col_max - col_off
+            ]
+
+        return await self._run(
+            _assemble,
+            window,
+            (block_height, block_width),
+            dict(zip(keys, blocks)),
+            dtype
+        )
+
+    async def read(
+        self,
+        window: Window,
+        band: int = 1,
+        timeout: float | None = None
+    ) -> np.ndarray:
+        """
+        Reads a window of a band.
+
+        Args:
+            window (Window): The window, inside the band.
+            band (int, optional): The band index. Defaults to 1.
+            timeout (float | None, optional): Timeout in seconds. Defaults to
+                None, no timeout.
+
+        Returns:
+            np.ndarray: The window data.
+        """
+        return await asyncio.wait_for(self._read(window, band), timeout)
+
+    async def get_value_from_coordinates(
+        self,
+        coordinate: GeoCoordinate,
+        timeout: float | None = None
+    ) -> float | None:
+        """
+        Gets the raster value at a geographic coordinate.
+
+        Args:
+            coordinate (GeoCoordinate): The coordinate to sample.
+            timeout (float | None, optional): Timeout in seconds. Defaults to
+                None, no timeout.
+
+        Returns:
+            float | None: The pixel value, None if outside the image bounds
+            or if the pixel holds no data.
+        """
+        async def query() -> float | None:
+            pixel = await self._run(
+                _coordinate_to_pixel, coordinate, self.path
+            )
+            if pixel is None:
+                return None
+
+            row, col = pixel
+            value = (await self._read(Window(col, row, 1, 1), 1))[0, 0]
+            nodata = (await self._layout(1))[6]
+
+            return value if valid_mask(value, nodata) else None
+
+        return await asyncio.wait_for(query(), timeout)
+
+    async def clip_tiff_to_extent(
+        self,
+        extent: GeoCoordinateExtent,
+        timeout: float | None = None
+    ) -> np.ndarray:
+        """
+        Clips the first band to a geographic extent.
+
+        Args:
+            extent (GeoCoordinateExtent): The extent to clip to.
+            timeout (float | None, optional): Timeout in seconds. Defaults to
+                None, no timeout.
+
+        Returns:
+            np.ndarray: The clipped data.
+        """
+        async def query() -> np.ndarray:
+            window = await self._run(extent_to_window, self.path, extent)
+            return await self._read(window, 1)
+
+        return await asyncio.wait_for(query(), timeout)
+
+    async def get_population_density_in_extent(
+        self,
+        extent: GeoCoordinateExtent,
+        mode: str = "mean",
+        timeout: float | None = None
+    ) -> float:
+        """
+        Gets the population density within an extent.
+
+        'mean' and 'sum' are answered from the summed-area table sidecar
+        when there is an up-to-date one. Otherwise the extent is read
+        through the coalescing block reads.
+
+        Args:
+            extent (GeoCoordinateExtent): The extent.
+            mode (str, optional): The operation to perform on the data:
+                'mean', 'sum', 'max', or 'min'. Defaults to 'mean'.
+            timeout (float | None, optional): Timeout in seconds. Defaults to
+                None, no timeout.
+
+        Returns:
+            float: The population density value based on the specified mode.
+        """
+        async def query() -> float:
+            window = await self._run(extent_to_window, self.path, extent)
+
+            if mode in ("mean", "sum"):
+                table = await self._run(open_summed_area_table, self.path)
+
+                if table is not None:
+                    return await self._run(
+                        table.mean if mode == "mean" else table.sum, window
+                    )
+
+            data = await self._read(window, 1)
+            nodata = (await self._layout(1))[6]
+
+            return await self._run(_reduce_density, data, mode, nodata)
+
+        return await asyncio.wait_for(query(), timeout)
+
+    async def zonal_stats(
+        self,
+        extents: Sequence[GeoCoordinateExtent],
+        stats: Sequence[str] = ("mean",),
+        band: int = 1,
+        timeout: float | None = None
+    ) -> list[dict[str, float]]:
+        """
+        Computes statistics for many extents (see `zonal_stats`).
+
+        The blocks overlapped by the extents are read a row of blocks at a
+        time through the coalescing block reads.
+
+        Args:
+            extents (Sequence[GeoCoordinateExtent]): The extents.
+            stats (Sequence[str], optional): The statistics to compute.
+                Defaults to ('mean',).
+            band (int, optional): The band index. Defaults to 1.
+            timeout (float | None, optional): Timeout in seconds. Defaults to
+                None, no timeout.
+
+        Returns:
+            list[dict[str, float]]: The statistics of each extent, in order.
+        """
+        async def query() -> list[dict[str, float]]:
+            layout = await self._layout(band)
+
+            # Memory mapped bands have no blocks to decode
+            if layout[5]:
+                return await self._run(
+                    zonal_stats, self.path, extents, stats, band, self.cache
+                )
+
+            reducers = [StreamingReducer(stats) for _ in extents]
+            windows = await self._run(_zone_windows, self.path, extents)
+            plan = await self._run(_zone_blocks, windows, layout)
+
+            for _, row in groupby(plan, key=lambda item: item[0][0]):
+                row = list(row)
+                blocks = await asyncio.gather(
+                    *(self._block(band, *key) for key, _, _ in row)
+                )
+                await self._run(
+                    self._reduce_zones, reducers, windows, row, blocks,
+                    layout[6]
+                )
+
+            return [reducer.result() for reducer in reducers]
+
+        return await asyncio.wait_for(query(), timeout)
+
+    @staticmethod
+    def _reduce_zones(
+        reducers: list[StreamingReducer],
+        windows: np.ndarray,
+        plan: list[tuple[tuple[int, int], Window, np.ndarray]],
+        blocks: list[np.ndarray],
+        nodata: float | None
+    ) -> None:
+        """
+        Updates the reducers of zones with the blocks they overlap.
+
+        Args:
+            reducers (list[StreamingReducer]): The reducer of each zone.
+            windows (np.ndarray): The (N, 4) row_min, row_max, col_min,
+                col_max windows of the zones.
+            plan (list[tuple[tuple[int, int], Window, np.ndarray]]): The
+                blocks and their overlapping zones (see `_zone_blocks`).
+            blocks (list[np.ndarray]): The blocks, in the order of `plan`.
+            nodata (float | None): The nodata value.
+        """
+        for (_, block, hits), data in zip(plan, blocks):
+            for i, chunk, valid, _ in _zone_chunks(
+                windows, hits, block, data, nodata
+            ):
+                reducers[i].update(chunk[valid])
+
+    async def _pixels(
+        self,
+        band: int,
+        rows: np.ndarray,
+        cols: np.ndarray
+    ) -> np.ndarray:
+        """
+        Reads the values of many pixels through the coalescing block reads.
+
+        Args:
+            band (int): The band index.
+            rows (np.ndarray): The pixel rows, inside the band.
+            cols (np.ndarray): The pixel columns, inside the band.
+
+        Returns:
+            np.ndarray: The pixel values, with the band's dtype.
+        """
+        _, width, block_height, block_width, dtype, mapped, _ = \
+            await self._layout(band)
+
+        if mapped:
+            return await self._run(_gather, self.path, rows, cols, band)
+
+        groups = await self._run(
+            _block_groups, rows, cols, (block_height, block_width), width
+        )
+        blocks = await asyncio.gather(
+            *(self._block(band, block_row, block_col)
+              for _, block_row, block_col in groups)
+        )
+
+        return await self._run(
+            _take, rows, cols, (block_height, block_width), groups, blocks,
+            dtype
+        )
+
+    async def sample_coordinates(
+        self,
+        coordinates: GeoCoordinateArray,
+        band: int = 1,
+        masked: bool = False,
+        method: str = "nearest",
+        timeout: float | None = None
+    ) -> np.ndarray:
+        """
+        Samples raster values at many coordinates (see `sample_coordinates`).
+
+        The pixels are grouped by block and each block is read through the
+        coalescing block reads.
+
+        Args:
+            coordinates (GeoCoordinateArray): The coordinates to sample.
+            band (int, optional): The band index. Defaults to 1.
+            masked (bool, optional): Whether to return a masked array.
+                Defaults to False.
+            method (str, optional): The sampling method: 'nearest',
+                'bilinear' or 'bicubic'. Defaults to 'nearest'.
+            timeout (float | None, optional): Timeout in seconds. Defaults to
+                None, no timeout.
+
+        Returns:
+            np.ndarray: The sampled values, in the order of `coordinates`.
+        """
+        if method not in SAMPLING_METHODS:
+            raise ValueError(
+                f"Sampling method must be one of "
+                f"{', '.join(repr(m) for m in SAMPLING_METHODS)}."
+            )
+
+        lons, lats = coordinates.longitudes, coordinates.latitudes
+
+        async def query() -> np.ndarray:
+            dtype, _, nodata = (await self._layout(band))[4:]
+
+            if method != "nearest":
+                bicubic = method == "bicubic"
+                rows, cols, points = await self._run(
+                    _neighbours, self.path, lons, lats, bicubic
+                )
+                values, hidden = await self._run(
+                    _blend, points, await self._pixels(band, rows, cols),
+                    nodata, bicubic
+                )
+
+                if masked:
+                    return np.ma.MaskedArray(values, mask=hidden)
+
+                values[hidden] = np.nan
+                return values
+
+            rows, cols, inside = await self._run(
+                _locate, self.path, lons, lats
+            )
+            index = np.flatnonzero(inside)
+
+            values = np.zeros(len(coordinates), dtype=dtype)
+            values[index] = await self._pixels(band, rows[index], cols[index])
+
+            return _sampled(values, inside, masked, nodata)
+
+        return await asyncio.wait_for(query(), timeout)
+
+    def close(self) -> None:
+        """Stop the thread pool, cancelling queued reads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self) -> "AsyncRasterReader":
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        return f"Async reader of {self.path}"
+
+    def __repr__(self) -> str:
+        return f"AsyncRasterReader(path={self.path!r})"
@@ -0,0 +1,322 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, InvalidStateError
+
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateError)
+
+from .cache import BlockCache
+from .pixel import sample_coordinates
+
+# Default maximum number of points resolved together
+DEFAULT_BATCH_SIZE = 1024
+
+# Default time, in seconds, a point waits for others to join its batch
+DEFAULT_BATCH_DELAY = 0.002
+
+MetricsCallback = Callable[[int, float], None]
+
+_STOP = object()
+
+
+class PointBatcher:
+    """
+    Micro-batching front end for single-point raster lookups.
+
+    Points submitted from any thread (or coroutine) are queued and resolved
+    by a background thread in batches: a batch is closed when it reaches
+    `max_batch` points or when its first point has waited `max_delay`
+    seconds. Each batch goes through `sample_coordinates`, so it costs one
+    vectorized transform and one read per block touched, and the values are
+    then handed back to each caller's future.
+
+    Every batch updates the `stats` metrics and, if given, calls
+    `on_batch(batch_size, max_queue_latency)` so that they can be exported.
+    Errors raised by the callback are counted in `stats` and do not stop
+    the batcher.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        band: int = 1,
+        max_batch: int = DEFAULT_BATCH_SIZE,
+        max_delay: float = DEFAULT_BATCH_DELAY,
+        cache: BlockCache | None = None,
+        on_batch: MetricsCallback | None = None
+    ) -> None:
+        if max_batch < 1:
+            raise ValueError("Batch size must be at least 1.")
+
+        if max_delay < 0:
+            raise ValueError("Batch delay must be non-negative.")
+
+        self.path = os.fspath(path)
+        self.band = band
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.cache = cache
+        self.on_batch = on_batch
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._error: BaseException | None = None
+        self.batches = 0
+        self.requests = 0
+        self.max_batch_seen = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.callback_errors = 0
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="tiffcomposer-batcher",
+            daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def stats(self) -> dict[str, float]:
+        """
+        Gets the batching metrics.
+
+        Returns:
+            dict[str, float]: Number of batches and requests, mean and
+            maximum batch size, mean and maximum queueing latency in
+            seconds, and number of errors raised by `on_batch`.
+        """
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "mean_batch_size": self.requests / max(self.batches, 1),
+                "max_batch_size": self.max_batch_seen,
+                "mean_latency": self.total_latency / max(self.requests, 1),
+                "max_latency": self.max_latency,
+                "callback_errors": self.callback_errors,
+            }
+
+    def submit(self, coordinate: GeoCoordinate) -> Future:
+        """
+        Queues a point lookup.
+
+        Args:
+            coordinate (GeoCoordinate): The coordinate to sample.
+
+        Returns:
+            Future: Resolves to the pixel value, or None if the coordinate
+            is outside the image bounds or the pixel holds no data.
+        """
+        if not isinstance(coordinate, GeoCoordinate):
+            raise GeoCoordinateError(
+                "Coordinate must be a GeoCoordinate object."
+            )
+
+        future: Future = Future()
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(
+                    "Cannot submit to a closed batcher."
+                ) from self._error
+
+            self._queue.put((coordinate, future, time.monotonic()))
+
+        return future
+
+    def get_value_from_coordinates(
+        self,
+        coordinate: GeoCoordinate,
+        timeout: float | None = None
+    ) -> float | None:
+        """
+        Gets the raster value at a geographic coordinate, blocking.
+
+        Args:
+            coordinate (GeoCoordinate): The coordinate to sample.
+            timeout (float | None, optional): Timeout in seconds. Defaults to
+                None, no timeout.
+
+        Returns:
+            float | None: The pixel value, None if outside the image bounds
+            or the pixel holds no data.
+        """
+        return self.submit(coordinate).result(timeout)
+
+    async def get_value_from_coordinates_async(
+        self,
+        coordinate: GeoCoordinate
+    ) -> float | None:
+        """
+        Gets the raster value at a geographic coordinate from a coroutine.
+
+        Args:
+            coordinate (GeoCoordinate): The coordinate to sample.
+
+        Returns:
+            float | None: The pixel value, None if outside the image bounds
+            or the pixel holds no data.
+        """
+        return await asyncio.wrap_future(self.submit(coordinate))
+
+    def _collect(self, first: tuple) -> tuple[list[tuple], bool]:
+        """
+        Collects the points joining a batch.
+
+        Args:
+            first (tuple): The first queued point of the batch.
+
+        Returns:
+            tuple[list[tuple], bool]: The batch, and whether the batcher was
+            closed while collecting it.
+        """
+        batch = [first]
+        deadline = first[2] + self.max_delay
+
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+            except queue.Empty:
+                break
+
+            if item is _STOP:
+                return batch, True
+
+            batch.append(item)
+
+        return batch, False
+
+    def _resolve(self, batch: list[tuple]) -> None:
+        """
+        Samples a batch of points and fulfils their futures.
+
+        Args:
+            batch (list[tuple]): The queued coordinates, futures and enqueue
+                times.
+        """
+        # Drop requests cancelled while they were queued
+        batch = [
+            item for item in batch
+            if item[1].set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+
+        started = time.monotonic()
+        latencies = [started - enqueued for _, _, enqueued in batch]
+
+        try:
+            values = sample_coordinates(
+                GeoCoordinateArray(
+                    [coordinate.latitude for coordinate, _, _ in batch],
+                    [coordinate.longitude for coordinate, _, _ in batch]
+                ),
+                self.path,
+                self.band,
+                masked=True,
+                cache=self.cache
+            )
+        except Exception as error:
+            for _, future, _ in batch:
+                future.set_exception(error)
+        else:
+            for (_, future, _), value, missing in zip(
+                batch, values.data, values.mask
+            ):
+                future.set_result(None if missing else value)
+
+        with self._lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self.total_latency += sum(latencies)
+            self.max_latency = max(self.max_latency, max(latencies))
+
+        if self.on_batch is not None:
+            try:
+                self.on_batch(len(batch), max(latencies))
+            except Exception:
+                with self._lock:
+                    self.callback_errors += 1
+
+    @staticmethod
+    def _fail(batch: list[tuple], error: BaseException) -> None:
+        """
+        Fails the futures of a batch that are still pending.
+
+        Args:
+            batch (list[tuple]): The queued coordinates, futures and enqueue
+                times.
+            error (BaseException): The error to set.
+        """
+        for _, future, _ in batch:
+            try:
+                future.set_exception(error)
+            except InvalidStateError:
+                pass
+
+    def _run(self) -> None:
+        """Resolve batches until the batcher is closed."""
+        stopped = False
+        batch: list[tuple] = []
+
+        try:
+            while not stopped:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+
+                batch = [item]
+                try:
+                    batch, stopped = self._collect(item)
+                    self._resolve(batch)
+                except Exception as error:
+                    self._fail(batch, error)
+        except BaseException as error:
+            # The worker cannot go on, fail every pending and later request
+            with self._lock:
+                self._closed = True
+                self._error = error
+
+            self._fail(batch, error)
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    self._fail([item], error)
+
+            raise
+
+    def close(self) -> None:
+        """Resolve the queued points and stop the background thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+
+        self._thread.join()
+
+    def __enter__(self) -> "PointBatcher":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        return f"Point batcher of {self.path}"
+
+    def __repr__(self) -> str:
+        return (
+            f"PointBatcher(path={self.path!r}, max_batch={self.max_batch}, "
+            f"max_delay={self.max_delay})"
+        )
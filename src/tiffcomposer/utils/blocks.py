@@ -0,0 +1,96 @@
+from collections.abc import Iterator
+
+from rasterio.windows import Window
+
+from .dataset import DatasetLike, as_dataset
+
+# Minimum number of pixels per read when coalescing strips
+DEFAULT_MIN_BLOCK_PIXELS = 1 << 20
+
+
+def iter_block_windows(
+    src: DatasetLike,
+    band: int = 1,
+    min_pixels: int = DEFAULT_MIN_BLOCK_PIXELS
+) -> Iterator[Window]:
+    """
+    Iterates over the internal blocks of a raster band in file order.
+
+    Tiled files yield their native tiles. Stripped files yield bands of
+    consecutive strips holding at least `min_pixels` pixels, so that
+    single-row strips do not turn into one read per row.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+        min_pixels (int, optional): Minimum pixels per coalesced strip read.
+            Defaults to DEFAULT_MIN_BLOCK_PIXELS.
+
+    Yields:
+        Window: The block windows.
+    """
+    src = as_dataset(src)
+    block_height, block_width = src.block_shapes[band - 1]
+
+    if block_width < src.width:
+        for _, window in src.block_windows(band):
+            yield window
+        return
+
+    rows = max(block_height, min_pixels // max(src.width, 1))
+    rows -= rows % block_height
+
+    for row in range(0, src.height, rows):
+        yield Window(0, row, src.width, min(rows, src.height - row))
+
+
+def iter_window_blocks(
+    src: DatasetLike,
+    window: Window,
+    band: int = 1,
+    min_pixels: int = DEFAULT_MIN_BLOCK_PIXELS
+) -> Iterator[Window]:
+    """
+    Iterates over the parts of a window held by each internal block.
+
+    Only the blocks overlapping the window are visited, in file order, and
+    stripped files are coalesced as in `iter_block_windows`, so the cost
+    grows with the window rather than with the band.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        window (Window): The window, inside the band.
+        band (int, optional): The band index. Defaults to 1.
+        min_pixels (int, optional): Minimum pixels per coalesced strip read.
+            Defaults to DEFAULT_MIN_BLOCK_PIXELS.
+
+    Yields:
+        Window: The intersection of each block with the window.
+    """
+    src = as_dataset(src)
+    block_height, block_width = src.block_shapes[band - 1]
+
+    if block_width >= src.width:
+        rows = max(block_height, min_pixels // max(src.width, 1))
+        block_height, block_width = rows - rows % block_height, src.width
+
+    row_min, col_min = int(window.row_off), int(window.col_off)
+    row_max = row_min + int(window.height)
+    col_max = col_min + int(window.width)
+    if row_max <= row_min or col_max <= col_min:
+        return
+
+    for block_row in range(row_min // block_height,
+                           (row_max - 1) // block_height + 1):
+        row_off = block_row * block_height
+        rows = slice(max(row_min, row_off),
+                     min(row_max, row_off + block_height))
+
+        for block_col in range(col_min // block_width,
+                               (col_max - 1) // block_width + 1):
+            col_off = block_col * block_width
+            cols = slice(max(col_min, col_off),
+                         min(col_max, col_off + block_width))
+
+            yield Window.from_slices(rows, cols)
+
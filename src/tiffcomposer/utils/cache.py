@@ -0,0 +1,598 @@
+import hashlib
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from rasterio.windows import Window
+
+from .dataset import DatasetLike, as_dataset
+from .memmap import map_band
+
+# Default memory limit of a block cache
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+# Shared memory blocks start with a header whose first byte flags them ready
+_SHARED_HEADER_BYTES = 64
+
+BlockKey = tuple[tuple[object, ...], int, int, int]
+
+
+def _dataset_key(src: DatasetLike) -> tuple[object, ...]:
+    """
+    Gets a key identifying the current contents of a dataset.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+
+    Returns:
+        tuple[object, ...]: The dataset name, with its size and modification
+        time when it is a local file.
+    """
+    try:
+        stat = os.stat(src.name)
+    except OSError:
+        return (src.name,)
+
+    return src.name, stat.st_size, stat.st_mtime_ns
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    """
+    Attaches to a shared memory segment without tracking it.
+
+    Before Python 3.13 attaching registers the segment with the resource
+    tracker, which then unlinks it (or warns) when this process exits even
+    though another process published it, so the segment is unregistered
+    right after attaching.
+
+    Args:
+        name (str): The segment name.
+
+    Returns:
+        shared_memory.SharedMemory: The attached segment.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+
+    segment = shared_memory.SharedMemory(name)
+    resource_tracker.unregister(segment._name, "shared_memory")
+
+    return segment
+
+
+def _detach_segment(
+    segment: shared_memory.SharedMemory,
+    owned: bool
+) -> None:
+    """
+    Detaches from a shared memory segment, unlinking it if it is owned.
+
+    Args:
+        segment (shared_memory.SharedMemory): The segment.
+        owned (bool): Whether this process published the segment.
+    """
+    try:
+        segment.close()
+    except BufferError:
+        # A view is still alive, the mapping is freed with it
+        pass
+
+    if owned:
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _release_segments(
+    segments: dict[BlockKey, shared_memory.SharedMemory],
+    owned: set[BlockKey],
+    lock: threading.RLock,
+    pid: int
+) -> None:
+    """
+    Detaches from every segment of a store, unlinking the ones it published.
+
+    Runs when the store is garbage collected or the process exits. Forked
+    children inherit the store but not the segments, so they skip it.
+
+    Args:
+        segments (dict[BlockKey, shared_memory.SharedMemory]): The attached
+            segments.
+        owned (set[BlockKey]): The keys of the published segments.
+        lock (threading.RLock): The store lock.
+        pid (int): The process that created the store.
+    """
+    if os.getpid() != pid:
+        return
+
+    with lock:
+        for key, segment in segments.items():
+            _detach_segment(segment, key in owned)
+
+        segments.clear()
+        owned.clear()
+
+
+class _SharedBlockStore:
+    """
+    Blocks published in named shared memory segments.
+
+    Segments this process published are unlinked when they are released,
+    and the remaining ones when the store is garbage collected or the
+    process exits, so that none is left to the resource tracker.
+    """
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+        self._lock = threading.RLock()
+        self._segments: dict[BlockKey, shared_memory.SharedMemory] = {}
+        self._owned: set[BlockKey] = set()
+        self._finalizer = weakref.finalize(
+            self, _release_segments, self._segments, self._owned,
+            self._lock, os.getpid()
+        )
+
+    def _name(self, key: BlockKey) -> str:
+        """
+        Gets the segment name of a block.
+
+        Args:
+            key (BlockKey): The block key.
+
+        Returns:
+            str: The segment name.
+        """
+        digest = hashlib.blake2b(
+            repr((self.namespace, key)).encode(),
+            digest_size=12
+        ).hexdigest()
+        return f"tc_{digest}"
+
+    def _view(
+        self,
+        segment: shared_memory.SharedMemory,
+        shape: tuple[int, int],
+        dtype: np.dtype
+    ) -> np.ndarray:
+        """
+        Gets a read-only array view over a segment.
+
+        Args:
+            segment (shared_memory.SharedMemory): The segment.
+            shape (tuple[int, int]): The block shape.
+            dtype (np.dtype): The block dtype.
+
+        Returns:
+            np.ndarray: The block data.
+        """
+        array = np.ndarray(
+            shape,
+            dtype=dtype,
+            buffer=segment.buf,
+            offset=_SHARED_HEADER_BYTES
+        )
+        array.setflags(write=False)
+        return array
+
+    def get(
+        self,
+        key: BlockKey,
+        shape: tuple[int, int],
+        dtype: np.dtype
+    ) -> np.ndarray | None:
+        """
+        Attaches to a block published by any process.
+
+        Args:
+            key (BlockKey): The block key.
+            shape (tuple[int, int]): The block shape.
+            dtype (np.dtype): The block dtype.
+
+        Returns:
+            np.ndarray | None: The block data, None if not published.
+        """
+        with self._lock:
+            return self._get(key, shape, dtype)
+
+    def _get(
+        self,
+        key: BlockKey,
+        shape: tuple[int, int],
+        dtype: np.dtype
+    ) -> np.ndarray | None:
+        """
+        Attaches to a block, with the store lock held.
+
+        Args:
+            key (BlockKey): The block key.
+            shape (tuple[int, int]): The block shape.
+            dtype (np.dtype): The block dtype.
+
+        Returns:
+            np.ndarray | None: The block data, None if not published.
+        """
+        segment = self._segments.get(key)
+
+        if segment is None:
+            try:
+                segment = _attach_segment(self._name(key))
+            except FileNotFoundError:
+                return None
+
+            if not segment.buf[0]:
+                segment.close()
+                return None
+
+            self._segments[key] = segment
+
+        return self._view(segment, shape, dtype)
+
+    def put(self, key: BlockKey, data: np.ndarray) -> np.ndarray:
+        """
+        Publishes a block, or attaches to it if another process did first.
+
+        Args:
+            key (BlockKey): The block key.
+            data (np.ndarray): The block data.
+
+        Returns:
+            np.ndarray: The block data backed by shared memory.
+        """
+        with self._lock:
+            shared = self._get(key, data.shape, data.dtype)
+            if shared is not None:
+                return shared
+
+            try:
+                segment = shared_memory.SharedMemory(
+                    self._name(key),
+                    create=True,
+                    size=_SHARED_HEADER_BYTES + data.nbytes
+                )
+            except FileExistsError:
+                # Another process is still publishing it
+                return data
+
+            array = np.ndarray(
+                data.shape,
+                dtype=data.dtype,
+                buffer=segment.buf,
+                offset=_SHARED_HEADER_BYTES
+            )
+            array[...] = data
+            segment.buf[0] = 1
+
+            self._segments[key] = segment
+            self._owned.add(key)
+
+            return self._view(segment, data.shape, data.dtype)
+
+    def release(self, key: BlockKey) -> None:
+        """
+        Detaches from a block, unlinking it if this process published it.
+
+        Views of the block must not be used after releasing it.
+
+        Args:
+            key (BlockKey): The block key.
+        """
+        with self._lock:
+            segment = self._segments.pop(key, None)
+            if segment is None:
+                return
+
+            _detach_segment(segment, key in self._owned)
+            self._owned.discard(key)
+
+
+class BlockCache:
+    """
+    Byte-bounded LRU cache of decoded raster blocks.
+
+    Blocks are keyed by dataset, band and block row/column, and windows are
+    assembled from them. Windows that fall inside a single block are
+    returned as read-only views without copying.
+
+    With `shared=True`, decoded blocks are also published in named shared
+    memory, so worker processes using a cache with the same `namespace`
+    attach to blocks decoded by any of them instead of decoding them again.
+    Shared blocks are unlinked when the process that published them evicts
+    them, clears or drops its cache, or exits.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        shared: bool = False,
+        namespace: str = "tiffcomposer"
+    ) -> None:
+        if max_bytes < 0:
+            raise ValueError("Cache size must be a non-negative number.")
+
+        self.max_bytes = max_bytes
+        self._blocks: OrderedDict[BlockKey, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._shared = _SharedBlockStore(namespace) if shared else None
+        self.bytes = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Gets the cache metrics.
+
+        Returns:
+            dict[str, int]: Hits, shared hits, misses, evictions, cached
+            blocks and cached bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "blocks": len(self._blocks),
+                "bytes": self.bytes,
+            }
+
+    def _store(self, key: BlockKey, block: np.ndarray) -> None:
+        """
+        Inserts a block and evicts the least recently used ones over budget.
+
+        Args:
+            key (BlockKey): The block key.
+            block (np.ndarray): The block data.
+        """
+        if block.nbytes > self.max_bytes:
+            if self._shared is not None:
+                self._shared.release(key)
+            return
+
+        with self._lock:
+            if key in self._blocks:
+                return
+
+            self._blocks[key] = block
+            self.bytes += block.nbytes
+
+            while self.bytes > self.max_bytes:
+                evicted_key, evicted = self._blocks.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+
+                if self._shared is not None:
+                    self._shared.release(evicted_key)
+
+    def get_block(
+        self,
+        src: DatasetLike,
+        band: int,
+        block_row: int,
+        block_col: int
+    ) -> np.ndarray:
+        """
+        Gets a decoded block, reading it on a cache miss.
+
+        Args:
+            src (DatasetLike): The dataset path or opened dataset (src).
+            band (int): The band index.
+            block_row (int): The block row.
+            block_col (int): The block column.
+
+        Returns:
+            np.ndarray: The read-only block data.
+        """
+        src = as_dataset(src)
+        return self._get_block(
+            src, _dataset_key(src), band, block_row, block_col
+        )
+
+    def _get_block(
+        self,
+        src: DatasetLike,
+        dataset: tuple[object, ...],
+        band: int,
+        block_row: int,
+        block_col: int
+    ) -> np.ndarray:
+        """
+        Gets a decoded block of an opened dataset with a known key.
+
+        Args:
+            src (DatasetLike): The opened dataset (src).
+            dataset (tuple[object, ...]): The dataset key.
+            band (int): The band index.
+            block_row (int): The block row.
+            block_col (int): The block column.
+
+        Returns:
+            np.ndarray: The read-only block data.
+        """
+        key = (dataset, band, block_row, block_col)
+
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                self.hits += 1
+                return block
+
+        block_height, block_width = src.block_shapes[band - 1]
+        row_off, col_off = block_row * block_height, block_col * block_width
+        shape = (
+            min(block_height, src.height - row_off),
+            min(block_width, src.width - col_off)
+        )
+        dtype = np.dtype(src.dtypes[band - 1])
+
+        block = None
+        if self._shared is not None:
+            block = self._shared.get(key, shape, dtype)
+
+        if block is not None:
+            with self._lock:
+                self.shared_hits += 1
+        else:
+            block = src.read(
+                band,
+                window=Window(col_off, row_off, shape[1], shape[0])
+            )
+            block.setflags(write=False)
+
+            if self._shared is not None:
+                block = self._shared.put(key, block)
+
+            with self._lock:
+                self.misses += 1
+
+        self._store(key, block)
+
+        return block
+
+    def read(
+        self,
+        src: DatasetLike,
+        band: int = 1,
+        window: Window | None = None
+    ) -> np.ndarray:
+        """
+        Reads a window of a band through the cache.
+
+        Args:
+            src (DatasetLike): The dataset path or opened dataset (src).
+            band (int, optional): The band index. Defaults to 1.
+            window (Window | None, optional): The window to read, inside the
+                dataset bounds. Defaults to None, the full band.
+
+        Returns:
+            np.ndarray: The window data. A read-only view when the window
+            lies within one block, a new array otherwise.
+        """
+        src = as_dataset(src)
+
+        if window is None:
+            window = Window(0, 0, src.width, src.height)
+
+        row_min, col_min = int(window.row_off), int(window.col_off)
+        row_max = row_min + int(window.height)
+        col_max = col_min + int(window.width)
+
+        if row_max <= row_min or col_max <= col_min:
+            return np.empty(
+                (max(0, row_max - row_min), max(0, col_max - col_min)),
+                dtype=src.dtypes[band - 1]
+            )
+
+        dataset = _dataset_key(src)
+        block_height, block_width = src.block_shapes[band - 1]
+        block_rows = range(row_min // block_height,
+                           (row_max - 1) // block_height + 1)
+        block_cols = range(col_min // block_width,
+                           (col_max - 1) // block_width + 1)
+
+        if len(block_rows) == 1 and len(block_cols) == 1:
+            block = self._get_block(
+                src, dataset, band, block_rows[0], block_cols[0]
+            )
+            row_off = block_rows[0] * block_height
+            col_off = block_cols[0] * block_width
+            return block[
+                row_min - row_off:row_max - row_off,
+                col_min - col_off:col_max - col_off
+            ]
+
+        out = np.empty(
+            (row_max - row_min, col_max - col_min),
+            dtype=src.dtypes[band - 1]
+        )
+
+        for block_row in block_rows:
+            row_off = block_row * block_height
+            rows = slice(max(row_min, row_off),
+                         min(row_max, row_off + block_height))
+
+            for block_col in block_cols:
+                col_off = block_col * block_width
+                cols = slice(max(col_min, col_off),
+                             min(col_max, col_off + block_width))
+
+                block = self._get_block(
+                    src, dataset, band, block_row, block_col
+                )
+                out[rows.start - row_min:rows.stop - row_min,
+                    cols.start - col_min:cols.stop - col_min] = block[
+                    rows.start - row_off:rows.stop - row_off,
+                    cols.start - col_off:cols.stop - col_off
+                ]
+
+        return out
+
+    def clear(self) -> None:
+        """Drop every cached block and reset the metrics."""
+        with self._lock:
+            if self._shared is not None:
+                for key in self._blocks:
+                    self._shared.release(key)
+
+            self._blocks.clear()
+            self.bytes = 0
+            self.hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __str__(self) -> str:
+        return f"Block cache of {self.bytes}/{self.max_bytes} bytes"
+
+    def __repr__(self) -> str:
+        return (
+            f"BlockCache(max_bytes={self.max_bytes}, "
+            f"shared={self._shared is not None})"
+        )
+
+
+def read_window(
+    src: DatasetLike,
+    band: int = 1,
+    window: Window | None = None,
+    cache: BlockCache | None = None
+) -> np.ndarray:
+    """
+    Reads a window of a band, through a block cache if one is given.
+
+    Bands of uncompressed GeoTIFFs are served from a memory map instead,
+    without going through rasterio or the cache.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+        window (Window | None, optional): The window to read. Defaults to
+            None, the full band.
+        cache (BlockCache | None, optional): The block cache. Defaults to
+            None, which reads directly from the dataset.
+
+    Returns:
+        np.ndarray: The window data, read-only when served by the cache or
+        a memory map.
+    """
+    src = as_dataset(src)
+    mapped = map_band(src, band)
+
+    if mapped is not None:
+        return mapped.read(window)
+
+    if cache is not None:
+        return cache.read(src, band, window)
+
+    return src.read(band, window=window)
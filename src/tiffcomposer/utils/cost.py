@@ -0,0 +1,487 @@
+import os
+from collections.abc import Sequence
+
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.crs import CRS
+from rasterio.warp import transform as warp_transform
+from rasterio.windows import Window
+
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateError)
+from tiffcomposer.core.distance import distances
+
+from .blocks import DEFAULT_MIN_BLOCK_PIXELS, iter_block_windows
+from .cache import BlockCache, read_window
+from .dataset import DatasetLike, as_dataset, band_index
+from .nodata import band_nodata, valid_mask
+from .transform import pixel_to_world, world_to_pixel
+
+# Row and column offsets of the eight neighbours of a pixel
+DIRECTIONS = (
+    (-1, -1), (-1, 0), (-1, 1),
+    (0, -1), (0, 1),
+    (1, -1), (1, 0), (1, 1),
+)
+
+# Back link of source pixels and of pixels no source reaches
+SOURCE = -1
+UNREACHED = -2
+
+# Width of the cost buckets settled together, in typical steps
+_BUCKET_STEPS = 2.0
+
+# Number of pixels sampled to estimate the typical step cost
+_COST_SAMPLE = 1 << 16
+
+# Number of cost buckets across the longest straight path, at most
+_MAX_BUCKETS = 1 << 16
+
+# CRS of the pixel centers measured on projected grids
+_LONLAT = "EPSG:4326"
+
+
+def _working_array(
+    workdir: str | os.PathLike | None,
+    name: str,
+    size: int,
+    dtype: type,
+    fill: float
+) -> np.ndarray:
+    """
+    Allocates a flat working array, memory mapped if a directory is given.
+
+    Args:
+        workdir (str | os.PathLike | None): The directory of the memory
+            mapped file, or None for an in-memory array.
+        name (str): The file name.
+        size (int): The number of elements.
+        dtype (type): The element type.
+        fill (float): The initial value.
+
+    Returns:
+        np.ndarray: The array.
+    """
+    if workdir is None:
+        return np.full(size, fill, dtype=dtype)
+
+    array = np.lib.format.open_memmap(
+        os.path.join(workdir, name), mode="w+", dtype=dtype, shape=(size,)
+    )
+    array.fill(fill)
+
+    return array
+
+
+def _step_lengths(
+    transform: Affine,
+    height: int,
+    width: int,
+    crs: CRS | None = None
+) -> np.ndarray:
+    """
+    Gets the length of the steps from the pixels of each row to their
+    neighbours.
+
+    Grids with a CRS use the geodesic distance between pixel centers, so
+    east-west steps shrink towards the poles. Projected grids are measured
+    along their central column, which is exact when the scale of the
+    projection only varies with latitude, as in Web Mercator, and
+    approximate away from that column otherwise. Grids without a CRS use
+    the Euclidean distance in the units of the transform.
+
+    Args:
+        transform (Affine): The grid transform.
+        height (int): The grid height.
+        width (int): The grid width.
+        crs (CRS | None, optional): The grid CRS. Defaults to None.
+
+    Returns:
+        np.ndarray: The (height, 8) length of the step in each direction,
+        per row.
+    """
+    rows = np.arange(height)
+    col = 0 if crs is None or crs.is_geographic else width // 2
+    lengths = np.empty((height, len(DIRECTIONS)))
+    x1, y1 = pixel_to_world(transform, rows, np.full(height, col))
+    projected = crs is not None and not crs.is_geographic
+
+    if projected:
+        x1, y1 = map(np.asarray, warp_transform(crs, _LONLAT, x1, y1))
+
+    for k, (dr, dc) in enumerate(DIRECTIONS):
+        x2, y2 = pixel_to_world(transform, rows + dr,
+                                np.full(height, col + dc))
+
+        if crs is None:
+            lengths[:, k] = np.hypot(x2 - x1, y2 - y1)
+            continue
+
+        if projected:
+            x2, y2 = map(np.asarray, warp_transform(crs, _LONLAT, x2, y2))
+
+        # Neighbours of the edge rows may fall past the poles
+        lengths[:, k] = distances(
+            GeoCoordinateArray._from_valid(np.clip(y1, -90, 90), x1),
+            GeoCoordinateArray._from_valid(np.clip(y2, -90, 90), x2)
+        )
+
+    return lengths
+
+
+def _relax(
+    frontier: np.ndarray,
+    cost: np.ndarray,
+    accumulated: np.ndarray,
+    backlinks: np.ndarray,
+    lengths: np.ndarray,
+    shape: tuple[int, int]
+) -> np.ndarray:
+    """
+    Relaxes the neighbours of many pixels at once.
+
+    Args:
+        frontier (np.ndarray): The flat indices of the pixels.
+        cost (np.ndarray): The flat costs, NaN on barriers.
+        accumulated (np.ndarray): The flat accumulated costs.
+        backlinks (np.ndarray): The flat back links.
+        lengths (np.ndarray): The step lengths per row (see
+            `_step_lengths`).
+        shape (tuple[int, int]): The grid (height, width).
+
+    Returns:
+        np.ndarray: The flat indices of the neighbours whose accumulated
+        cost decreased, without duplicates.
+    """
+    height, width = shape
+    rows, cols = np.divmod(frontier, width)
+    distance = accumulated[frontier]
+    half_cost = cost[frontier] / 2
+    updated = []
+
+    # The neighbours in one direction are distinct, so each direction is
+    # relaxed with one vectorized comparison against the current costs
+    for k, (dr, dc) in enumerate(DIRECTIONS):
+        inside = (
+            (rows + dr >= 0) & (rows + dr < height)
+            & (cols + dc >= 0) & (cols + dc < width)
+        )
+        neighbours = frontier[inside] + (dr * width + dc)
+        candidates = distance[inside] + (
+            half_cost[inside] + cost[neighbours] / 2
+        ) * lengths[rows[inside], k]
+
+        # Barriers have a NaN cost, which never compares as lower
+        better = candidates < accumulated[neighbours]
+        neighbours = neighbours[better]
+        accumulated[neighbours] = candidates[better]
+        backlinks[neighbours] = k
+        updated.append(neighbours)
+
+    return np.unique(np.concatenate(updated))
+
+
+def _bucket_width(
+    cost: np.ndarray,
+    lengths: np.ndarray,
+    shape: tuple[int, int]
+) -> float:
+    """
+    Gets the width of the cost buckets settled together.
+
+    The width spans a couple of typical steps over the positive costs, as
+    free pixels would otherwise shrink it towards zero, and is kept wide
+    enough for the longest straight path to cross at most `_MAX_BUCKETS`
+    buckets.
+
+    Args:
+        cost (np.ndarray): The flat costs, NaN on barriers.
+        lengths (np.ndarray): The step lengths per row (see
+            `_step_lengths`).
+        shape (tuple[int, int]): The grid (height, width).
+
+    Returns:
+        float: The bucket width, in accumulated cost.
+    """
+    sample = np.asarray(cost[::max(1, cost.size // _COST_SAMPLE)])
+    positive = sample[sample > 0]
+
+    # Without positive costs every reachable pixel costs nothing
+    if positive.size == 0:
+        return 1.0
+
+    step = float(np.median(lengths))
+    return max(
+        _BUCKET_STEPS * float(np.median(positive)) * step,
+        float(positive.max()) * step * sum(shape) / _MAX_BUCKETS
+    )
+
+
+class CostSurface:
+    """
+    Accumulated cost surface of a cost raster from one or many sources.
+
+    Holds, for every pixel, the least accumulated cost of reaching it from
+    the nearest source and the direction of the previous pixel on that
+    least-cost path, so that paths to any destination are traced back
+    without searching again. The arrays are flat, in row-major order, and
+    may be memory mapped.
+    """
+
+    def __init__(
+        self,
+        accumulated: np.ndarray,
+        backlinks: np.ndarray,
+        shape: tuple[int, int],
+        transform: Affine,
+        crs: rasterio.crs.CRS | None = None
+    ) -> None:
+        self.accumulated = accumulated
+        self.backlinks = backlinks
+        self.shape = shape
+        self.transform = transform
+        self.crs = crs
+
+    def _pixel(self, coordinate: GeoCoordinate) -> int:
+        """
+        Gets the flat index of the pixel holding a coordinate.
+
+        Args:
+            coordinate (GeoCoordinate): The coordinate.
+
+        Returns:
+            int: The flat pixel index.
+        """
+        if not isinstance(coordinate, GeoCoordinate):
+            raise GeoCoordinateError(
+                "Coordinate must be a GeoCoordinate object."
+            )
+
+        height, width = self.shape
+        row, col = world_to_pixel(
+            self.transform, coordinate.longitude, coordinate.latitude, "floor"
+        )
+
+        if not (0 <= row < height and 0 <= col < width):
+            raise ValueError(f"{coordinate} is outside the raster bounds.")
+
+        return int(row) * width + int(col)
+
+    def cost(self, coordinate: GeoCoordinate) -> float:
+        """
+        Gets the least accumulated cost of reaching a coordinate.
+
+        Args:
+            coordinate (GeoCoordinate): The coordinate.
+
+        Returns:
+            float: The accumulated cost, infinite if no source reaches it.
+        """
+        return float(self.accumulated[self._pixel(coordinate)])
+
+    def least_cost_path(
+        self,
+        destination: GeoCoordinate
+    ) -> tuple[GeoCoordinateArray, np.ndarray]:
+        """
+        Traces the least-cost path from the nearest source to a coordinate.
+
+        Args:
+            destination (GeoCoordinate): The destination.
+
+        Returns:
+            tuple[GeoCoordinateArray, np.ndarray]: The pixel centers of the
+            path, from the source to the destination, and the accumulated
+            cost at each of them.
+        """
+        index = self._pixel(destination)
+        width = self.shape[1]
+        offsets = [dr * width + dc for dr, dc in DIRECTIONS]
+
+        if self.backlinks[index] == UNREACHED:
+            raise ValueError(f"{destination} is not reachable from a source.")
+
+        path = [index]
+        while (link := self.backlinks[index]) != SOURCE:
+            index -= offsets[link]
+            path.append(index)
+
+        path = np.array(path[::-1])
+        lons, lats = pixel_to_world(self.transform, path // width,
+                                    path % width)
+
+        return (
+            GeoCoordinateArray._from_valid(lats, lons),
+            np.asarray(self.accumulated[path], dtype=np.float64)
+        )
+
+    def to_array(self) -> np.ndarray:
+        """
+        Gets the accumulated cost raster.
+
+        Returns:
+            np.ndarray: The (height, width) accumulated costs, infinite
+            where no source reaches.
+        """
+        return self.accumulated.reshape(self.shape)
+
+    def write(self, path: str | os.PathLike) -> str:
+        """
+        Writes the accumulated cost raster to a GeoTIFF, in row bands.
+
+        Unreached pixels are written as NaN, the band's nodata value.
+
+        Args:
+            path (str | os.PathLike): The output file path.
+
+        Returns:
+            str: The output file path.
+        """
+        height, width = self.shape
+        accumulated = self.to_array()
+        rows = max(1, DEFAULT_MIN_BLOCK_PIXELS // max(width, 1))
+
+        with rasterio.open(
+            path, "w", driver="GTiff", width=width, height=height, count=1,
+            dtype="float64", crs=self.crs, transform=self.transform,
+            nodata=np.nan, tiled=True, compress="deflate",
+            bigtiff="IF_SAFER"
+        ) as dst:
+            for row in range(0, height, rows):
+                data = np.array(accumulated[row:row + rows])
+                data[np.isinf(data)] = np.nan
+                dst.write(
+                    data, 1,
+                    window=Window(0, row, width, data.shape[0])
+                )
+
+        return os.fspath(path)
+
+    def __str__(self) -> str:
+        height, width = self.shape
+        return f"Cost surface of {width}x{height}"
+
+    def __repr__(self) -> str:
+        return f"CostSurface(shape={self.shape})"
+
+
+def cost_distance(
+    src: DatasetLike,
+    sources: GeoCoordinate | GeoCoordinateArray | Sequence[GeoCoordinate],
+    band: int | str = 1,
+    workdir: str | os.PathLike | None = None,
+    cache: BlockCache | None = None
+) -> CostSurface:
+    """
+    Computes the accumulated cost surface of a cost band from sources.
+
+    Finds the least accumulated cost from every source at once over the
+    8-connected pixel grid. Moving between neighbouring pixels costs the
+    mean of their costs times the length of the step, which on geographic
+    grids is the geodesic distance between the pixel centers at their
+    latitude (see `_step_lengths` for projected grids). Pixels that are
+    nodata, NaN or negative are barriers.
+
+    Pixels are settled in buckets of accumulated cost a couple of typical
+    positive steps wide (delta-stepping), which gives the same costs as
+    Dijkstra's algorithm. Each bucket relaxes its whole frontier with
+    vectorized NumPy operations, so the number of Python-level iterations
+    grows with the length of the paths in pixels rather than with the
+    number of pixels.
+    Regions of zero cost take one iteration per pixel crossed.
+
+    The cost band is streamed into a flat working array block by block.
+    With a `workdir`, the working arrays are memory mapped files in that
+    directory, so rasters larger than memory are processed with only the
+    search frontier held in memory.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        sources (GeoCoordinate | GeoCoordinateArray |
+            Sequence[GeoCoordinate]): The source coordinates.
+        band (int | str, optional): The cost band index or name. Defaults
+            to 1.
+        workdir (str | os.PathLike | None, optional): Directory for the
+            memory mapped working arrays. Defaults to None, in memory.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None, which reads directly from the dataset.
+
+    Returns:
+        CostSurface: The accumulated cost surface.
+    """
+    src = as_dataset(src)
+    band = band_index(src, band)
+    height, width = src.height, src.width
+    size = height * width
+    nodata = band_nodata(src, band)
+
+    if isinstance(sources, GeoCoordinate):
+        sources = [sources]
+    if not isinstance(sources, GeoCoordinateArray):
+        sources = GeoCoordinateArray.from_coordinates(sources)
+
+    # Stream the cost band, marking barriers with NaN
+    cost = _working_array(workdir, "cost.npy", size, np.float64, np.nan)
+    grid = cost.reshape(height, width)
+    for window in iter_block_windows(src, band):
+        data = read_window(src, band, window, cache).astype(np.float64)
+        data[~valid_mask(data, nodata) | (data < 0)] = np.nan
+        grid[window.toslices()] = data
+
+    accumulated = _working_array(
+        workdir, "accumulated.npy", size, np.float64, np.inf
+    )
+    backlinks = _working_array(
+        workdir, "backlinks.npy", size, np.int8, UNREACHED
+    )
+
+    rows, cols = world_to_pixel(
+        src, sources.longitudes, sources.latitudes, "floor"
+    )
+    seeds = []
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        if not (0 <= row < height and 0 <= col < width):
+            raise ValueError("Sources must be inside the raster bounds.")
+
+        index = row * width + col
+        if not np.isnan(cost[index]):
+            accumulated[index] = 0.0
+            backlinks[index] = SOURCE
+            seeds.append(index)
+
+    if not seeds:
+        raise ValueError("Every source lies on a barrier pixel.")
+
+    lengths = _step_lengths(src.transform, height, width, src.crs)
+
+    # Settle the pixels bucket by bucket of accumulated cost, relaxing each
+    # bucket until it is stable (delta-stepping)
+    delta = _bucket_width(cost, lengths, (height, width))
+    pending = np.unique(seeds)
+
+    while pending.size:
+        distance = accumulated[pending]
+        bound = distance.min() + delta
+        inside = distance < bound
+        frontier, pending = pending[inside], pending[~inside]
+        reached = [pending]
+
+        while frontier.size:
+            updated = _relax(
+                frontier, cost, accumulated, backlinks, lengths,
+                (height, width)
+            )
+            inside = accumulated[updated] < bound
+            frontier = updated[inside]
+            reached.append(updated[~inside])
+
+        pending = np.unique(np.concatenate(reached))
+
+    if workdir is not None:
+        accumulated.flush()
+        backlinks.flush()
+
+    return CostSurface(
+        accumulated, backlinks, (height, width), src.transform, src.crs
+    )
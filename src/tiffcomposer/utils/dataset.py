@@ -0,0 +1,262 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from functools import partial
+from typing import Any
+
+import rasterio
+
+# Default number of open readers kept per thread
+DEFAULT_POOL_SIZE = 32
+
+DatasetLike = str | os.PathLike | rasterio.io.DatasetReader
+
+PoolKey = tuple[str, tuple[tuple[str, Any], ...]]
+
+
+class _Owner:
+    """Thread-local marker whose collection releases the thread's readers."""
+
+
+def _release(
+    pid: int,
+    lock: threading.RLock,
+    caches: list[OrderedDict[PoolKey, Any]],
+    cache: OrderedDict[PoolKey, Any]
+) -> None:
+    """
+    Closes the readers of a finished thread and forgets its LRU.
+
+    Readers inherited across a fork are left alone, like in `clear`.
+
+    Args:
+        pid (int): The process that opened the readers.
+        lock (threading.RLock): The pool lock.
+        caches (list[OrderedDict[PoolKey, Any]]): The LRUs of the pool.
+        cache (OrderedDict[PoolKey, Any]): The LRU of the thread.
+    """
+    if os.getpid() != pid:
+        return
+
+    with lock:
+        for i, other in enumerate(caches):
+            if other is cache:
+                del caches[i]
+                break
+
+        for dataset in cache.values():
+            dataset.close()
+        cache.clear()
+
+
+def _after_fork(pool: "weakref.ref[DatasetPool]") -> None:
+    """
+    Resets a pool in a forked child.
+
+    Args:
+        pool (weakref.ref[DatasetPool]): The pool, if still alive.
+    """
+    pool = pool()
+    if pool is not None:
+        pool._forked()
+
+
+class DatasetPool:
+    """
+    LRU pool of open rasterio readers keyed by path and open options.
+
+    GDAL handles must not be shared between threads, so each thread keeps
+    its own LRU of readers, which is closed when the thread finishes. Handles
+    are never reused across a fork: a child process discards the inherited
+    handles and opens its own.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE) -> None:
+        if max_size < 1:
+            raise ValueError("Pool size must be at least 1.")
+
+        self.max_size = max_size
+        # Reentrant, since a thread's readers may be released by a garbage
+        # collection run while the lock is held
+        self._lock = threading.RLock()
+        self._reset()
+
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(
+                after_in_child=partial(_after_fork, weakref.ref(self))
+            )
+
+    def _forked(self) -> None:
+        """
+        Forget the inherited handles in a forked child.
+
+        The lock is replaced rather than acquired, since another thread may
+        have held it at fork time and no longer exists in the child.
+        """
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget every handle and metric (also used after a fork)."""
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._caches: list[OrderedDict[PoolKey, Any]] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _cache(self) -> OrderedDict[PoolKey, rasterio.io.DatasetReader]:
+        """
+        Gets the calling thread's LRU of readers.
+
+        Returns:
+            OrderedDict[PoolKey, rasterio.io.DatasetReader]: The readers.
+        """
+        # Fallback for forks that bypassed the fork hooks
+        if os.getpid() != self._pid:
+            self._forked()
+
+        cache = getattr(self._local, "cache", None)
+
+        if cache is None:
+            cache = OrderedDict()
+            owner = _Owner()
+            with self._lock:
+                self._caches.append(cache)
+                weakref.finalize(
+                    owner, _release, self._pid, self._lock, self._caches,
+                    cache
+                )
+            self._local.cache = cache
+            self._local.owner = owner
+
+        return cache
+
+    def get(
+        self,
+        path: str | os.PathLike,
+        **options: Any
+    ) -> rasterio.io.DatasetReader:
+        """
+        Gets an open reader of a dataset, opening it on a cache miss.
+
+        Args:
+            path (str | os.PathLike): The dataset path.
+            **options (Any): Options passed to `rasterio.open`.
+
+        Returns:
+            rasterio.io.DatasetReader: The reader, owned by the pool.
+        """
+        key = (os.fspath(path), tuple(sorted(options.items())))
+        cache = self._cache()
+        dataset = cache.get(key)
+
+        if dataset is not None and not dataset.closed:
+            cache.move_to_end(key)
+            with self._lock:
+                self.hits += 1
+            return dataset
+
+        dataset = rasterio.open(path, **options)
+        cache[key] = dataset
+        evicted = None
+
+        if len(cache) > self.max_size:
+            _, evicted = cache.popitem(last=False)
+            evicted.close()
+
+        with self._lock:
+            self.misses += 1
+            self.evictions += evicted is not None
+
+        return dataset
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Gets the pool metrics.
+
+        Returns:
+            dict[str, int]: Hits, misses, evictions and open handles.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "open": sum(len(cache) for cache in self._caches),
+            }
+
+    def clear(self) -> None:
+        """Close every handle of every thread and reset the metrics."""
+        with self._lock:
+            if os.getpid() == self._pid:
+                for cache in list(self._caches):
+                    for dataset in list(cache.values()):
+                        dataset.close()
+                    cache.clear()
+
+            self._reset()
+
+    def __enter__(self) -> "DatasetPool":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.clear()
+
+    def __str__(self) -> str:
+        return f"Dataset pool of {self.max_size} readers per thread"
+
+    def __repr__(self) -> str:
+        return f"DatasetPool(max_size={self.max_size})"
+
+
+# Pool used when utilities receive a path instead of an open dataset
+default_pool = DatasetPool()
+
+
+def as_dataset(src: DatasetLike) -> rasterio.io.DatasetReader:
+    """
+    Resolves a path or an open dataset into an open dataset.
+
+    Paths are opened through `default_pool`, so repeated calls reuse the
+    same reader on the calling thread.
+
+    Args:
+        src (DatasetLike): A dataset path or an opened rasterio dataset.
+
+    Returns:
+        rasterio.io.DatasetReader: The opened dataset.
+    """
+    if isinstance(src, (str, os.PathLike)):
+        return default_pool.get(src)
+
+    return src
+
+
+def band_index(src: DatasetLike, band: int | str) -> int:
+    """
+    Resolves a band index or name into a band index.
+
+    Band names are the band descriptions, such as those set by `compose`
+    from the names of its sources.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int | str): The band index, starting at 1, or its name.
+
+    Returns:
+        int: The band index.
+    """
+    src = as_dataset(src)
+
+    if isinstance(band, str):
+        if band not in src.descriptions:
+            raise ValueError(f"Dataset has no band named '{band}'.")
+        return src.descriptions.index(band) + 1
+
+    if not 1 <= band <= src.count:
+        raise ValueError(f"Band index must be between 1 and {src.count}.")
+
+    return band
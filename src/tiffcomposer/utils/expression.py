@@ -0,0 +1,595 @@
+import os
+import threading
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from tiffcomposer.core.composition import (DEFAULT_TILE_SIZE, BandSource,
+                                           compose)
+
+from .cache import BlockCache, read_window
+from .dataset import as_dataset, band_index
+from .nodata import band_nodata, valid_mask
+
+Operand = Any
+
+
+class Expression:
+    """
+    Lazy element-wise expression over raster bands.
+
+    Arithmetic (+, -, *, /, **, unary -, abs), comparison (<, <=, >, >=,
+    ==, !=) and logical (&, |, ~) operators on bands, numbers and other
+    expressions build a graph instead of computing anything. The graph is
+    compiled once into a fused program of NumPy ufunc calls, which is then
+    run window by window: every operation writes with `out=` into a small
+    set of per-thread buffers of the window size, reused across operations
+    and windows, so no band-sized temporary is ever created.
+
+    Every band read by an expression must share the same shape, transform
+    and CRS. Pixels where any input band holds no data are nodata in the
+    result.
+    Expressions are window readers, so they can be passed to `compose` as
+    band sources, or written on their own with `write`.
+    """
+
+    __array_ufunc__ = None
+
+    def __init__(self, ufunc: Callable[..., Any], *args: Operand) -> None:
+        self.ufunc = ufunc
+        self.args = tuple(
+            arg if isinstance(arg, Expression) else _Constant(arg)
+            for arg in args
+        )
+        self._program: _Program | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> tuple:
+        """
+        Gets the structural key of the expression.
+
+        Identical subexpressions share a key and are computed once.
+
+        Returns:
+            tuple: The key.
+        """
+        return (self.ufunc.__name__,) + tuple(arg.key for arg in self.args)
+
+    def leaves(self) -> list["BandExpression"]:
+        """
+        Gets the distinct bands read by the expression.
+
+        Returns:
+            list[BandExpression]: The bands, in first use order.
+        """
+        found: dict[tuple, BandExpression] = {}
+
+        def visit(node: Expression) -> None:
+            if isinstance(node, BandExpression):
+                found.setdefault(node.key, node)
+            for arg in node.args:
+                visit(arg)
+
+        visit(self)
+        return list(found.values())
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """
+        Gets the (height, width) of the bands of the expression.
+
+        Returns:
+            tuple[int, int]: The shape.
+        """
+        reference = self._reference()
+        return reference.height, reference.width
+
+    def _reference(self) -> rasterio.io.DatasetReader:
+        """
+        Gets the dataset of the first band, checking the grid of the others.
+
+        Raises:
+            ValueError: If the expression reads no band, or its bands do
+                not share the same shape, transform and CRS.
+
+        Returns:
+            rasterio.io.DatasetReader: The dataset of the first band.
+        """
+        datasets = [as_dataset(leaf.path) for leaf in self.leaves()]
+
+        if not datasets:
+            raise ValueError("Expressions must read at least one band.")
+
+        reference = datasets[0]
+        grid = (reference.height, reference.width, reference.transform)
+
+        for src in datasets[1:]:
+            if (src.height, src.width, src.transform) != grid \
+                    or src.crs != reference.crs:
+                raise ValueError(
+                    "Every band of an expression must have the same shape, "
+                    "transform and CRS."
+                )
+
+        return reference
+
+    def _compiled(self) -> "_Program":
+        """
+        Gets the compiled program of the expression, compiling it once.
+
+        Returns:
+            _Program: The program.
+        """
+        with self._lock:
+            if self._program is None:
+                self._reference()
+                self._program = _Program(self)
+
+        return self._program
+
+    def evaluate(
+        self,
+        window: Window,
+        out: np.ndarray | None = None,
+        nodata: float = np.nan
+    ) -> np.ndarray:
+        """
+        Evaluates the expression over a window.
+
+        Args:
+            window (Window): The window, inside the bands.
+            out (np.ndarray | None, optional): The array to write the result
+                to. Defaults to None, a new float64 array.
+            nodata (float, optional): The value of nodata pixels. Defaults
+                to NaN.
+
+        Returns:
+            np.ndarray: The result.
+        """
+        return self._compiled().run(window, out, nodata)
+
+    def __call__(self, window: Window) -> np.ndarray:
+        return self.evaluate(window)
+
+    def write(
+        self,
+        path: str | os.PathLike,
+        name: str | None = None,
+        dtype: str | np.dtype = "float32",
+        nodata: float | None = None,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        compress: str = "deflate",
+        max_workers: int | None = None
+    ) -> str:
+        """
+        Evaluates the expression into a new single-band GeoTIFF.
+
+        The output has the grid of the bands of the expression and is
+        produced window by window through `compose`.
+
+        Args:
+            path (str | os.PathLike): The output file path.
+            name (str | None, optional): The band name. Defaults to None.
+            dtype (str | np.dtype, optional): The output dtype. Defaults to
+                'float32'.
+            nodata (float | None, optional): The output nodata value.
+                Defaults to None, NaN for floating point dtypes.
+            tile_size (int, optional): Output tile size, a multiple of 16.
+                Defaults to DEFAULT_TILE_SIZE.
+            compress (str, optional): GDAL compression. Defaults to
+                'deflate'.
+            max_workers (int | None, optional): Number of worker threads.
+                Defaults to the executor default.
+
+        Returns:
+            str: The output file path.
+        """
+        if nodata is None:
+            if not np.issubdtype(np.dtype(dtype), np.floating):
+                raise ValueError(
+                    "A nodata value is required for non floating point "
+                    "outputs."
+                )
+            nodata = np.nan
+
+        reference = self._reference()
+
+        def reader(window: Window) -> np.ndarray:
+            return self.evaluate(window, nodata=nodata)
+
+        return compose(
+            [BandSource(reader, name)],
+            path,
+            width=reference.width,
+            height=reference.height,
+            transform=reference.transform,
+            crs=reference.crs,
+            dtype=dtype,
+            nodata=nodata,
+            tile_size=tile_size,
+            compress=compress,
+            max_workers=max_workers
+        )
+
+    def __add__(self, other: Operand) -> "Expression":
+        return Expression(np.add, self, other)
+
+    def __radd__(self, other: Operand) -> "Expression":
+        return Expression(np.add, other, self)
+
+    def __sub__(self, other: Operand) -> "Expression":
+        return Expression(np.subtract, self, other)
+
+    def __rsub__(self, other: Operand) -> "Expression":
+        return Expression(np.subtract, other, self)
+
+    def __mul__(self, other: Operand) -> "Expression":
+        return Expression(np.multiply, self, other)
+
+    def __rmul__(self, other: Operand) -> "Expression":
+        return Expression(np.multiply, other, self)
+
+    def __truediv__(self, other: Operand) -> "Expression":
+        return Expression(np.true_divide, self, other)
+
+    def __rtruediv__(self, other: Operand) -> "Expression":
+        return Expression(np.true_divide, other, self)
+
+    def __pow__(self, other: Operand) -> "Expression":
+        return Expression(np.power, self, other)
+
+    def __rpow__(self, other: Operand) -> "Expression":
+        return Expression(np.power, other, self)
+
+    def __neg__(self) -> "Expression":
+        return Expression(np.negative, self)
+
+    def __abs__(self) -> "Expression":
+        return Expression(np.absolute, self)
+
+    def __lt__(self, other: Operand) -> "Expression":
+        return Expression(np.less, self, other)
+
+    def __le__(self, other: Operand) -> "Expression":
+        return Expression(np.less_equal, self, other)
+
+    def __gt__(self, other: Operand) -> "Expression":
+        return Expression(np.greater, self, other)
+
+    def __ge__(self, other: Operand) -> "Expression":
+        return Expression(np.greater_equal, self, other)
+
+    def __eq__(self, other: Operand) -> "Expression":  # type: ignore
+        return Expression(np.equal, self, other)
+
+    def __ne__(self, other: Operand) -> "Expression":  # type: ignore
+        return Expression(np.not_equal, self, other)
+
+    def __and__(self, other: Operand) -> "Expression":
+        return Expression(np.logical_and, self, other)
+
+    def __rand__(self, other: Operand) -> "Expression":
+        return Expression(np.logical_and, other, self)
+
+    def __or__(self, other: Operand) -> "Expression":
+        return Expression(np.logical_or, self, other)
+
+    def __ror__(self, other: Operand) -> "Expression":
+        return Expression(np.logical_or, other, self)
+
+    def __invert__(self) -> "Expression":
+        return Expression(np.logical_not, self)
+
+    __hash__ = object.__hash__
+
+    def __str__(self) -> str:
+        return f"{self.ufunc.__name__}({', '.join(map(str, self.args))})"
+
+    def __repr__(self) -> str:
+        return f"Expression({self})"
+
+
+class _Constant(Expression):
+    """Scalar operand of an expression."""
+
+    def __init__(self, value: float) -> None:
+        if not np.isscalar(value) or isinstance(value, str):
+            raise TypeError(
+                "Expression operands must be expressions or numbers."
+            )
+
+        self.value = value
+        self.ufunc = None
+        self.args = ()
+
+    @property
+    def key(self) -> tuple:
+        return ("constant", type(self.value).__name__, self.value)
+
+    def __str__(self) -> str:
+        return repr(self.value)
+
+
+class BandExpression(Expression):
+    """Band of a raster file, as an expression operand."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        band: int,
+        cache: BlockCache | None = None
+    ) -> None:
+        self.path = os.fspath(path)
+        self.band = band
+        self.cache = cache
+        self.ufunc = None
+        self.args = ()
+        self._program = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> tuple:
+        return ("band", self.path, self.band)
+
+    def read(self, window: Window) -> tuple[np.ndarray, float | None]:
+        """
+        Reads a window of the band.
+
+        Args:
+            window (Window): The window.
+
+        Returns:
+            tuple[np.ndarray, float | None]: The window data and the nodata
+            value of the band.
+        """
+        src = as_dataset(self.path)
+        return (
+            read_window(src, self.band, window, self.cache),
+            band_nodata(src, self.band)
+        )
+
+    def __str__(self) -> str:
+        return f"{os.path.basename(self.path)}[{self.band}]"
+
+
+class Bands:
+    """
+    Bands of a raster file, as expression operands.
+
+    Index with a band index or name, for example those set by `compose`
+    from the names of its sources:
+
+        b = Bands("composed.tif")
+        ndvi = (b["nir"] - b["red"]) / (b["nir"] + b["red"])
+        ndvi.write("ndvi.tif", name="ndvi")
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        cache: BlockCache | None = None
+    ) -> None:
+        self.path = os.fspath(path)
+        self.cache = cache
+
+    def __getitem__(self, band: int | str) -> BandExpression:
+        return BandExpression(
+            self.path, band_index(self.path, band), self.cache
+        )
+
+    def __str__(self) -> str:
+        return f"Bands of {self.path}"
+
+    def __repr__(self) -> str:
+        return f"Bands(path={self.path!r})"
+
+
+def where(
+    condition: Operand,
+    value: Operand,
+    otherwise: Operand
+) -> Expression:
+    """
+    Selects between two operands, pixel by pixel.
+
+    Args:
+        condition (Operand): The condition.
+        value (Operand): The value where the condition holds.
+        otherwise (Operand): The value elsewhere.
+
+    Returns:
+        Expression: The lazy selection.
+    """
+    return Expression(_select, condition, value, otherwise)
+
+
+def _select(
+    condition: np.ndarray,
+    value: np.ndarray | float,
+    otherwise: np.ndarray | float,
+    out: np.ndarray
+) -> np.ndarray:
+    """
+    Selects between two arrays into an output array (see `where`).
+
+    Args:
+        condition (np.ndarray): The condition.
+        value (np.ndarray | float): The value where the condition holds.
+        otherwise (np.ndarray | float): The value elsewhere.
+        out (np.ndarray): The output array, distinct from the inputs.
+
+    Returns:
+        np.ndarray: The output array.
+    """
+    np.copyto(out, otherwise)
+    np.copyto(out, value, where=np.asarray(condition, dtype=bool))
+    return out
+
+
+# Operations whose output is boolean
+_BOOLEAN = {
+    np.less, np.less_equal, np.greater, np.greater_equal, np.equal,
+    np.not_equal, np.logical_and, np.logical_or, np.logical_not,
+}
+
+
+class _Program:
+    """
+    Fused evaluation program of an expression.
+
+    Nodes are deduplicated by structural key and ordered so that each is
+    computed after its operands. Every node gets a buffer slot, and a slot
+    is handed to a later node as soon as its last reader ran, so the
+    number of buffers is the peak number of live intermediates rather than
+    the number of operations.
+    """
+
+    def __init__(self, root: Expression) -> None:
+        order: list[Expression] = []
+        index: dict[tuple, int] = {}
+
+        def visit(node: Expression) -> int:
+            key = node.key
+            if key not in index:
+                refs = [visit(arg) for arg in node.args]
+                index[key] = len(order)
+                order.append(node)
+                self._refs.append(refs)
+            return index[key]
+
+        self._refs: list[list[int]] = []
+        visit(root)
+        root_index = len(order) - 1
+
+        last_use = {}
+        for i, refs in enumerate(self._refs):
+            for ref in refs:
+                last_use[ref] = i
+
+        free: dict[bool, list[int]] = {False: [], True: []}
+        self.slots: list[int | None] = [None] * len(order)
+        self.slot_types: list[bool] = []
+
+        for i, node in enumerate(order):
+            if isinstance(node, _Constant) or i == root_index:
+                continue
+
+            boolean = node.ufunc in _BOOLEAN
+
+            # Selections must not write over their operands
+            if node.ufunc is not _select:
+                self._release(i, last_use, free)
+
+            if free[boolean]:
+                self.slots[i] = free[boolean].pop()
+            else:
+                self.slots[i] = len(self.slot_types)
+                self.slot_types.append(boolean)
+
+            if node.ufunc is _select:
+                self._release(i, last_use, free)
+
+        self.order = order
+        self.root = root_index
+        self._local = threading.local()
+
+    def _release(
+        self,
+        i: int,
+        last_use: dict[int, int],
+        free: dict[bool, list[int]]
+    ) -> None:
+        """
+        Frees the slots of the operands of a node last read by it.
+
+        Args:
+            i (int): The node index.
+            last_use (dict[int, int]): The last reader of each node.
+            free (dict[bool, list[int]]): The free slots by boolean type.
+        """
+        for ref in set(self._refs[i]):
+            slot = self.slots[ref]
+            if slot is not None and last_use[ref] == i:
+                free[self.slot_types[slot]].append(slot)
+
+    def _buffers(self, size: int) -> list[np.ndarray]:
+        """
+        Gets the calling thread's flat buffers, growing them if needed.
+
+        Args:
+            size (int): The number of pixels of the window.
+
+        Returns:
+            list[np.ndarray]: The buffers, by slot.
+        """
+        buffers = getattr(self._local, "buffers", None)
+
+        if buffers is None or buffers[0].size < size:
+            buffers = [
+                np.empty(size, dtype=bool if boolean else np.float64)
+                for boolean in self.slot_types + [True, True]
+            ]
+            self._local.buffers = buffers
+
+        return buffers
+
+    def run(
+        self,
+        window: Window,
+        out: np.ndarray | None,
+        nodata: float
+    ) -> np.ndarray:
+        """
+        Runs the program over a window.
+
+        Args:
+            window (Window): The window.
+            out (np.ndarray | None): The output array, or None.
+            nodata (float): The value of nodata pixels.
+
+        Returns:
+            np.ndarray: The output array.
+        """
+        shape = (int(window.height), int(window.width))
+        size = shape[0] * shape[1]
+
+        if out is None:
+            out = np.empty(shape, dtype=np.float64)
+
+        buffers = [
+            buffer[:size].reshape(shape)
+            for buffer in self._buffers(max(size, 1))
+        ]
+        valid, scratch = buffers[-2], buffers[-1]
+        valid.fill(True)
+        values: list[Any] = [None] * len(self.order)
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for i, node in enumerate(self.order):
+                if isinstance(node, _Constant):
+                    values[i] = node.value
+                    continue
+
+                target = out if i == self.root else buffers[self.slots[i]]
+
+                if isinstance(node, BandExpression):
+                    data, band_nodata = node.read(window)
+                    np.copyto(target, data, casting="unsafe")
+                    valid &= valid_mask(data, band_nodata, out=scratch)
+                else:
+                    args = [values[ref] for ref in self._refs[i]]
+                    node.ufunc(*args, out=target)
+
+                values[i] = target
+
+            if isinstance(self.order[self.root], _Constant):
+                out.fill(self.order[self.root].value)
+
+        np.logical_not(valid, out=valid)
+        np.copyto(out, nodata, where=valid, casting="unsafe")
+
+        return out
@@ -1,82 +1,208 @@
 
+from collections.abc import Sequence
+
 import numpy as np
-import rasterio
 from rasterio.windows import Window
 
 from tiffcomposer.core.coordinates import GeoCoordinateExtent
 
+from .blocks import iter_window_blocks
+from .cache import BlockCache, read_window
+from .dataset import DatasetLike, as_dataset
+from .nodata import band_nodata, mask_nodata, reduce_valid, valid_mask
+from .reducer import StreamingReducer
+from .summed_area import open_summed_area_table
+from .transform import world_to_pixel
 
-def clip_tiff_to_extent(
-    src: rasterio.io.DatasetReader,
+
+def extent_to_window(
+    src: DatasetLike,
     extent: GeoCoordinateExtent
-) -> np.ndarray:
+) -> Window:
     """
-    Clips a raster dataset (already opened) to a custom extent (in geographic coordinates).
+    Converts a geographic extent to a pixel window clamped to the raster bounds.
 
     Args:
-        src (rasterio.io.DatasetReader): The opened rasterio dataset (src).
-        extent (tuple): The extent to clip to, specified as (left, right, bottom, top).
-                        The coordinates are in (lon_min, lon_max, lat_min, lat_max).
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        extent (GeoCoordinateExtent): The extent to convert.
 
     Returns:
-        np.ndarray: The clipped data as a numpy array.
+        Window: The pixel window covered by the extent (possibly empty).
     """
-    # Unpack the extent tuple
-    left, bottom, right, top = extent.to_tuple()
+    src = as_dataset(src)
+
+    # Unpack the normalized extent bounds
+    left, bottom, right, top = extent.bounds
 
-    # Convert the geographic coordinates (left, right, bottom, top) to pixel/row/col
-    transform = src.transform
-    row_min, col_min = ~transform * (left, top)  # top-left corner
-    row_max, col_max = ~transform * (right, bottom)  # bottom-right corner
+    # Convert the top-left and bottom-right corners to pixel row/col,
+    # snapping pixel-aligned corners to their edge
+    rows, cols = world_to_pixel(src, (left, right), (top, bottom), "floor")
 
-    # Convert the row/col values to integers
-    row_min, col_min = int(row_min), int(col_min)
-    row_max, col_max = int(row_max), int(col_max)
+    # Sort the corners
+    row_min, row_max = int(rows.min()), int(rows.max())
+    col_min, col_max = int(cols.min()), int(cols.max())
 
     # Make sure that the row/col values are within image bounds
-    row_min = max(0, row_min)
-    col_min = max(0, col_min)
-    row_max = min(src.height, row_max)
-    col_max = min(src.width, col_max)
+    row_min = min(max(0, row_min), src.height)
+    col_min = min(max(0, col_min), src.width)
+    row_max = min(max(row_min, row_max), src.height)
+    col_max = min(max(col_min, col_max), src.width)
+
+    return Window(col_min, row_min, col_max - col_min, row_max - row_min)
+
+
+def clip_tiff_to_extent(
+    src: DatasetLike,
+    extent: GeoCoordinateExtent,
+    cache: BlockCache | None = None,
+    masked: bool = False
+) -> np.ndarray:
+    """
+    Clips a raster dataset (already opened) to a custom extent (in geographic coordinates).
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        extent (GeoCoordinateExtent): The extent to clip to.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None, which reads directly from the dataset.
+        masked (bool, optional): If True, return a masked array hiding the
+            pixels equal to the dataset's nodata value (and NaN pixels),
+            without copying the data. Defaults to False.
+
+    Returns:
+        np.ndarray: The clipped data as a numpy array (read-only when served
+        by the cache).
+    """
+    src = as_dataset(src)
 
     # Create the window based on the row/col values
-    window = Window(col_min, row_min, col_max - col_min, row_max - row_min)
+    window = extent_to_window(src, extent)
 
     # Read the data from the window
     # Read the first band (use src.read() for multiple bands)
-    clipped_data = src.read(1, window=window)
+    clipped_data = read_window(src, 1, window, cache)
+
+    if masked:
+        return mask_nodata(clipped_data, band_nodata(src))
 
     return clipped_data
 
 
-def get_population_density_in_extent(extent: GeoCoordinateExtent, src: rasterio.io.DatasetReader, mode: str = 'mean') -> float:
+def get_population_density_in_extent(extent: GeoCoordinateExtent, src: DatasetLike, mode: str = 'mean', tolerance: float = 0.0) -> float:
     """
     Extracts the population density from the raster within a given extent and returns the value
-    based on the specified mode (mean, max, or min).
+    based on the specified mode (mean, sum, max, or min).
+
+    Pixels equal to the dataset's nodata value, and NaN pixels, are
+    ignored; zero and negative values are kept. When the band has an
+    up-to-date summed-area table sidecar (see `build_summed_area_table`),
+    'mean' and 'sum' are answered from it in constant time instead of
+    reading the pixels. Otherwise, when the band has an up-to-date pyramid
+    sidecar (see `build_pyramid`), its coarsest level approximating the
+    extent within `tolerance` answers the query. Use
+    `get_population_density_stats` to get several statistics in one pass.
 
     Args:
         left (float): The left longitude of the extent (in degrees).
         right (float): The right longitude of the extent (in degrees).
         bottom (float): The bottom latitude of the extent (in degrees).
         top (float): The top latitude of the extent (in degrees).
-        src (rasterio.io.DatasetReader): The opened rasterio dataset (src).
-        mode (str): The operation to perform on the data: 'mean', 'max', or 'min'.
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        mode (str): The operation to perform on the data: 'mean', 'sum', 'max', or 'min'.
+        tolerance (float, optional): The maximum fraction of the extent's
+            pixels that may be swapped by neighbouring pixels when using a
+            pyramid level. Defaults to 0, exact results.
 
     Returns:
         float: The population density value based on the specified mode.
     """
+    # The pyramid module builds on this one
+    from .overviews import open_pyramid
+
+    if mode in ('mean', 'sum'):
+        table = open_summed_area_table(src)
+
+        if table is not None:
+            window = extent_to_window(src, extent)
+            return table.mean(window) if mode == 'mean' else table.sum(window)
+
+    if mode in ('mean', 'sum', 'max', 'min'):
+        pyramid = open_pyramid(src)
+
+        if pyramid is not None:
+            result = pyramid.stats(
+                extent_to_window(src, extent), (mode,), tolerance
+            )
+            if result is not None:
+                return result[mode]
+
     # Clip the data to the specified extent
     clipped_data = clip_tiff_to_extent(src, extent)
 
-    # Remove the "no data" values (assuming a value of 0.0 is used for no data)
-    clipped_data = clipped_data[clipped_data > 0]
-
-    # Return the value based on the mode
-    if mode == 'mean':
-        return np.mean(clipped_data)
-    elif mode == 'max':
-        return np.max(clipped_data)
-    elif mode == 'min':
-        return np.min(clipped_data)
-    else:
-        raise ValueError("Mode must be 'mean', 'max', or 'min'")
+    return _reduce_density(clipped_data, mode, band_nodata(src))
+
+
+def get_population_density_stats(
+    extent: GeoCoordinateExtent,
+    src: DatasetLike,
+    modes: Sequence[str] = ("mean",),
+    band: int = 1,
+    cache: BlockCache | None = None
+) -> dict[str, float]:
+    """
+    Computes many statistics of the population density within an extent in
+    a single pass.
+
+    The extent is streamed block by block through a `StreamingReducer`, so
+    asking for several statistics costs one read of the pixels and the
+    memory used does not grow with the extent. Pixels equal to the
+    dataset's nodata value, and NaN pixels, are ignored.
+
+    Args:
+        extent (GeoCoordinateExtent): The extent.
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        modes (Sequence[str], optional): The statistics to compute: 'mean',
+            'min', 'max', 'sum', 'count', 'std', 'var' or approximate
+            percentiles such as 'p50'. Defaults to ('mean',).
+        band (int, optional): The band index. Defaults to 1.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None, which reads directly from the dataset.
+
+    Returns:
+        dict[str, float]: The statistics, by name.
+    """
+    src = as_dataset(src)
+    reducer = StreamingReducer(modes)
+    nodata = band_nodata(src, band)
+
+    window = extent_to_window(src, extent)
+
+    for part in iter_window_blocks(src, window, band):
+        chunk = read_window(src, band, part, cache)
+        reducer.update(chunk[valid_mask(chunk, nodata)])
+
+    return reducer.result()
+
+
+def _reduce_density(
+    clipped_data: np.ndarray,
+    mode: str,
+    nodata: float | None
+) -> float:
+    """
+    Reduces clipped population density data to a single value.
+
+    Args:
+        clipped_data (np.ndarray): The clipped data.
+        mode (str): The operation to perform on the data: 'mean', 'sum', 'max', or 'min'.
+        nodata (float | None): The nodata value of the band.
+
+    Returns:
+        float: The population density value based on the specified mode,
+        NaN if the extent holds no data.
+    """
+    if mode not in ('mean', 'sum', 'max', 'min'):
+        raise ValueError("Mode must be 'mean', 'sum', 'max', or 'min'")
+
+    # Reduce the pixels holding data in place, without compacting them
+    return reduce_valid(clipped_data, mode, nodata)
@@ -0,0 +1,261 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from .dataset import DatasetLike, as_dataset
+
+# Number of mapped bands kept open
+MAPPED_BANDS_CACHE_SIZE = 64
+
+
+class MappedBand:
+    """
+    Band of an uncompressed GeoTIFF mapped directly from its file.
+
+    Stripped files are exposed as a 2D memory map, so every window is a
+    zero-copy view. Tiled files are exposed as a (tile row, row, tile col,
+    col) strided view; windows inside one tile are views and larger windows
+    are assembled with a single copy.
+    """
+
+    def __init__(
+        self,
+        array: np.ndarray,
+        shape: tuple[int, int],
+        block_shape: tuple[int, int] | None = None
+    ) -> None:
+        self.array = array
+        self.shape = shape
+        self.block_shape = block_shape
+
+    @property
+    def tiled(self) -> bool:
+        """
+        Check whether the band is tiled.
+
+        Returns:
+            bool: True if the band is exposed as a tile view.
+        """
+        return self.block_shape is not None
+
+    def read(self, window: Window | None = None) -> np.ndarray:
+        """
+        Reads a window of the band.
+
+        Args:
+            window (Window | None, optional): The window, inside the band.
+                Defaults to None, the full band.
+
+        Returns:
+            np.ndarray: The read-only window data.
+        """
+        height, width = self.shape
+
+        if window is None:
+            window = Window(0, 0, width, height)
+
+        row_min, col_min = int(window.row_off), int(window.col_off)
+        row_max = row_min + int(window.height)
+        col_max = col_min + int(window.width)
+
+        if not self.tiled:
+            return self.array[row_min:row_max, col_min:col_max]
+
+        if row_max <= row_min or col_max <= col_min:
+            return np.empty(
+                (max(0, row_max - row_min), max(0, col_max - col_min)),
+                dtype=self.array.dtype
+            )
+
+        block_height, block_width = self.block_shape
+        tile_rows = slice(row_min // block_height,
+                          (row_max - 1) // block_height + 1)
+        tile_cols = slice(col_min // block_width,
+                          (col_max - 1) // block_width + 1)
+        tiles = self.array[tile_rows, :, tile_cols, :]
+        data = tiles.reshape(
+            tiles.shape[0] * block_height,
+            tiles.shape[2] * block_width
+        )
+        row_off = tile_rows.start * block_height
+        col_off = tile_cols.start * block_width
+
+        return data[
+            row_min - row_off:row_max - row_off,
+            col_min - col_off:col_max - col_off
+        ]
+
+    def take(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """
+        Gets the values of individual pixels.
+
+        Args:
+            rows (np.ndarray): The pixel rows, inside the band.
+            cols (np.ndarray): The pixel columns, inside the band.
+
+        Returns:
+            np.ndarray: The pixel values.
+        """
+        if not self.tiled:
+            return self.array[rows, cols]
+
+        block_height, block_width = self.block_shape
+        return self.array[
+            rows // block_height, rows % block_height,
+            cols // block_width, cols % block_width
+        ]
+
+    def __str__(self) -> str:
+        layout = "tiled" if self.tiled else "stripped"
+        return f"Mapped {layout} band of {self.shape[1]}x{self.shape[0]}"
+
+    def __repr__(self) -> str:
+        return f"MappedBand(shape={self.shape}, tiled={self.tiled})"
+
+
+def _block_offsets(
+    src: rasterio.io.DatasetReader,
+    band: int,
+    blocks_across: int,
+    blocks_down: int
+) -> np.ndarray | None:
+    """
+    Gets the file offsets of the blocks of a band in row-major order.
+
+    Args:
+        src (rasterio.io.DatasetReader): The opened rasterio dataset (src).
+        band (int): The band index.
+        blocks_across (int): Number of block columns.
+        blocks_down (int): Number of block rows.
+
+    Returns:
+        np.ndarray | None: The offsets, None if any block is missing.
+    """
+    offsets = []
+
+    for y in range(blocks_down):
+        for x in range(blocks_across):
+            offset = src.get_tag_item(f"BLOCK_OFFSET_{x}_{y}", "TIFF",
+                                      bidx=band)
+            if not offset:
+                return None
+            offsets.append(int(offset))
+
+    return np.array(offsets, dtype=np.int64)
+
+
+@lru_cache(maxsize=MAPPED_BANDS_CACHE_SIZE)
+def _map_file(
+    path: str,
+    band: int,
+    size: int,
+    mtime: int
+) -> MappedBand | None:
+    """
+    Maps a band of a raw-layout GeoTIFF file.
+
+    The file size and modification time are part of the cache key, so
+    rewritten files are mapped again.
+
+    Args:
+        path (str): The file path.
+        band (int): The band index.
+        size (int): The file size in bytes.
+        mtime (int): The file modification time in nanoseconds.
+
+    Returns:
+        MappedBand | None: The mapped band, None if the file is not raw.
+    """
+    with rasterio.open(path) as src:
+        if (
+            src.driver != "GTiff"
+            or src.compression is not None
+            or "NBITS" in src.tags(band, ns="IMAGE_STRUCTURE")
+        ):
+            return None
+
+        try:
+            dtype = np.dtype(src.dtypes[band - 1])
+        except TypeError:
+            return None
+
+        pixel_interleaved = (
+            src.count > 1
+            and src.interleaving == rasterio.enums.Interleaving.pixel
+        )
+        samples = src.count if pixel_interleaved else 1
+        block_height, block_width = src.block_shapes[band - 1]
+        blocks_across = -(-src.width // block_width)
+        blocks_down = -(-src.height // block_height)
+        tiled = block_width < src.width
+
+        offsets = _block_offsets(src, band, blocks_across, blocks_down)
+        height, width = src.height, src.width
+
+    if offsets is None:
+        return None
+
+    # Blocks must be stored back to back, in row-major order
+    block_bytes = block_height * block_width * samples * dtype.itemsize
+    expected = offsets[0] + block_bytes * np.arange(offsets.size)
+    if not np.array_equal(offsets, expected):
+        return None
+
+    with open(path, "rb") as file:
+        byte_order = file.read(2)
+
+    dtype = dtype.newbyteorder("<" if byte_order == b"II" else ">")
+    sample = band - 1 if pixel_interleaved else 0
+
+    if tiled:
+        shape = (
+            blocks_down, blocks_across, block_height, block_width, samples
+        )
+    else:
+        shape = (height, width, samples)
+
+    if offsets[0] + int(np.prod(shape)) * dtype.itemsize > size:
+        return None
+
+    array = np.memmap(path, dtype=dtype, mode="r", offset=int(offsets[0]),
+                      shape=shape)[..., sample]
+
+    if tiled:
+        array = array.transpose(0, 2, 1, 3)
+
+    return MappedBand(
+        array,
+        (height, width),
+        (block_height, block_width) if tiled else None
+    )
+
+
+def map_band(src: DatasetLike, band: int = 1) -> MappedBand | None:
+    """
+    Maps a band of an uncompressed GeoTIFF into memory, if possible.
+
+    Only local, uncompressed GeoTIFFs whose strips or tiles are stored back
+    to back can be mapped. Any other file returns None, so callers can fall
+    back to reading through rasterio.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+
+    Returns:
+        MappedBand | None: The mapped band, None if it cannot be mapped.
+    """
+    src = as_dataset(src)
+
+    if src.driver != "GTiff" or src.compression is not None:
+        return None
+
+    try:
+        stat = os.stat(src.name)
+    except OSError:
+        return None
+
+    return _map_file(src.name, band, stat.st_size, stat.st_mtime_ns)
@@ -0,0 +1,128 @@
+import numpy as np
+
+from .dataset import DatasetLike, as_dataset
+
+# Reductions supported by `reduce_valid`
+REDUCTIONS = ("mean", "sum", "max", "min", "count")
+
+
+def band_nodata(src: DatasetLike, band: int = 1) -> float | None:
+    """
+    Gets the nodata value of a band from the dataset metadata.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+
+    Returns:
+        float | None: The nodata value, None if the band has none.
+    """
+    return as_dataset(src).nodatavals[band - 1]
+
+
+def valid_mask(
+    data: np.ndarray,
+    nodata: float | None,
+    out: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Gets the pixels holding data.
+
+    Pixels equal to the nodata value, and NaN pixels of floating point
+    data, are invalid. Every other value, zero and negative values
+    included, is valid.
+
+    Args:
+        data (np.ndarray): The pixel values.
+        nodata (float | None): The nodata value.
+        out (np.ndarray | None, optional): A boolean array to write the mask
+            to. Defaults to None, a new array.
+
+    Returns:
+        np.ndarray: True where the pixel holds data.
+    """
+    if out is None:
+        out = np.empty(data.shape, dtype=bool)
+
+    if nodata is not None and not np.isnan(nodata):
+        np.not_equal(data, nodata, out=out)
+        if np.issubdtype(data.dtype, np.floating):
+            out &= ~np.isnan(data)
+    elif np.issubdtype(data.dtype, np.floating):
+        np.isnan(data, out=out)
+        np.logical_not(out, out=out)
+    else:
+        out.fill(True)
+
+    return out
+
+
+def mask_nodata(
+    data: np.ndarray,
+    nodata: float | None
+) -> np.ma.MaskedArray:
+    """
+    Wraps pixel values in a masked array hiding the nodata pixels.
+
+    The data is not copied: the masked array is a view over it.
+
+    Args:
+        data (np.ndarray): The pixel values.
+        nodata (float | None): The nodata value.
+
+    Returns:
+        np.ma.MaskedArray: The values, masked where they hold no data.
+    """
+    mask = valid_mask(data, nodata)
+    np.logical_not(mask, out=mask)
+
+    return np.ma.MaskedArray(data, mask=mask, copy=False)
+
+
+def reduce_valid(
+    data: np.ndarray,
+    mode: str,
+    nodata: float | None,
+    valid: np.ndarray | None = None
+) -> float:
+    """
+    Reduces the valid pixels of an array without compacting them.
+
+    The reductions run over the original array with a `where` mask, so the
+    only temporary is the boolean mask itself.
+
+    Args:
+        data (np.ndarray): The pixel values.
+        mode (str): The reduction: 'mean', 'sum', 'max', 'min' or 'count'.
+        nodata (float | None): The nodata value.
+        valid (np.ndarray | None, optional): The precomputed validity mask.
+            Defaults to None.
+
+    Returns:
+        float: The reduced value, NaN when no pixel holds data (0 for 'sum'
+        and 'count').
+    """
+    if mode not in REDUCTIONS:
+        raise ValueError(
+            f"Mode must be one of {', '.join(repr(m) for m in REDUCTIONS)}."
+        )
+
+    if valid is None:
+        valid = valid_mask(data, nodata)
+
+    count = np.count_nonzero(valid)
+
+    if mode == "count":
+        return float(count)
+    if mode == "sum":
+        return float(np.sum(data, where=valid, dtype=np.float64))
+    if count == 0:
+        return np.nan
+    if mode == "mean":
+        return float(np.sum(data, where=valid, dtype=np.float64) / count)
+
+    info = np.finfo if np.issubdtype(data.dtype, np.floating) else np.iinfo
+    if mode == "max":
+        return float(np.max(data, where=valid, initial=info(data.dtype).min))
+
+    return float(np.min(data, where=valid, initial=info(data.dtype).max))
@@ -0,0 +1,551 @@
+import os
+from collections.abc import Callable, Sequence
+from functools import lru_cache
+
+import numpy as np
+from rasterio.windows import Window
+
+from tiffcomposer.core.coordinates import GeoCoordinateExtent
+
+from .blocks import DEFAULT_MIN_BLOCK_PIXELS, iter_window_blocks
+from .cache import BlockCache, read_window
+from .dataset import DatasetLike, as_dataset
+from .extent import extent_to_window
+from .nodata import band_nodata, reduce_valid, valid_mask
+
+# Aggregation factor of the finest pyramid level
+DEFAULT_BASE_FACTOR = 4
+
+# Statistics answered from a pyramid
+PYRAMID_STATISTICS = ("mean", "min", "max", "sum", "count")
+
+# Suffix of the pyramid sidecar of a raster file
+PYRAMID_SUFFIX = ".pyramid.npz"
+
+# Number of loaded pyramids kept
+PYRAMID_CACHE_SIZE = 16
+
+Level = tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _aggregate(level: Level, factor: int) -> Level:
+    """
+    Aggregates the cells of a level into blocks of factor x factor cells.
+
+    Args:
+        level (Level): The sum, count, min and max arrays.
+        factor (int): The aggregation factor.
+
+    Returns:
+        Level: The aggregated arrays. Partial blocks at the right and bottom
+        edges aggregate the cells they hold.
+    """
+    total, count, low, high = level
+    height, width = total.shape
+    rows, cols = -(-height // factor), -(-width // factor)
+    pad = ((0, rows * factor - height), (0, cols * factor - width))
+
+    def reduce(
+        array: np.ndarray,
+        fill: float,
+        func: Callable[..., np.ndarray]
+    ) -> np.ndarray:
+        if pad[0][1] or pad[1][1]:
+            array = np.pad(array, pad, constant_values=fill)
+        return func(array.reshape(rows, factor, cols, factor), axis=(1, 3))
+
+    return (
+        reduce(total, 0, np.sum),
+        reduce(count, 0, np.sum),
+        reduce(low, np.inf, np.min),
+        reduce(high, -np.inf, np.max),
+    )
+
+
+def _window_stats(level: Level, stats: Sequence[str]) -> dict[str, float]:
+    """
+    Combines the cells of a level into the requested statistics.
+
+    Args:
+        level (Level): The sum, count, min and max of the cells.
+        stats (Sequence[str]): The statistic names.
+
+    Returns:
+        dict[str, float]: The statistics, NaN when no pixel holds data.
+    """
+    total = float(np.sum(level[0]))
+    count = int(np.sum(level[1]))
+    low = np.min(level[2], initial=np.inf)
+    high = np.max(level[3], initial=-np.inf)
+    empty = count == 0
+    values = {
+        "mean": np.nan if empty else total / count,
+        "min": np.nan if empty else low,
+        "max": np.nan if empty else high,
+        "sum": total,
+        "count": count,
+    }
+
+    return {name: float(values[name]) for name in stats}
+
+
+class Pyramid:
+    """
+    Overview pyramid of sum, count, min and max aggregates of a band.
+
+    Each level aggregates the valid pixels of factor x factor blocks, so
+    sums, counts and therefore means over any union of level cells are
+    exact rather than resampled. Levels are kept in memory and stored in an
+    uncompressed sidecar next to the raster, tagged with the raster's size
+    and modification time so that stale pyramids are detected.
+    """
+
+    def __init__(
+        self,
+        levels: dict[int, Level],
+        shape: tuple[int, int],
+        band: int = 1,
+        key: tuple[int, int] | None = None
+    ) -> None:
+        self.levels = dict(sorted(levels.items()))
+        self.shape = shape
+        self.band = band
+        self.key = key
+
+    @property
+    def factors(self) -> list[int]:
+        """
+        Gets the aggregation factors of the levels.
+
+        Returns:
+            list[int]: The factors, finest first.
+        """
+        return list(self.levels)
+
+    @classmethod
+    def build(
+        cls,
+        src: DatasetLike,
+        band: int = 1,
+        factors: Sequence[int] | None = None,
+        cache: BlockCache | None = None
+    ) -> "Pyramid":
+        """
+        Builds the pyramid of a band, streaming it in row bands.
+
+        Args:
+            src (DatasetLike): The dataset path or opened rasterio dataset
+                (src).
+            band (int, optional): The band index. Defaults to 1.
+            factors (Sequence[int] | None, optional): The level factors. Each
+                must be a multiple of the previous one. Defaults to
+                DEFAULT_BASE_FACTOR doubled until the band fits one cell.
+            cache (BlockCache | None, optional): Block cache to read through.
+                Defaults to None.
+
+        Returns:
+            Pyramid: The pyramid.
+        """
+        src = as_dataset(src)
+        height, width = src.height, src.width
+
+        if factors is None:
+            factors = [DEFAULT_BASE_FACTOR]
+            while factors[-1] < max(height, width):
+                factors.append(factors[-1] * 2)
+
+        factors = sorted(factors)
+        if factors[0] < 2 or any(
+            factor % previous for previous, factor in zip(factors, factors[1:])
+        ):
+            raise ValueError(
+                "Factors must be at least 2 and multiples of each other."
+            )
+
+        # Read row bands holding a whole number of finest level cells
+        base = factors[0]
+        rows = max(base, DEFAULT_MIN_BLOCK_PIXELS // max(width, 1))
+        rows -= rows % base
+        nodata = band_nodata(src, band)
+        chunks = []
+
+        for row in range(0, height, rows):
+            data = read_window(
+                src, band, Window(0, row, width, min(rows, height - row)),
+                cache
+            )
+            valid = valid_mask(data, nodata)
+            values = data.astype(np.float64)
+            chunks.append(_aggregate(
+                (
+                    np.where(valid, values, 0.0),
+                    valid.astype(np.int64),
+                    np.where(valid, values, np.inf),
+                    np.where(valid, values, -np.inf),
+                ),
+                base
+            ))
+
+        levels = {base: tuple(
+            np.concatenate([chunk[i] for chunk in chunks])
+            for i in range(4)
+        )}
+
+        for previous, factor in zip(factors, factors[1:]):
+            levels[factor] = _aggregate(levels[previous], factor // previous)
+
+        return cls(levels, (height, width), band, _file_key(src))
+
+    def select(
+        self,
+        window: Window,
+        tolerance: float = 0.0
+    ) -> tuple[int, Window] | None:
+        """
+        Selects the coarsest level approximating a window within tolerance.
+
+        A window is approximated by the level cells it covers for at least
+        half of their extent. The error is the fraction of the window's
+        pixels that are swapped by neighbouring pixels in doing so.
+
+        Args:
+            window (Window): The pixel window.
+            tolerance (float, optional): The maximum fraction of swapped
+                pixels. Defaults to 0, which only uses a level when the
+                window is aligned to its cells.
+
+        Returns:
+            tuple[int, Window] | None: The level factor and the window in
+            level cells, None if no level is accurate enough.
+        """
+        height, width = self.shape
+        row_min, col_min = int(window.row_off), int(window.col_off)
+        row_max = row_min + int(window.height)
+        col_max = col_min + int(window.width)
+        area = (row_max - row_min) * (col_max - col_min)
+
+        if area <= 0:
+            return None
+
+        for factor in reversed(self.factors):
+            cells = [
+                int(np.floor(value / factor + 0.5))
+                for value in (row_min, row_max, col_min, col_max)
+            ]
+            if cells[1] <= cells[0] or cells[3] <= cells[2]:
+                continue
+
+            # Level cells in pixels, clipped to the band
+            rows = (cells[0] * factor, min(cells[1] * factor, height))
+            cols = (cells[2] * factor, min(cells[3] * factor, width))
+            covered = (rows[1] - rows[0]) * (cols[1] - cols[0])
+            shared = (
+                max(0, min(rows[1], row_max) - max(rows[0], row_min))
+                * max(0, min(cols[1], col_max) - max(cols[0], col_min))
+            )
+
+            if area + covered - 2 * shared <= tolerance * area:
+                return factor, Window(
+                    cells[2], cells[0],
+                    cells[3] - cells[2], cells[1] - cells[0]
+                )
+
+        return None
+
+    def stats(
+        self,
+        window: Window,
+        stats: Sequence[str] = ("mean",),
+        tolerance: float = 0.0
+    ) -> dict[str, float] | None:
+        """
+        Computes window statistics from the coarsest suitable level.
+
+        Args:
+            window (Window): The pixel window.
+            stats (Sequence[str], optional): The statistics: 'mean', 'min',
+                'max', 'sum' or 'count'. Defaults to ('mean',).
+            tolerance (float, optional): The maximum fraction of swapped
+                pixels (see `select`). Defaults to 0.
+
+        Returns:
+            dict[str, float] | None: The statistics, None if no level is
+            accurate enough.
+        """
+        selected = self.select(window, tolerance)
+        if selected is None:
+            return None
+
+        factor, cells = selected
+        slices = cells.toslices()
+
+        return _window_stats(
+            tuple(array[slices] for array in self.levels[factor]),
+            stats
+        )
+
+    def is_fresh(self, src: DatasetLike) -> bool:
+        """
+        Checks whether the pyramid matches the current raster file.
+
+        Args:
+            src (DatasetLike): The dataset path or opened rasterio dataset
+                (src).
+
+        Returns:
+            bool: True if the file has not changed since the build.
+        """
+        src = as_dataset(src)
+        return self.key is not None and self.key == _file_key(src) \
+            and self.shape == (src.height, src.width)
+
+    def save(self, path: str | os.PathLike) -> None:
+        """
+        Saves the pyramid to an uncompressed NumPy archive.
+
+        Args:
+            path (str | os.PathLike): The file path.
+        """
+        arrays = {
+            f"{name}_{factor}": array
+            for factor, level in self.levels.items()
+            for name, array in zip(("sum", "count", "min", "max"), level)
+        }
+        np.savez(
+            path,
+            shape=np.array(self.shape),
+            band=self.band,
+            key=np.array(self.key if self.key is not None else (-1, -1)),
+            factors=np.array(self.factors),
+            **arrays
+        )
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "Pyramid":
+        """
+        Loads a pyramid saved with `save`.
+
+        Args:
+            path (str | os.PathLike): The file path.
+
+        Returns:
+            Pyramid: The pyramid.
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            key = tuple(int(value) for value in archive["key"])
+            levels = {
+                int(factor): tuple(
+                    archive[f"{name}_{factor}"]
+                    for name in ("sum", "count", "min", "max")
+                )
+                for factor in archive["factors"]
+            }
+
+            return cls(
+                levels,
+                tuple(int(value) for value in archive["shape"]),
+                int(archive["band"]),
+                None if key == (-1, -1) else key
+            )
+
+    def __str__(self) -> str:
+        return f"Pyramid of band {self.band} with factors {self.factors}"
+
+    def __repr__(self) -> str:
+        return f"Pyramid(shape={self.shape}, factors={self.factors})"
+
+
+def _file_key(src: DatasetLike) -> tuple[int, int] | None:
+    """
+    Gets the size and modification time of a raster file.
+
+    Args:
+        src (DatasetLike): The opened rasterio dataset (src).
+
+    Returns:
+        tuple[int, int] | None: The file size and modification time in
+        nanoseconds, None if the dataset is not a local file.
+    """
+    try:
+        stat = os.stat(src.name)
+    except OSError:
+        return None
+
+    return stat.st_size, stat.st_mtime_ns
+
+
+def pyramid_path(src: DatasetLike, band: int = 1) -> str:
+    """
+    Gets the sidecar path of the pyramid of a band.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+
+    Returns:
+        str: The sidecar path.
+    """
+    name = os.fspath(src) if isinstance(src, (str, os.PathLike)) \
+        else src.name
+    suffix = PYRAMID_SUFFIX if band == 1 else f".b{band}{PYRAMID_SUFFIX}"
+
+    return name + suffix
+
+
+def build_pyramid(
+    src: DatasetLike,
+    band: int = 1,
+    factors: Sequence[int] | None = None
+) -> Pyramid:
+    """
+    Builds the pyramid of a band and stores it in its sidecar.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+        factors (Sequence[int] | None, optional): The level factors (see
+            `Pyramid.build`). Defaults to None.
+
+    Returns:
+        Pyramid: The pyramid.
+    """
+    pyramid = Pyramid.build(src, band, factors)
+    pyramid.save(pyramid_path(src, band))
+    _open_pyramid.cache_clear()
+
+    return pyramid
+
+
+@lru_cache(maxsize=PYRAMID_CACHE_SIZE)
+def _open_pyramid(
+    path: str,
+    band: int,
+    key: tuple[int, int],
+    sidecar_mtime: int
+) -> Pyramid | None:
+    """
+    Loads the sidecar pyramid of a raster file, if it matches the file.
+
+    The raster's size and modification time and the sidecar's modification
+    time are part of the cache key, so the levels are only loaded again
+    when either file changes.
+
+    Args:
+        path (str): The raster file path.
+        band (int): The band index.
+        key (tuple[int, int]): The raster size and modification time in
+            nanoseconds.
+        sidecar_mtime (int): The sidecar modification time in nanoseconds.
+
+    Returns:
+        Pyramid | None: The pyramid, None if it was built from another
+        version of the raster.
+    """
+    pyramid = Pyramid.load(pyramid_path(path, band))
+
+    return pyramid if pyramid.key == key else None
+
+
+def open_pyramid(src: DatasetLike, band: int = 1) -> Pyramid | None:
+    """
+    Opens the sidecar pyramid of a band if it is up to date.
+
+    Loaded pyramids are cached until the raster or the sidecar changes.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+
+    Returns:
+        Pyramid | None: The pyramid, None if missing or stale.
+    """
+    src = as_dataset(src)
+    key = _file_key(src)
+    if key is None:
+        return None
+
+    try:
+        sidecar_mtime = os.stat(pyramid_path(src, band)).st_mtime_ns
+    except OSError:
+        return None
+
+    pyramid = _open_pyramid(src.name, band, key, sidecar_mtime)
+    if pyramid is None or pyramid.shape != (src.height, src.width):
+        return None
+
+    return pyramid
+
+
+def extent_stats(
+    src: DatasetLike,
+    extent: GeoCoordinateExtent,
+    stats: Sequence[str] = ("mean",),
+    tolerance: float = 0.0,
+    band: int = 1,
+    pyramid: Pyramid | None = None,
+    cache: BlockCache | None = None
+) -> dict[str, float]:
+    """
+    Computes extent statistics from the coarsest level within tolerance.
+
+    The band's pyramid (given, or its up-to-date sidecar) answers the query
+    when one of its levels approximates the extent within `tolerance`.
+    Otherwise the full-resolution pixels are read. Pixels equal to the
+    dataset's nodata value, and NaN pixels, are excluded.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        extent (GeoCoordinateExtent): The extent to summarize.
+        stats (Sequence[str], optional): The statistics: 'mean', 'min',
+            'max', 'sum' or 'count'. Defaults to ('mean',).
+        tolerance (float, optional): The maximum fraction of the extent's
+            pixels that may be swapped by neighbouring pixels when using a
+            coarser level. Defaults to 0, exact results.
+        band (int, optional): The band index. Defaults to 1.
+        pyramid (Pyramid | None, optional): The pyramid. Defaults to None,
+            which uses the sidecar pyramid if it is up to date.
+        cache (BlockCache | None, optional): Block cache for full-resolution
+            reads. Defaults to None.
+
+    Returns:
+        dict[str, float]: The statistics, NaN when no pixel holds data.
+    """
+    unknown = [name for name in stats if name not in PYRAMID_STATISTICS]
+    if unknown:
+        raise ValueError(
+            f"Unknown statistic '{unknown[0]}'. Use one of "
+            f"{', '.join(PYRAMID_STATISTICS)}."
+        )
+
+    src = as_dataset(src)
+    window = extent_to_window(src, extent)
+
+    if pyramid is None:
+        pyramid = open_pyramid(src, band)
+
+    if pyramid is not None:
+        result = pyramid.stats(window, stats, tolerance)
+        if result is not None:
+            return result
+
+    # Reduce each block in place rather than compacting the window
+    nodata = band_nodata(src, band)
+    parts = []
+    for part in iter_window_blocks(src, window, band):
+        data = read_window(src, band, part, cache)
+        valid = valid_mask(data, nodata)
+        parts.append([
+            reduce_valid(data, mode, nodata, valid)
+            for mode in ("sum", "count", "min", "max")
+        ])
+
+    total, count, low, high = np.array(
+        parts, dtype=np.float64
+    ).reshape(-1, 4).T
+
+    # Blocks without data have NaN extremes
+    return _window_stats(
+        (total, count, np.nan_to_num(low, nan=np.inf),
+         np.nan_to_num(high, nan=-np.inf)),
+        stats
+    )
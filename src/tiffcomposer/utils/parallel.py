@@ -0,0 +1,221 @@
+import os
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                wait)
+from multiprocessing.context import BaseContext
+from typing import Any
+
+import numpy as np
+
+from tiffcomposer.core.coordinates import GeoCoordinateExtent
+
+from .dataset import as_dataset
+from .extent import get_population_density_in_extent
+from .transform import world_to_pixel
+
+# Default number of extents processed per task
+DEFAULT_CHUNK_SIZE = 256
+
+ExtentFunction = Callable[..., Any]
+
+
+def _interleave_bits(values: np.ndarray) -> np.ndarray:
+    """
+    Spreads the lower 32 bits of each value over the even bits of a uint64.
+
+    Args:
+        values (np.ndarray): Non-negative integers.
+
+    Returns:
+        np.ndarray: The spread values.
+    """
+    values = values.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+
+    for shift, mask in (
+        (16, 0x0000FFFF0000FFFF),
+        (8, 0x00FF00FF00FF00FF),
+        (4, 0x0F0F0F0F0F0F0F0F),
+        (2, 0x3333333333333333),
+        (1, 0x5555555555555555),
+    ):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+
+    return values
+
+
+def _locality_order(
+    path: str | os.PathLike,
+    bounds: np.ndarray
+) -> np.ndarray:
+    """
+    Sorts extents so that consecutive extents read neighbouring blocks.
+
+    Extents are ordered by the Z-order (Morton) code of the raster block
+    holding their center, so any run of consecutive extents touches a
+    compact group of blocks.
+
+    Args:
+        path (str | os.PathLike): The dataset path.
+        bounds (np.ndarray): The (N, 4) left, bottom, right, top bounds.
+
+    Returns:
+        np.ndarray: The extent indices in locality order.
+    """
+    src = as_dataset(path)
+    block_height, block_width = src.block_shapes[0]
+
+    x = (bounds[:, 0] + bounds[:, 2]) / 2
+    y = (bounds[:, 1] + bounds[:, 3]) / 2
+    rows, cols = world_to_pixel(src, x, y)
+
+    block_cols = np.clip(np.floor(cols / block_width), 0, None)
+    block_rows = np.clip(np.floor(rows / block_height), 0, None)
+    codes = (
+        _interleave_bits(block_cols)
+        | (_interleave_bits(block_rows) << np.uint64(1))
+    )
+
+    return np.argsort(codes, kind="stable")
+
+
+def _run_chunk(
+    path: str,
+    func: ExtentFunction,
+    indices: np.ndarray,
+    bounds: np.ndarray,
+    kwargs: dict[str, Any]
+) -> list[tuple[int, Any]]:
+    """
+    Runs a function over a chunk of extents inside a worker process.
+
+    The dataset is opened through the worker's `default_pool`, so every
+    process keeps a single handle of its own across chunks.
+
+    Args:
+        path (str): The dataset path.
+        func (ExtentFunction): The function, called as
+            `func(extent, src, **kwargs)`.
+        indices (np.ndarray): The input positions of the extents.
+        bounds (np.ndarray): The (N, 4) bounds of the extents.
+        kwargs (dict[str, Any]): Extra keyword arguments of `func`.
+
+    Returns:
+        list[tuple[int, Any]]: The input positions and results.
+    """
+    src = as_dataset(path)
+
+    return [
+        (int(index), func(GeoCoordinateExtent.from_bounds(*row), src,
+                          **kwargs))
+        for index, row in zip(indices, bounds.tolist())
+    ]
+
+
+def map_extents(
+    path: str | os.PathLike,
+    extents: Sequence[GeoCoordinateExtent],
+    func: ExtentFunction = get_population_density_in_extent,
+    ordered: bool = True,
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_pending: int | None = None,
+    mp_context: BaseContext | None = None,
+    **kwargs: Any
+) -> Iterator[tuple[int, Any]]:
+    """
+    Applies a function to many extents of a raster in a process pool.
+
+    Extents are sorted by spatial locality and cut into chunks, so every
+    task reads a compact group of blocks that stays warm in the worker's
+    GDAL block cache. Each worker opens its own dataset handle. At most
+    `max_pending` chunks are in flight: new chunks are only submitted as
+    results are consumed.
+
+    When results are yielded in input order, extents are only sorted
+    within windows of `max_pending * chunk_size` consecutive extents, and
+    no chunk is submitted while that many results wait for an earlier
+    one, so results stream out and memory stays bounded.
+
+    Args:
+        path (str | os.PathLike): The dataset path.
+        extents (Sequence[GeoCoordinateExtent]): The extents.
+        func (ExtentFunction, optional): A picklable function called as
+            `func(extent, src, **kwargs)`. Defaults to
+            get_population_density_in_extent.
+        ordered (bool, optional): Whether to yield results in input order.
+            Otherwise they are yielded as chunks complete, and results that
+            arrive early are not held back. Defaults to True.
+        max_workers (int | None, optional): Number of worker processes.
+            Defaults to the number of CPUs.
+        chunk_size (int, optional): Number of extents per task. Defaults to
+            DEFAULT_CHUNK_SIZE.
+        max_pending (int | None, optional): Maximum number of chunks in
+            flight. Defaults to twice the number of workers.
+        mp_context (BaseContext | None, optional): Multiprocessing context
+            of the pool. Defaults to None, the platform default.
+        **kwargs (Any): Extra keyword arguments of `func`, such as `mode`.
+
+    Yields:
+        tuple[int, Any]: The input position of each extent and its result.
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be at least 1.")
+
+    path = os.fspath(path)
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * max_workers
+
+    bounds = np.array(
+        [extent.bounds for extent in extents], dtype=np.float64
+    ).reshape(-1, 4)
+
+    # Ordered results can only be yielded once every earlier extent is
+    # done, so extents are only sorted within windows of consecutive ones
+    window = max_pending * chunk_size if ordered else max(len(bounds), 1)
+    order = np.concatenate([
+        start + _locality_order(path, bounds[start:start + window])
+        for start in range(0, len(bounds), window)
+    ] or [np.empty(0, dtype=np.int64)])
+    chunks = (
+        order[start:start + chunk_size]
+        for start in range(0, len(order), chunk_size)
+    )
+
+    executor = ProcessPoolExecutor(max_workers, mp_context=mp_context)
+    pending: set[Future] = set()
+    ready: dict[int, Any] = {}
+    position = 0
+
+    def drain(done: set[Future]) -> Iterator[tuple[int, Any]]:
+        nonlocal position
+
+        for future in done:
+            if not ordered:
+                yield from future.result()
+                continue
+
+            # Hold results back until every earlier extent is available
+            ready.update(future.result())
+            while position in ready:
+                yield position, ready.pop(position)
+                position += 1
+
+    try:
+        for chunk in chunks:
+            # Results held back for an earlier extent count against the
+            # submission budget too
+            while pending and (
+                len(pending) >= max_pending or len(ready) >= window
+            ):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from drain(done)
+
+            pending.add(executor.submit(
+                _run_chunk, path, func, chunk, bounds[chunk], kwargs
+            ))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from drain(done)
+    finally:
+        executor.shutdown(cancel_futures=True)
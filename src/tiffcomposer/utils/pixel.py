@@ -1,27 +1,477 @@
 
 import numpy as np
-import rasterio
+from rasterio.windows import Window
 
-from ..core.coordinates import GeoCoordinate
+from ..core.coordinates import GeoCoordinate, GeoCoordinateArray
+from .cache import BlockCache, read_window
+from .dataset import DatasetLike, as_dataset
+from .memmap import map_band
+from .nodata import band_nodata, valid_mask
+from .transform import world_to_pixel
+
+# Supported methods of `sample_coordinates`
+SAMPLING_METHODS = ("nearest", "bilinear", "bicubic")
+
+# Parameter of the cubic convolution kernel
+_CUBIC_A = -0.5
 
 
 def get_value_from_coordinates(
     coordinate: GeoCoordinate,
-    src: rasterio.io.DatasetReader,
-    data: np.ndarray
+    src: DatasetLike,
+    data: np.ndarray | None = None
 ) -> float | None:
-    # Get the transformation from pixel coordinates to geographic coordinates
-    transform = src.transform
+    """
+    Gets the raster value at a geographic coordinate.
 
-    # Convert lat, lon to image row, col
-    # The inverse of the affine transform to map lat, lon to pixel coordinates
-    col, row = ~transform * coordinate.inverted.to_tuple()
+    Args:
+        coordinate (GeoCoordinate): The coordinate to sample.
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        data (np.ndarray | None, optional): The preloaded first band. If
+            None, only the pixel is read (zero-copy for uncompressed files).
+            Defaults to None.
+
+    Returns:
+        float | None: The pixel value, None if outside the image bounds or
+        if the pixel holds no data.
+    """
+    src = as_dataset(src)
+    pixel = _coordinate_to_pixel(coordinate, src)
 
     # Check if the coordinates are inside the image bounds
-    if 0 <= col < src.width and 0 <= row < src.height:
+    if pixel is not None:
+        row, col = pixel
+
         # Return the value in the image at the specified coordinates
-        pixel_value = data[int(row), int(col)]
+        if data is None:
+            pixel_value = read_window(src, 1, Window(col, row, 1, 1))[0, 0]
+        else:
+            pixel_value = data[row, col]
+
+        # Nodata pixels hold no value
+        if not valid_mask(pixel_value, band_nodata(src)):
+            return None
+
         return pixel_value
     else:
         # Coordinates are outside the image bounds
         return None
+
+
+def _coordinate_to_pixel(
+    coordinate: GeoCoordinate,
+    src: DatasetLike
+) -> tuple[int, int] | None:
+    """
+    Gets the pixel containing a geographic coordinate.
+
+    Args:
+        coordinate (GeoCoordinate): The coordinate.
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+
+    Returns:
+        tuple[int, int] | None: The (row, col) pixel, None if outside the
+        image bounds.
+    """
+    src = as_dataset(src)
+
+    # Convert lat, lon to image row, col
+    row, col = world_to_pixel(
+        src, coordinate.longitude, coordinate.latitude, "floor"
+    )
+
+    if 0 <= col < src.width and 0 <= row < src.height:
+        return int(row), int(col)
+
+    return None
+
+
+def sample_coordinates(
+    coordinates: GeoCoordinateArray,
+    src: DatasetLike,
+    band: int = 1,
+    masked: bool = False,
+    cache: BlockCache | None = None,
+    method: str = "nearest"
+) -> np.ndarray:
+    """
+    Samples raster values at many coordinates without reading the full band.
+
+    The inverse affine transform is applied to all coordinates at once, the
+    resulting pixels are grouped by the internal block that contains them
+    and only those blocks are read, each one once.
+
+    Interpolated methods gather the 2x2 ('bilinear') or 4x4 ('bicubic')
+    neighbourhood of pixel centers around each point the same way, and
+    interpolate every point in one vectorized pass. Neighbourhoods are
+    clamped at the raster edges. Nodata neighbours are left out: bilinear
+    weights are renormalized over the valid neighbours, and bicubic points
+    with a nodata neighbour fall back to bilinear. Points on a nodata pixel
+    hold no value, whatever the method.
+
+    Args:
+        coordinates (GeoCoordinateArray): The coordinates to sample.
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+        masked (bool, optional): If True, return a masked array where
+            out-of-bounds and nodata points are masked, with the band's
+            dtype for 'nearest' and float64 otherwise. Otherwise return
+            float64 values with NaN for those points. Defaults to False.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None, which reads directly from the dataset.
+        method (str, optional): The sampling method: 'nearest', 'bilinear'
+            or 'bicubic'. Defaults to 'nearest'.
+
+    Returns:
+        np.ndarray: The sampled values, in the order of `coordinates`.
+    """
+    if method not in SAMPLING_METHODS:
+        raise ValueError(
+            f"Sampling method must be one of "
+            f"{', '.join(repr(m) for m in SAMPLING_METHODS)}."
+        )
+
+    src = as_dataset(src)
+
+    if method != "nearest":
+        values, hidden = _interpolate(
+            src, coordinates.longitudes, coordinates.latitudes, band,
+            method == "bicubic", cache
+        )
+
+        if masked:
+            return np.ma.MaskedArray(values, mask=hidden)
+
+        values[hidden] = np.nan
+        return values
+
+    rows, cols, inside = _locate(
+        src, coordinates.longitudes, coordinates.latitudes
+    )
+    index = np.flatnonzero(inside)
+
+    values = np.zeros(len(coordinates), dtype=src.dtypes[band - 1])
+    values[index] = _gather(src, rows[index], cols[index], band, cache)
+
+    return _sampled(values, inside, masked, band_nodata(src, band))
+
+
+def _locate(
+    src: DatasetLike,
+    lons: np.ndarray,
+    lats: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Gets the pixels containing many points.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        lons (np.ndarray): The longitudes.
+        lats (np.ndarray): The latitudes.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The pixel rows and
+        columns, and whether each point is inside the image bounds.
+    """
+    src = as_dataset(src)
+
+    # Convert lat, lon to image row, col
+    rows, cols = world_to_pixel(src, lons, lats, "floor")
+
+    # Check which coordinates are inside the image bounds
+    inside = (
+        (cols >= 0) & (cols < src.width)
+        & (rows >= 0) & (rows < src.height)
+    )
+
+    return rows, cols, inside
+
+
+def _block_groups(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    block_shape: tuple[int, int],
+    width: int
+) -> list[tuple[np.ndarray, int, int]]:
+    """
+    Groups pixels by the internal block that contains them.
+
+    Args:
+        rows (np.ndarray): The pixel rows, inside the band.
+        cols (np.ndarray): The pixel columns, inside the band.
+        block_shape (tuple[int, int]): The block height and width.
+        width (int): The band width.
+
+    Returns:
+        list[tuple[np.ndarray, int, int]]: The indices of the pixels in
+        each block, with the block row and column.
+    """
+    block_height, block_width = block_shape
+    blocks_across = -(-width // block_width)
+    block_ids = (rows // block_height) * blocks_across + cols // block_width
+    order = np.argsort(block_ids, kind="stable")
+    bounds = np.flatnonzero(np.diff(block_ids[order])) + 1
+
+    return [
+        (
+            group,
+            int(rows[group[0]] // block_height),
+            int(cols[group[0]] // block_width)
+        )
+        for group in np.split(order, bounds) if group.size
+    ]
+
+
+def _gather(
+    src: DatasetLike,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    band: int = 1,
+    cache: BlockCache | None = None
+) -> np.ndarray:
+    """
+    Reads the values of many pixels, reading each block holding them once.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        rows (np.ndarray): The pixel rows, inside the band.
+        cols (np.ndarray): The pixel columns, inside the band.
+        band (int, optional): The band index. Defaults to 1.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None.
+
+    Returns:
+        np.ndarray: The pixel values, with the band's dtype.
+    """
+    src = as_dataset(src)
+    mapped = map_band(src, band)
+
+    # Uncompressed files are sampled straight from the memory map
+    if mapped is not None:
+        return mapped.take(rows, cols)
+
+    values = np.empty(rows.shape, dtype=src.dtypes[band - 1])
+
+    # Group the pixels by the block that contains them
+    block_height, block_width = src.block_shapes[band - 1]
+
+    for group, block_row, block_col in _block_groups(
+        rows, cols, (block_height, block_width), src.width
+    ):
+        row_off = block_row * block_height
+        col_off = block_col * block_width
+        window = Window(
+            col_off,
+            row_off,
+            min(block_width, src.width - col_off),
+            min(block_height, src.height - row_off)
+        )
+        block = read_window(src, band, window, cache)
+        values[group] = block[
+            rows[group] - row_off,
+            cols[group] - col_off
+        ]
+
+    return values
+
+
+def _cubic_weights(t: np.ndarray) -> np.ndarray:
+    """
+    Gets the cubic convolution weights of the four samples around points.
+
+    Uses the Keys kernel with a = -0.5, which reproduces quadratics.
+
+    Args:
+        t (np.ndarray): The offset of each point from its second sample,
+            in [0, 1).
+
+    Returns:
+        np.ndarray: The (N, 4) weights, adding up to 1.
+    """
+    t = t[:, None]
+    x = np.abs(np.concatenate((t + 1, t, 1 - t, 2 - t), axis=1))
+    a = _CUBIC_A
+
+    return np.where(
+        x <= 1,
+        ((a + 2) * x - (a + 3)) * x * x + 1,
+        ((a * x - 5 * a) * x + 8 * a) * x - 4 * a
+    )
+
+
+def _interpolate(
+    src: DatasetLike,
+    lons: np.ndarray,
+    lats: np.ndarray,
+    band: int = 1,
+    bicubic: bool = False,
+    cache: BlockCache | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Interpolates raster values at many points (see `sample_coordinates`).
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        lons (np.ndarray): The longitudes.
+        lats (np.ndarray): The latitudes.
+        band (int, optional): The band index. Defaults to 1.
+        bicubic (bool, optional): Whether to interpolate over 4x4 instead of
+            2x2 neighbourhoods. Defaults to False.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The float64 values, and whether each
+        point holds no value.
+    """
+    src = as_dataset(src)
+    pixel_rows, pixel_cols, points = _neighbours(src, lons, lats, bicubic)
+    pixel_values = _gather(src, pixel_rows, pixel_cols, band, cache)
+
+    return _blend(points, pixel_values, band_nodata(src, band), bicubic)
+
+
+def _neighbours(
+    src: DatasetLike,
+    lons: np.ndarray,
+    lats: np.ndarray,
+    bicubic: bool = False
+) -> tuple[np.ndarray, np.ndarray, tuple[np.ndarray, ...]]:
+    """
+    Locates the pixel centers needed to interpolate many points.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        lons (np.ndarray): The longitudes.
+        lats (np.ndarray): The latitudes.
+        bicubic (bool, optional): Whether to use 4x4 instead of 2x2
+            neighbourhoods. Defaults to False.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, tuple[np.ndarray, ...]]: The rows and
+        columns of the distinct neighbour pixels to read, and the position
+        of the points among them, to pass to `_blend`.
+    """
+    src = as_dataset(src)
+    rows, cols, row_t, col_t = world_to_pixel(src, lons, lats, "bilinear")
+
+    # The pixel holding each point is the nearest of its neighbour centers
+    row_near = (row_t >= 0.5).astype(np.int64)
+    col_near = (col_t >= 0.5).astype(np.int64)
+    inside = (
+        (rows + row_near >= 0) & (rows + row_near < src.height)
+        & (cols + col_near >= 0) & (cols + col_near < src.width)
+    )
+    index = np.flatnonzero(inside)
+
+    rows, cols = rows[index], cols[index]
+    offsets = np.arange(-1, 3) if bicubic else np.arange(2)
+
+    # Read each distinct neighbour pixel once, clamping at the edges
+    neighbour_rows = np.clip(rows[:, None] + offsets, 0, src.height - 1)
+    neighbour_cols = np.clip(cols[:, None] + offsets, 0, src.width - 1)
+    pixels, inverse = np.unique(
+        neighbour_rows[:, :, None] * src.width + neighbour_cols[:, None, :],
+        return_inverse=True
+    )
+
+    return pixels // src.width, pixels % src.width, (
+        inside, row_t[index], col_t[index], row_near[index],
+        col_near[index], inverse.reshape(-1, offsets.size, offsets.size)
+    )
+
+
+def _blend(
+    points: tuple[np.ndarray, ...],
+    pixel_values: np.ndarray,
+    nodata: float | None = None,
+    bicubic: bool = False
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Interpolates many points from the values of their neighbour pixels.
+
+    Args:
+        points (tuple[np.ndarray, ...]): The position of the points, from
+            `_neighbours`.
+        pixel_values (np.ndarray): The values of the neighbour pixels.
+        nodata (float | None, optional): The nodata value. Defaults to None.
+        bicubic (bool, optional): Whether to interpolate over 4x4 instead of
+            2x2 neighbourhoods. Defaults to False.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The float64 values, and whether each
+        point holds no value.
+    """
+    inside, row_t, col_t, row_near, col_near, inverse = points
+    values = np.full(inside.shape, np.nan)
+    hidden = ~inside
+    index = np.flatnonzero(inside)
+    if index.size == 0:
+        return values, hidden
+
+    first = 1 if bicubic else 0
+    pixel_valid = valid_mask(pixel_values, nodata)
+    window = pixel_values.astype(np.float64)[inverse]
+    valid = pixel_valid[inverse]
+    window[~valid] = 0
+
+    # Bilinear estimate, renormalized over the valid neighbours
+    inner = slice(first, first + 2)
+    weights = (
+        np.stack((1 - row_t, row_t), axis=1)[:, :, None]
+        * np.stack((1 - col_t, col_t), axis=1)[:, None, :]
+    ) * valid[:, inner, inner]
+    total = weights.sum(axis=(1, 2))
+    result = np.einsum(
+        "nij,nij->n", weights, window[:, inner, inner]
+    ) / np.where(total > 0, total, 1)
+
+    if bicubic:
+        complete = valid.all(axis=(1, 2))
+        weights = (
+            _cubic_weights(row_t)[:, :, None]
+            * _cubic_weights(col_t)[:, None, :]
+        )
+        result = np.where(
+            complete, np.einsum("nij,nij->n", weights, window), result
+        )
+
+    points = np.arange(index.size)
+    values[index] = result
+    hidden[index] = ~valid[points, first + row_near, first + col_near]
+
+    return values, hidden
+
+
+def _sampled(
+    values: np.ndarray,
+    inside: np.ndarray,
+    masked: bool,
+    nodata: float | None = None
+) -> np.ndarray:
+    """
+    Formats sampled values, flagging those outside the image bounds or
+    holding no data.
+
+    Args:
+        values (np.ndarray): The sampled values.
+        inside (np.ndarray): Whether each value is inside the image bounds.
+        masked (bool): Whether to return a masked array.
+        nodata (float | None, optional): The nodata value. Defaults to None.
+
+    Returns:
+        np.ndarray: A masked array, or float64 values with NaN where there
+        is no value.
+    """
+    # Points outside the image bounds are sampled as zeros, so they only
+    # need to be excluded afterwards
+    hidden = ~valid_mask(values, nodata)
+    hidden |= ~inside
+
+    if masked:
+        return np.ma.MaskedArray(values, mask=hidden)
+
+    result = values.astype(np.float64)
+    result[hidden] = np.nan
+
+    return result
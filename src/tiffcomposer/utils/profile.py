@@ -0,0 +1,181 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+from tiffcomposer.core.coordinates import (GeoCoordinate, GeoCoordinateArray,
+                                           GeoCoordinateError)
+from tiffcomposer.core.distance import distances, great_circle_points
+
+from .cache import BlockCache
+from .dataset import DatasetLike, as_dataset
+from .pixel import sample_coordinates
+
+Profile = tuple[np.ndarray, np.ndarray, GeoCoordinateArray]
+
+
+def _densify(
+    polylines: Sequence[GeoCoordinateArray],
+    spacing_m: float
+) -> tuple[GeoCoordinateArray, np.ndarray, np.ndarray]:
+    """
+    Densifies polylines along the great circles between their vertices.
+
+    Every segment is split into the fewest equal steps no longer than
+    `spacing_m`, and all segments of all polylines are interpolated at
+    once.
+
+    Args:
+        polylines (Sequence[GeoCoordinateArray]): The polyline vertices.
+        spacing_m (float): The maximum distance between points in meters.
+
+    Returns:
+        tuple[GeoCoordinateArray, np.ndarray, np.ndarray]: The points of
+        every polyline, one after the other, their cumulative distance
+        along their polyline in meters, and the index of the first point
+        of each polyline (plus the total number of points).
+    """
+    if not spacing_m > 0:
+        raise ValueError("Spacing must be a positive distance.")
+
+    for polyline in polylines:
+        if not isinstance(polyline, GeoCoordinateArray):
+            raise GeoCoordinateError(
+                "Polylines must be GeoCoordinateArray objects."
+            )
+        if len(polyline) == 0:
+            raise ValueError("Polylines must have at least one vertex.")
+
+    lats = np.concatenate([polyline.latitudes for polyline in polylines])
+    lons = np.concatenate([polyline.longitudes for polyline in polylines])
+    vertex_starts = np.cumsum([0] + [len(polyline) for polyline in polylines])
+
+    # Segments join consecutive vertices of the same polyline
+    segments = np.ones(lats.size, dtype=bool)
+    segments[vertex_starts[1:] - 1] = False
+    segments = np.flatnonzero(segments)
+
+    ends = segments + 1
+    lengths = distances(
+        GeoCoordinateArray._from_valid(lats[segments], lons[segments]),
+        GeoCoordinateArray._from_valid(lats[ends], lons[ends])
+    )
+    steps = np.maximum(np.ceil(lengths / spacing_m), 1).astype(np.int64)
+
+    # Each segment yields its start and inner points, each polyline its end
+    counts = np.ones(lats.size, dtype=np.int64)
+    counts[segments] = steps
+    origin = np.repeat(np.arange(lats.size), counts)
+    offsets = np.arange(origin.size) - np.repeat(
+        np.cumsum(counts) - counts, counts
+    )
+
+    # Polyline ends are not segment starts and keep a zero fraction
+    following = np.minimum(origin + 1, lats.size - 1)
+    fractions = offsets / counts[origin]
+    point_lats, point_lons = great_circle_points(
+        lats[origin], lons[origin],
+        lats[following], lons[following],
+        fractions
+    )
+    points = GeoCoordinateArray._from_valid(point_lats, point_lons)
+
+    starts = np.zeros(len(polylines) + 1, dtype=np.int64)
+    starts[1:] = np.cumsum(np.add.reduceat(counts, vertex_starts[:-1]))
+
+    # Cumulative distance, restarting at the first point of each polyline
+    step_lengths = np.zeros(len(points))
+    step_lengths[1:] = distances(points[:-1], points[1:])
+    step_lengths[starts[:-1]] = 0
+    cumulative = np.cumsum(step_lengths)
+    cumulative -= np.repeat(cumulative[starts[:-1]], np.diff(starts))
+
+    return points, cumulative, starts
+
+
+def profile(
+    src: DatasetLike,
+    start: GeoCoordinate,
+    end: GeoCoordinate,
+    spacing_m: float,
+    band: int = 1,
+    method: str = "nearest",
+    cache: BlockCache | None = None
+) -> Profile:
+    """
+    Samples raster values along the great circle route between two points.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        start (GeoCoordinate): The start of the route.
+        end (GeoCoordinate): The end of the route.
+        spacing_m (float): The maximum distance between samples in meters.
+        band (int, optional): The band index. Defaults to 1.
+        method (str, optional): The sampling method (see
+            `sample_coordinates`). Defaults to 'nearest'.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None, which reads directly from the dataset.
+
+    Returns:
+        Profile: The cumulative distance of each sample from the start in
+        meters, the sampled values (NaN outside the raster or on nodata)
+        and the sample coordinates.
+    """
+    if not isinstance(start, GeoCoordinate) \
+            or not isinstance(end, GeoCoordinate):
+        raise GeoCoordinateError(
+            "Route ends must be GeoCoordinate objects."
+        )
+
+    route = GeoCoordinateArray(
+        [start.latitude, end.latitude],
+        [start.longitude, end.longitude]
+    )
+
+    return profiles(src, [route], spacing_m, band, method, cache)[0]
+
+
+def profiles(
+    src: DatasetLike,
+    polylines: Sequence[GeoCoordinateArray],
+    spacing_m: float,
+    band: int = 1,
+    method: str = "nearest",
+    cache: BlockCache | None = None
+) -> list[Profile]:
+    """
+    Samples raster values along many polylines at once.
+
+    Every polyline is densified along the great circles between its
+    vertices, and the points of all polylines are sampled together, so
+    each block of the raster is read once whatever the number of routes.
+    Cumulative distances add up the haversine lengths of the steps, so the
+    Earth's radius is integrated along the route like the `step` path of
+    `GeoCoordinate.distance_to`.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        polylines (Sequence[GeoCoordinateArray]): The polyline vertices.
+        spacing_m (float): The maximum distance between samples in meters.
+        band (int, optional): The band index. Defaults to 1.
+        method (str, optional): The sampling method (see
+            `sample_coordinates`). Defaults to 'nearest'.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None, which reads directly from the dataset.
+
+    Returns:
+        list[Profile]: The profile of each polyline (see `profile`), in
+        order.
+    """
+    if len(polylines) == 0:
+        return []
+
+    src = as_dataset(src)
+    points, cumulative, starts = _densify(polylines, spacing_m)
+    values = sample_coordinates(
+        points, src, band, cache=cache, method=method
+    )
+
+    return [
+        (cumulative[a:b], values[a:b], points[a:b])
+        for a, b in zip(starts[:-1], starts[1:])
+    ]
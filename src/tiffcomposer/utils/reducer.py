@@ -0,0 +1,375 @@
+from collections.abc import Sequence
+from math import log
+
+import numpy as np
+
+STATISTICS = ("mean", "min", "max", "sum", "count", "std", "var")
+
+# Default relative error of the percentiles estimated by a QuantileSketch
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+def _parse_stats(stats: Sequence[str]) -> list[float]:
+    """
+    Validates statistic names and extracts the requested percentiles.
+
+    Percentiles are requested as 'p' followed by a value in [0, 100], such
+    as 'p50' or 'p99.5'.
+
+    Args:
+        stats (Sequence[str]): The statistic names.
+
+    Returns:
+        list[float]: The requested percentiles.
+    """
+    percentiles = []
+
+    for name in stats:
+        if name in STATISTICS:
+            continue
+
+        try:
+            value = float(name[1:]) if name.startswith("p") else None
+        except ValueError:
+            value = None
+
+        if value is None or not 0 <= value <= 100:
+            raise ValueError(
+                f"Unknown statistic '{name}'. Use one of "
+                f"{', '.join(STATISTICS)} or a percentile such as 'p50'."
+            )
+
+        percentiles.append(value)
+
+    return percentiles
+
+
+def _merge_buckets(
+    keys: np.ndarray,
+    counts: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Adds up the counts of repeated bucket keys.
+
+    Args:
+        keys (np.ndarray): The bucket keys.
+        counts (np.ndarray): The count of each key.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The sorted unique keys and their
+        counts.
+    """
+    keys, inverse = np.unique(keys, return_inverse=True)
+    return keys, np.bincount(inverse, weights=counts, minlength=keys.size)
+
+
+class QuantileSketch:
+    """
+    Mergeable streaming sketch of a distribution (DDSketch).
+
+    Values are counted in logarithmic buckets whose bounds grow by a factor
+    of (1 + a) / (1 - a), so that any quantile is estimated within a
+    relative error `a` of the value of the same rank. Memory depends on
+    the dynamic range of the values, not on their number, and sketches of
+    different chunks of data can be merged by adding up their buckets.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    ) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Relative accuracy must be between 0 and 1.")
+
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = log(self._gamma)
+        self.count = 0
+        self.zeros = 0
+        self._positive = (np.empty(0, np.int64), np.empty(0, np.float64))
+        self._negative = (np.empty(0, np.int64), np.empty(0, np.float64))
+
+    def _keys(self, magnitudes: np.ndarray) -> np.ndarray:
+        """
+        Gets the buckets of positive magnitudes.
+
+        Args:
+            magnitudes (np.ndarray): The absolute values.
+
+        Returns:
+            np.ndarray: The bucket keys.
+        """
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def _value(self, key: int) -> float:
+        """
+        Gets the representative magnitude of a bucket.
+
+        Args:
+            key (int): The bucket key.
+
+        Returns:
+            float: The magnitude, within the relative accuracy of every
+            value of the bucket.
+        """
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Adds values to the sketch.
+
+        Args:
+            values (np.ndarray): The values, without NaNs.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+
+        positive = values[values > 0]
+        negative = -values[values < 0]
+
+        self.count += values.size
+        self.zeros += values.size - positive.size - negative.size
+
+        for name, magnitudes in (("_positive", positive),
+                                 ("_negative", negative)):
+            if magnitudes.size:
+                keys, counts = getattr(self, name)
+                new_keys = self._keys(magnitudes)
+                setattr(self, name, _merge_buckets(
+                    np.concatenate((keys, new_keys)),
+                    np.concatenate((counts, np.ones(new_keys.size)))
+                ))
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Adds the values of another sketch to this one.
+
+        Args:
+            other (QuantileSketch): A sketch with the same relative accuracy.
+
+        Returns:
+            QuantileSketch: This sketch.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Sketches must have the same relative accuracy.")
+
+        self.count += other.count
+        self.zeros += other.zeros
+
+        for name in ("_positive", "_negative"):
+            keys, counts = getattr(self, name)
+            other_keys, other_counts = getattr(other, name)
+            setattr(self, name, _merge_buckets(
+                np.concatenate((keys, other_keys)),
+                np.concatenate((counts, other_counts))
+            ))
+
+        return self
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile.
+
+        Args:
+            q (float): The quantile, in [0, 1].
+
+        Returns:
+            float: The estimated value, NaN if the sketch is empty.
+        """
+        if self.count == 0:
+            return np.nan
+
+        rank = q * (self.count - 1)
+
+        # Negative values come first, from the largest magnitude down
+        keys, counts = self._negative
+        cumulative = np.cumsum(counts[::-1])
+        if cumulative.size and rank < cumulative[-1]:
+            key = keys[::-1][np.searchsorted(cumulative, rank, "right")]
+            return -self._value(key)
+
+        rank -= cumulative[-1] if cumulative.size else 0
+        if rank < self.zeros:
+            return 0.0
+
+        rank -= self.zeros
+        keys, counts = self._positive
+        cumulative = np.cumsum(counts)
+        index = min(np.searchsorted(cumulative, rank, "right"), keys.size - 1)
+
+        return self._value(keys[index])
+
+    def __str__(self) -> str:
+        return f"Quantile sketch of {self.count} values"
+
+    def __repr__(self) -> str:
+        return (
+            f"QuantileSketch(count={self.count}, "
+            f"relative_accuracy={self.relative_accuracy})"
+        )
+
+
+class StreamingReducer:
+    """
+    Single-pass reducer computing many statistics of a stream of chunks.
+
+    Means and squared deviations are combined with Welford's update in
+    Chan's parallel form and the sum with Kahan-Babuska compensation, so
+    the results stay accurate over many chunks. Percentiles are estimated
+    with a `QuantileSketch`, so memory does not grow with the data.
+
+    Reducers of disjoint parts of the data, such as those computed by
+    different workers, are combined with `merge`.
+    """
+
+    def __init__(
+        self,
+        stats: Sequence[str] = ("mean",),
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    ) -> None:
+        self.stats = list(stats)
+        self.percentiles = _parse_stats(self.stats)
+        self.count = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.compensation = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = QuantileSketch(relative_accuracy) \
+            if self.percentiles else None
+
+    def _add_total(self, value: float) -> None:
+        """
+        Adds a value to the compensated sum.
+
+        Args:
+            value (float): The value.
+        """
+        total = self.total + value
+
+        # Keep the low-order bits lost by the addition
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+
+        self.total = total
+
+    def _combine(self, n: float, mean: float, m2: float) -> None:
+        """
+        Combines the moments of another part of the data.
+
+        Args:
+            n (float): The count, or total weight, of the part.
+            mean (float): The mean of the part.
+            m2 (float): The sum of squared deviations of the part.
+        """
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta**2 * self.count * n / total
+        self.count = total
+
+    def update(
+        self,
+        values: np.ndarray,
+        weights: np.ndarray | None = None
+    ) -> None:
+        """
+        Adds a chunk of valid values.
+
+        Args:
+            values (np.ndarray): The valid values of the chunk.
+            weights (np.ndarray | None, optional): The positive weight of
+                each value, such as the covered fraction of its pixel.
+                Counts become the sum of the weights. Min, max and
+                percentiles ignore weights. Defaults to None, unit weights.
+        """
+        if values.size == 0:
+            return
+
+        values = values.astype(np.float64, copy=False).ravel()
+
+        if weights is None:
+            n = values.size
+            chunk_total = values.sum()
+            chunk_mean = chunk_total / n
+            chunk_m2 = np.square(values - chunk_mean).sum()
+        else:
+            weights = weights.astype(np.float64, copy=False).ravel()
+            n = weights.sum()
+            chunk_total = np.dot(weights, values)
+            chunk_mean = chunk_total / n
+            chunk_m2 = np.dot(weights, np.square(values - chunk_mean))
+
+        self._combine(n, chunk_mean, chunk_m2)
+        self._add_total(chunk_total)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        if self.sketch is not None:
+            self.sketch.update(values)
+
+    def merge(self, other: "StreamingReducer") -> "StreamingReducer":
+        """
+        Adds the values reduced by another reducer to this one.
+
+        Args:
+            other (StreamingReducer): A reducer of another part of the data.
+
+        Returns:
+            StreamingReducer: This reducer.
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+
+        self._add_total(other.total)
+        self._add_total(other.compensation)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        elif self.sketch is not None and other.count:
+            raise ValueError("Cannot merge a reducer without percentiles.")
+
+        return self
+
+    def result(self) -> dict[str, float]:
+        """
+        Gets the requested statistics.
+
+        Returns:
+            dict[str, float]: The statistics, NaN when there were no values
+            (0 for 'sum' and 'count').
+        """
+        empty = self.count == 0
+        variance = np.nan if empty else self.m2 / self.count
+        values = {
+            "mean": np.nan if empty else self.mean,
+            "min": np.nan if empty else self.min,
+            "max": np.nan if empty else self.max,
+            "sum": self.total + self.compensation,
+            "count": self.count,
+            "std": np.sqrt(variance),
+            "var": variance,
+        }
+
+        if self.percentiles:
+            names = (name for name in self.stats if name not in STATISTICS)
+
+            for name, percentile in zip(names, self.percentiles):
+                # Bucket values may fall slightly outside the data range
+                estimate = self.sketch.quantile(percentile / 100)
+                values[name] = estimate if empty else \
+                    min(max(estimate, self.min), self.max)
+
+        return {name: float(values[name]) for name in self.stats}
+
+    def __str__(self) -> str:
+        return f"Streaming reducer of {', '.join(self.stats)}"
+
+    def __repr__(self) -> str:
+        return f"StreamingReducer(stats={self.stats}, count={self.count})"
@@ -0,0 +1,348 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+from rasterio.windows import Window
+
+from .blocks import DEFAULT_MIN_BLOCK_PIXELS
+from .cache import BlockCache, read_window
+from .dataset import DatasetLike, as_dataset
+from .nodata import band_nodata, valid_mask
+
+# Suffix of the summed-area table sidecar of a raster file
+SUMMED_AREA_SUFFIX = ".sat.npy"
+
+# Number of opened summed-area tables kept
+SUMMED_AREA_CACHE_SIZE = 16
+
+# Bytes hashed per read when computing file checksums
+_CHECKSUM_CHUNK_BYTES = 1 << 20
+
+
+def _checksum(path: str) -> str:
+    """
+    Computes the checksum of a file.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        str: The hexadecimal BLAKE2b digest of the file contents.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(path, "rb") as file:
+        while chunk := file.read(_CHECKSUM_CHUNK_BYTES):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def summed_area_path(src: DatasetLike, band: int = 1) -> str:
+    """
+    Gets the sidecar path of the summed-area table of a band.
+
+    The table metadata is stored next to it, with a '.json' suffix.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+
+    Returns:
+        str: The sidecar path.
+    """
+    name = os.fspath(src) if isinstance(src, (str, os.PathLike)) \
+        else src.name
+
+    return f"{name}.b{band}{SUMMED_AREA_SUFFIX}"
+
+
+class SummedAreaTable:
+    """
+    Summed-area table (integral image) of the valid pixels of a band.
+
+    Plane 0 holds the running sum of the valid pixel values and plane 1 the
+    running count of valid pixels, both with a leading row and column of
+    zeros. The sum, count and mean of any window then take four lookups
+    per plane, whatever the window size. Tables are stored as .npy
+    sidecars and memory mapped when opened.
+    """
+
+    def __init__(
+        self,
+        table: np.ndarray,
+        band: int = 1,
+        positive_only: bool = False,
+        checksum: str | None = None
+    ) -> None:
+        self.table = table
+        self.band = band
+        self.positive_only = positive_only
+        self.checksum = checksum
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """
+        Gets the (height, width) of the band.
+
+        Returns:
+            tuple[int, int]: The band shape.
+        """
+        return self.table.shape[1] - 1, self.table.shape[2] - 1
+
+    @classmethod
+    def build(
+        cls,
+        src: DatasetLike,
+        band: int = 1,
+        positive_only: bool = False,
+        path: str | os.PathLike | None = None,
+        cache: BlockCache | None = None
+    ) -> "SummedAreaTable":
+        """
+        Builds the summed-area table of a band, streaming it in row bands.
+
+        Args:
+            src (DatasetLike): The dataset path or opened rasterio dataset
+                (src).
+            band (int, optional): The band index. Defaults to 1.
+            positive_only (bool, optional): Whether only positive pixels are
+                valid. Otherwise pixels that are not nodata nor NaN are.
+                Defaults to False.
+            path (str | os.PathLike | None, optional): The .npy file to write
+                the table to. Defaults to None, an in-memory table.
+            cache (BlockCache | None, optional): Block cache to read through.
+                Defaults to None.
+
+        Returns:
+            SummedAreaTable: The table.
+        """
+        src = as_dataset(src)
+        height, width = src.height, src.width
+        shape = (2, height + 1, width + 1)
+
+        if path is None:
+            table = np.zeros(shape, dtype=np.float64)
+        else:
+            table = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.float64, shape=shape
+            )
+            table[:, 0, :] = 0
+            table[:, :, 0] = 0
+
+        rows = max(1, DEFAULT_MIN_BLOCK_PIXELS // max(width, 1))
+        nodata = band_nodata(src, band)
+        previous = np.zeros((2, 1, width), dtype=np.float64)
+
+        for row in range(0, height, rows):
+            data = read_window(
+                src, band, Window(0, row, width, min(rows, height - row)),
+                cache
+            )
+
+            if positive_only:
+                valid = data > 0
+            else:
+                valid = valid_mask(data, nodata)
+
+            planes = np.stack((np.where(valid, data, 0), valid)).astype(
+                np.float64
+            )
+            planes = planes.cumsum(axis=2).cumsum(axis=1) + previous
+            table[:, row + 1:row + 1 + data.shape[0], 1:] = planes
+            previous = planes[:, -1:, :]
+
+        if path is not None:
+            table.flush()
+
+        return cls(table, band, positive_only)
+
+    def _lookup(self, plane: int, window: Window) -> float:
+        """
+        Sums a plane over a window with four lookups.
+
+        Args:
+            plane (int): The plane index, 0 for sums and 1 for counts.
+            window (Window): The window, inside the band.
+
+        Returns:
+            float: The plane total over the window.
+        """
+        row_min, col_min = int(window.row_off), int(window.col_off)
+        row_max = max(row_min, row_min + int(window.height))
+        col_max = max(col_min, col_min + int(window.width))
+        table = self.table[plane]
+
+        return float(
+            table[row_max, col_max] - table[row_min, col_max]
+            - table[row_max, col_min] + table[row_min, col_min]
+        )
+
+    def sum(self, window: Window) -> float:
+        """
+        Gets the sum of the valid pixels of a window.
+
+        Args:
+            window (Window): The window, inside the band.
+
+        Returns:
+            float: The sum.
+        """
+        return self._lookup(0, window)
+
+    def count(self, window: Window) -> int:
+        """
+        Gets the number of valid pixels of a window.
+
+        Args:
+            window (Window): The window, inside the band.
+
+        Returns:
+            int: The number of valid pixels.
+        """
+        return round(self._lookup(1, window))
+
+    def mean(self, window: Window) -> float:
+        """
+        Gets the mean of the valid pixels of a window.
+
+        Args:
+            window (Window): The window, inside the band.
+
+        Returns:
+            float: The mean, NaN if the window holds no valid pixel.
+        """
+        count = self.count(window)
+
+        return self.sum(window) / count if count else np.nan
+
+    def __str__(self) -> str:
+        height, width = self.shape
+        return f"Summed-area table of band {self.band} of {width}x{height}"
+
+    def __repr__(self) -> str:
+        return (
+            f"SummedAreaTable(shape={self.shape}, band={self.band}, "
+            f"positive_only={self.positive_only})"
+        )
+
+
+def build_summed_area_table(
+    src: DatasetLike,
+    band: int = 1,
+    positive_only: bool = False
+) -> SummedAreaTable:
+    """
+    Builds the summed-area table of a band and stores it in its sidecar.
+
+    The sidecar metadata records the checksum of the raster file, so that
+    the table is ignored once the raster contents change.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+        positive_only (bool, optional): Whether only positive pixels are
+            valid. Defaults to False.
+
+    Returns:
+        SummedAreaTable: The memory-mapped table.
+    """
+    src = as_dataset(src)
+    path = summed_area_path(src, band)
+    metadata = {
+        "band": band,
+        "positive_only": positive_only,
+        "checksum": _checksum(src.name),
+    }
+
+    # Write both files under temporary names so readers never see a partial
+    # table with valid metadata
+    SummedAreaTable.build(src, band, positive_only, path + ".tmp.npy")
+    with open(path + ".json.tmp", "w") as file:
+        json.dump(metadata, file)
+
+    os.replace(path + ".tmp.npy", path)
+    os.replace(path + ".json.tmp", path + ".json")
+    _open_table.cache_clear()
+
+    return open_summed_area_table(src, band, positive_only)
+
+
+@lru_cache(maxsize=SUMMED_AREA_CACHE_SIZE)
+def _open_table(
+    path: str,
+    band: int,
+    positive_only: bool,
+    size: int,
+    mtime: int
+) -> SummedAreaTable | None:
+    """
+    Opens the summed-area table sidecar of a raster file, if valid.
+
+    The file size and modification time are part of the cache key, so the
+    checksum is only computed again when the file changes.
+
+    Args:
+        path (str): The raster file path.
+        band (int): The band index.
+        positive_only (bool): The validity rule the table must use.
+        size (int): The file size in bytes.
+        mtime (int): The file modification time in nanoseconds.
+
+    Returns:
+        SummedAreaTable | None: The memory-mapped table, None if missing,
+        built with another validity rule, or stale.
+    """
+    table_path = summed_area_path(path, band)
+
+    try:
+        with open(table_path + ".json") as file:
+            metadata = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        metadata.get("band") != band
+        or metadata.get("positive_only") != positive_only
+        or metadata.get("checksum") != _checksum(path)
+    ):
+        return None
+
+    try:
+        table = np.load(table_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+    return SummedAreaTable(table, band, positive_only, metadata["checksum"])
+
+
+def open_summed_area_table(
+    src: DatasetLike,
+    band: int = 1,
+    positive_only: bool = False
+) -> SummedAreaTable | None:
+    """
+    Opens the summed-area table sidecar of a band if it is up to date.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        band (int, optional): The band index. Defaults to 1.
+        positive_only (bool, optional): The validity rule the table must
+            use. Defaults to False.
+
+    Returns:
+        SummedAreaTable | None: The memory-mapped table, None if there is
+        no valid table.
+    """
+    name = os.fspath(src) if isinstance(src, (str, os.PathLike)) \
+        else src.name
+
+    try:
+        stat = os.stat(name)
+    except OSError:
+        return None
+
+    return _open_table(name, band, positive_only, stat.st_size,
+                       stat.st_mtime_ns)
@@ -0,0 +1,156 @@
+from functools import lru_cache
+
+import numpy as np
+from affine import Affine
+
+from tiffcomposer.core.coordinates import PIXEL_TOLERANCE
+
+from .dataset import DatasetLike, as_dataset
+
+# Supported ways of snapping fractional pixel coordinates
+SNAP_MODES = ("floor", "round", "bilinear")
+
+# Number of inverse transforms kept
+INVERSE_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=INVERSE_CACHE_SIZE)
+def _inverse(transform: Affine) -> Affine:
+    """
+    Gets the inverse of an affine transform, computed once per transform.
+
+    Args:
+        transform (Affine): The pixel to world transform.
+
+    Returns:
+        Affine: The world to pixel transform.
+    """
+    return ~transform
+
+
+def _transform(src: DatasetLike | Affine) -> Affine:
+    """
+    Gets the pixel to world transform of a dataset.
+
+    Args:
+        src (DatasetLike | Affine): The dataset path, opened rasterio
+            dataset (src) or its transform.
+
+    Returns:
+        Affine: The transform.
+    """
+    return src if isinstance(src, Affine) else as_dataset(src).transform
+
+
+def _tolerant_floor(values: np.ndarray) -> np.ndarray:
+    """
+    Floors pixel coordinates, snapping values within tolerance of an edge.
+
+    Pixel-aligned coordinates round-trip through the affine transform with
+    floating point noise, which must not move them to the previous pixel.
+
+    Args:
+        values (np.ndarray): The fractional pixel coordinates.
+
+    Returns:
+        np.ndarray: The pixel indices.
+    """
+    nearest = np.round(values)
+    snapped = np.where(
+        np.abs(values - nearest) <= PIXEL_TOLERANCE, nearest, np.floor(values)
+    )
+
+    return snapped.astype(np.int64)
+
+
+def world_to_pixel(
+    src: DatasetLike | Affine,
+    lons: np.ndarray,
+    lats: np.ndarray,
+    snap: str | None = None
+) -> tuple[np.ndarray, ...]:
+    """
+    Maps geographic coordinates to pixel coordinates in a single call.
+
+    Pixel coordinates follow NumPy indexing: rows grow southwards from the
+    top edge and columns eastwards from the left edge, so that pixel
+    (row, col) covers [row, row + 1) x [col, col + 1).
+
+    Args:
+        src (DatasetLike | Affine): The dataset path, opened rasterio
+            dataset (src) or its transform.
+        lons (np.ndarray): The longitudes (or x coordinates).
+        lats (np.ndarray): The latitudes (or y coordinates).
+        snap (str | None, optional): How to snap the coordinates:
+            - None: fractional (rows, cols).
+            - 'floor': the (rows, cols) of the pixels holding the points.
+              Points within PIXEL_TOLERANCE of a pixel edge snap to it.
+            - 'round': the (rows, cols) of the nearest pixel corners.
+            - 'bilinear': the (rows, cols) of the top-left pixel of the
+              2x2 pixels whose centers surround the points, followed by
+              the (row_weights, col_weights) of the bottom and right
+              pixels, in [0, 1).
+            Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, ...]: The pixel coordinates, integer when
+        snapped.
+    """
+    if snap is not None and snap not in SNAP_MODES:
+        raise ValueError(
+            f"Snap mode must be None or one of "
+            f"{', '.join(repr(mode) for mode in SNAP_MODES)}."
+        )
+
+    inverse = _inverse(_transform(src))
+    lons = np.asarray(lons, dtype=np.float64)
+    lats = np.asarray(lats, dtype=np.float64)
+    cols = inverse.a * lons + inverse.b * lats + inverse.c
+    rows = inverse.d * lons + inverse.e * lats + inverse.f
+
+    if snap is None:
+        return rows, cols
+    if snap == "floor":
+        return _tolerant_floor(rows), _tolerant_floor(cols)
+    if snap == "round":
+        return np.round(rows).astype(np.int64), np.round(cols).astype(np.int64)
+
+    # Pixel centers sit at half-integer pixel coordinates
+    rows, cols = rows - 0.5, cols - 0.5
+    row_min, col_min = np.floor(rows), np.floor(cols)
+
+    return (
+        row_min.astype(np.int64), col_min.astype(np.int64),
+        rows - row_min, cols - col_min
+    )
+
+
+def pixel_to_world(
+    src: DatasetLike | Affine,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    center: bool = True
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Maps pixel coordinates to geographic coordinates in a single call.
+
+    Args:
+        src (DatasetLike | Affine): The dataset path, opened rasterio
+            dataset (src) or its transform.
+        rows (np.ndarray): The pixel rows.
+        cols (np.ndarray): The pixel columns.
+        center (bool, optional): Whether integer pixels map to their center
+            rather than to their top-left corner. Defaults to True.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The (lons, lats) coordinates.
+    """
+    transform = _transform(src)
+    offset = 0.5 if center else 0.0
+    rows = np.asarray(rows, dtype=np.float64) + offset
+    cols = np.asarray(cols, dtype=np.float64) + offset
+
+    return (
+        transform.a * cols + transform.b * rows + transform.c,
+        transform.d * cols + transform.e * rows + transform.f
+    )
@@ -0,0 +1,500 @@
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from math import ceil, floor
+
+import numpy as np
+from affine import Affine
+from rasterio.features import geometry_mask
+from rasterio.windows import Window
+from shapely.geometry import MultiPolygon, Polygon
+
+from tiffcomposer.core.coordinates import GeoCoordinateExtent
+
+from .blocks import iter_block_windows
+from .cache import BlockCache, read_window
+from .dataset import DatasetLike, as_dataset
+from .extent import extent_to_window
+from .nodata import band_nodata, valid_mask
+from .overviews import PYRAMID_STATISTICS, open_pyramid
+from .reducer import StreamingReducer
+from .transform import world_to_pixel
+
+# Subpixels per pixel side when rasterizing fractional coverage
+DEFAULT_SUPERSAMPLE = 8
+
+# Default bytes of polygon masks kept for reuse
+DEFAULT_MASK_CACHE_BYTES = 256 << 20
+
+# Subpixels rasterized at once when supersampling fractional coverage
+_STRIP_SUBPIXELS = 1 << 22
+
+
+def _zone_windows(
+    src: DatasetLike,
+    extents: Sequence[GeoCoordinateExtent]
+) -> np.ndarray:
+    """
+    Gets the pixel windows of extents.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        extents (Sequence[GeoCoordinateExtent]): The extents.
+
+    Returns:
+        np.ndarray: The (N, 4) row_min, row_max, col_min, col_max windows.
+    """
+    return np.array(
+        [
+            (w.row_off, w.row_off + w.height, w.col_off, w.col_off + w.width)
+            for w in (extent_to_window(src, extent) for extent in extents)
+        ],
+        dtype=np.int64
+    ).reshape(-1, 4)
+
+
+def _sweep(
+    src: DatasetLike,
+    windows: np.ndarray,
+    band: int = 1,
+    cache: BlockCache | None = None
+) -> Iterator[tuple[int, np.ndarray, np.ndarray, tuple[slice, slice]]]:
+    """
+    Streams the valid pixels of many zones in a single pass over the raster.
+
+    The band is streamed through its internal blocks and each block is read
+    at most once, only if some zone overlaps it. Pixels equal to the
+    dataset's nodata value, and NaN pixels, are flagged as invalid.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        windows (np.ndarray): The (N, 4) row_min, row_max, col_min, col_max
+            windows of the zones.
+        band (int, optional): The band index. Defaults to 1.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None, which reads directly from the dataset.
+
+    Yields:
+        tuple[int, np.ndarray, np.ndarray, tuple[slice, slice]]: The zone
+        index, the pixels of the zone inside the block, their validity and
+        the position of those pixels within the zone window.
+    """
+    src = as_dataset(src)
+    nodata = band_nodata(src, band)
+
+    for block in iter_block_windows(src, band):
+        hits = _overlapping(windows, block)
+        if hits.size == 0:
+            continue
+
+        data = read_window(src, band, block, cache)
+        yield from _zone_chunks(windows, hits, block, data, nodata)
+
+
+def _overlapping(windows: np.ndarray, block: Window) -> np.ndarray:
+    """
+    Gets the zones overlapping a block.
+
+    Args:
+        windows (np.ndarray): The (N, 4) row_min, row_max, col_min, col_max
+            windows of the zones.
+        block (Window): The block window.
+
+    Returns:
+        np.ndarray: The indices of the overlapping zones.
+    """
+    row_min, row_max, col_min, col_max = windows.T
+
+    return np.flatnonzero(
+        (row_min < block.row_off + block.height) & (row_max > block.row_off)
+        & (col_min < block.col_off + block.width) & (col_max > block.col_off)
+    )
+
+
+def _zone_chunks(
+    windows: np.ndarray,
+    hits: np.ndarray,
+    block: Window,
+    data: np.ndarray,
+    nodata: float | None = None
+) -> Iterator[tuple[int, np.ndarray, np.ndarray, tuple[slice, slice]]]:
+    """
+    Splits a block among the zones overlapping it (see `_sweep`).
+
+    Args:
+        windows (np.ndarray): The (N, 4) row_min, row_max, col_min, col_max
+            windows of the zones.
+        hits (np.ndarray): The indices of the zones overlapping the block.
+        block (Window): The block window.
+        data (np.ndarray): The block data.
+        nodata (float | None, optional): The nodata value. Defaults to None.
+
+    Yields:
+        tuple[int, np.ndarray, np.ndarray, tuple[slice, slice]]: The zone
+        index, the pixels of the zone inside the block, their validity and
+        the position of those pixels within the zone window.
+    """
+    row_min, row_max, col_min, col_max = windows.T
+    block_row_max = block.row_off + block.height
+    block_col_max = block.col_off + block.width
+
+    for i in hits:
+        rows = slice(max(row_min[i], block.row_off),
+                     min(row_max[i], block_row_max))
+        cols = slice(max(col_min[i], block.col_off),
+                     min(col_max[i], block_col_max))
+        chunk = data[
+            rows.start - block.row_off:rows.stop - block.row_off,
+            cols.start - block.col_off:cols.stop - block.col_off
+        ]
+
+        yield i, chunk, valid_mask(chunk, nodata), (
+            slice(rows.start - row_min[i], rows.stop - row_min[i]),
+            slice(cols.start - col_min[i], cols.stop - col_min[i])
+        )
+
+
+def zonal_stats(
+    src: DatasetLike,
+    extents: Sequence[GeoCoordinateExtent],
+    stats: Sequence[str] = ("mean",),
+    band: int = 1,
+    cache: BlockCache | None = None,
+    tolerance: float = 0.0
+) -> list[dict[str, float]]:
+    """
+    Computes statistics for many extents in a single pass over the raster.
+
+    The band is streamed through its internal blocks and each block is read
+    at most once, only if some extent overlaps it. Pixels equal to the
+    dataset's nodata value, and NaN pixels, are excluded.
+
+    When the band has an up-to-date pyramid sidecar (see `build_pyramid`)
+    and every statistic is one it holds, extents that one of its levels
+    approximates within `tolerance` are answered from it and skip the pass.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        extents (Sequence[GeoCoordinateExtent]): The extents to summarize.
+        stats (Sequence[str], optional): The statistics to compute: 'mean',
+            'min', 'max', 'sum', 'count', 'std', 'var' or percentiles such
+            as 'p50', estimated within 1% (see `StreamingReducer`).
+            Defaults to ('mean',).
+        band (int, optional): The band index. Defaults to 1.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None, which reads directly from the dataset.
+        tolerance (float, optional): The maximum fraction of an extent's
+            pixels that may be swapped by neighbouring pixels when using a
+            pyramid level. Defaults to 0, exact results.
+
+    Returns:
+        list[dict[str, float]]: The statistics of each extent, in order.
+    """
+    src = as_dataset(src)
+    windows = _zone_windows(src, extents)
+    results: list[dict[str, float] | None] = [None] * len(windows)
+
+    pyramid = None
+    if all(name in PYRAMID_STATISTICS for name in stats):
+        pyramid = open_pyramid(src, band)
+
+    if pyramid is not None:
+        for i, (row_min, row_max, col_min, col_max) in enumerate(
+            windows.tolist()
+        ):
+            results[i] = pyramid.stats(
+                Window(col_min, row_min, col_max - col_min,
+                       row_max - row_min),
+                stats,
+                tolerance
+            )
+
+    # Sweep the raster for the extents no level approximates
+    remaining = np.array(
+        [i for i, result in enumerate(results) if result is None],
+        dtype=np.int64
+    )
+    reducers = [StreamingReducer(stats) for _ in remaining]
+
+    for j, chunk, valid, _ in _sweep(src, windows[remaining], band, cache):
+        reducers[j].update(chunk[valid])
+
+    for i, reducer in zip(remaining.tolist(), reducers):
+        results[i] = reducer.result()
+
+    return results
+
+
+class PolygonMasks:
+    """
+    Coverage masks of polygons rasterized on the pixel grid of a raster.
+
+    Each polygon is rasterized over its bounding window only, the first
+    time it is needed, and the most recently used masks are kept, up to
+    `cache_bytes`, so that statistics over other bands of the same grid
+    reuse them. Masks that do not stay cached are rasterized block by
+    block instead. Masks are boolean, or the covered fraction of each pixel
+    when `fractional` is set, estimated by rasterizing on a grid of
+    `supersample` x `supersample` subpixels, a strip of rows at a time.
+    """
+
+    def __init__(
+        self,
+        src: DatasetLike,
+        polygons: Sequence[Polygon | MultiPolygon],
+        all_touched: bool = False,
+        fractional: bool = False,
+        supersample: int = DEFAULT_SUPERSAMPLE,
+        cache_bytes: int = DEFAULT_MASK_CACHE_BYTES
+    ) -> None:
+        if any(
+            not isinstance(polygon, (Polygon, MultiPolygon))
+            for polygon in polygons
+        ):
+            raise ValueError("Zones must be shapely polygons or multipolygons.")
+
+        if supersample < 1:
+            raise ValueError("Supersampling factor must be at least 1.")
+
+        if cache_bytes < 0:
+            raise ValueError("Mask cache size must be non-negative.")
+
+        src = as_dataset(src)
+        self.polygons = list(polygons)
+        self.transform = src.transform
+        self.shape = (src.height, src.width)
+        self.all_touched = all_touched
+        self.fractional = fractional
+        self.supersample = supersample
+        self.cache_bytes = cache_bytes
+        self.windows = np.array(
+            [self._window(polygon) for polygon in self.polygons],
+            dtype=np.int64
+        ).reshape(-1, 4)
+        self._masks: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._cached_bytes = 0
+        self._rasterized: set[int] = set()
+
+    def _window(self, polygon: Polygon | MultiPolygon) -> tuple[int, ...]:
+        """
+        Gets the pixel window holding a polygon, clamped to the raster.
+
+        Args:
+            polygon (Polygon | MultiPolygon): The polygon.
+
+        Returns:
+            tuple[int, ...]: The row_min, row_max, col_min, col_max window.
+        """
+        height, width = self.shape
+        left, bottom, right, top = polygon.bounds
+        rows, cols = world_to_pixel(
+            self.transform, (left, right), (top, bottom)
+        )
+
+        row_min = min(max(0, floor(rows.min())), height)
+        col_min = min(max(0, floor(cols.min())), width)
+        row_max = min(max(row_min, ceil(rows.max())), height)
+        col_max = min(max(col_min, ceil(cols.max())), width)
+
+        return row_min, row_max, col_min, col_max
+
+    def matches(self, src: DatasetLike) -> bool:
+        """
+        Checks whether the masks were rasterized on the grid of a dataset.
+
+        Args:
+            src (DatasetLike): The dataset path or opened rasterio dataset
+                (src).
+
+        Returns:
+            bool: True if the dataset has the same transform and shape.
+        """
+        src = as_dataset(src)
+        return self.transform == src.transform \
+            and self.shape == (src.height, src.width)
+
+    def mask(
+        self,
+        index: int,
+        position: tuple[slice, slice] | None = None
+    ) -> np.ndarray:
+        """
+        Gets the coverage mask of a polygon over its window, or part of it.
+
+        The whole window is rasterized and cached the first time. When the
+        mask does not fit in the cache, or was already evicted, only the
+        requested `position` is rasterized, so that sweeping a large
+        polygon block by block rasterizes each of its pixels once.
+
+        Args:
+            index (int): The polygon index.
+            position (tuple[slice, slice] | None, optional): The rows and
+                columns to get, within the polygon window. Defaults to None,
+                the whole window.
+
+        Returns:
+            np.ndarray: A boolean mask, or float32 covered fractions when
+            the masks are fractional.
+        """
+        mask = self._masks.get(index)
+        if mask is not None:
+            self._masks.move_to_end(index)
+            return mask if position is None else mask[position]
+
+        row_min, row_max, col_min, col_max = self.windows[index]
+        itemsize = 4 if self.fractional else 1
+        nbytes = int((row_max - row_min) * (col_max - col_min)) * itemsize
+
+        if position is not None and (
+            index in self._rasterized or nbytes > self.cache_bytes
+        ):
+            return self._rasterize(index, *position)
+
+        mask = self._rasterize(
+            index, slice(0, row_max - row_min), slice(0, col_max - col_min)
+        )
+        self._rasterized.add(index)
+        self._remember(index, mask)
+
+        return mask if position is None else mask[position]
+
+    def _rasterize(self, index: int, rows: slice, cols: slice) -> np.ndarray:
+        """
+        Rasterizes the coverage of a polygon over part of its window.
+
+        Args:
+            index (int): The polygon index.
+            rows (slice): The rows, within the polygon window.
+            cols (slice): The columns, within the polygon window.
+
+        Returns:
+            np.ndarray: A boolean mask, or float32 covered fractions when
+            the masks are fractional.
+        """
+        row_min, _, col_min, _ = self.windows[index]
+        row_min, col_min = row_min + rows.start, col_min + cols.start
+        height, width = rows.stop - rows.start, cols.stop - cols.start
+
+        if self.fractional:
+            mask = np.zeros((height, width), dtype=np.float32)
+        else:
+            mask = np.zeros((height, width), dtype=bool)
+
+        if height and width:
+            factor = self.supersample if self.fractional else 1
+            strip_rows = max(1, _STRIP_SUBPIXELS // (width * factor * factor))
+
+            for row in range(0, height, strip_rows):
+                strip = min(strip_rows, height - row)
+                covered = geometry_mask(
+                    [self.polygons[index]],
+                    out_shape=(strip * factor, width * factor),
+                    transform=self.transform
+                    * Affine.translation(col_min, row_min + row)
+                    * Affine.scale(1 / factor),
+                    all_touched=self.all_touched,
+                    invert=True
+                )
+
+                if self.fractional:
+                    covered = covered.reshape(
+                        strip, factor, width, factor
+                    ).mean(axis=(1, 3), dtype=np.float32)
+
+                mask[row:row + strip] = covered
+
+        return mask
+
+    def _remember(self, index: int, mask: np.ndarray) -> None:
+        """
+        Caches a mask, evicting the least recently used ones over budget.
+
+        Args:
+            index (int): The polygon index.
+            mask (np.ndarray): The mask.
+        """
+        if mask.nbytes > self.cache_bytes:
+            return
+
+        self._masks[index] = mask
+        self._cached_bytes += mask.nbytes
+
+        while self._cached_bytes > self.cache_bytes:
+            _, evicted = self._masks.popitem(last=False)
+            self._cached_bytes -= evicted.nbytes
+
+    def __len__(self) -> int:
+        return len(self.polygons)
+
+    def __str__(self) -> str:
+        return f"Coverage masks of {len(self)} polygons"
+
+    def __repr__(self) -> str:
+        return (
+            f"PolygonMasks(n={len(self)}, all_touched={self.all_touched}, "
+            f"fractional={self.fractional})"
+        )
+
+
+def polygon_stats(
+    src: DatasetLike,
+    polygons: Sequence[Polygon | MultiPolygon] | PolygonMasks,
+    stats: Sequence[str] = ("mean",),
+    band: int = 1,
+    all_touched: bool = False,
+    fractional: bool = False,
+    cache: BlockCache | None = None
+) -> list[dict[str, float]]:
+    """
+    Computes statistics for many polygons in a single pass over the raster.
+
+    Polygons are rasterized over their bounding windows and only covered
+    pixels are reduced. Like `zonal_stats`, the band is streamed in block
+    order and each block is read at most once. Pass a `PolygonMasks` to
+    reuse the rasterized masks across bands. Polygon coordinates must be in
+    the raster CRS.
+
+    With fractional masks every pixel is weighted by its covered fraction:
+    'count' is the covered pixel area and 'mean', 'sum' and 'std' are
+    weighted. 'min', 'max' and percentiles use every partially covered
+    pixel, unweighted.
+
+    Args:
+        src (DatasetLike): The dataset path or opened rasterio dataset (src).
+        polygons (Sequence[Polygon | MultiPolygon] | PolygonMasks): The
+            polygons, or their precomputed masks.
+        stats (Sequence[str], optional): The statistics to compute (see
+            `zonal_stats`). Defaults to ('mean',).
+        band (int, optional): The band index. Defaults to 1.
+        all_touched (bool, optional): Whether pixels touched by the polygon
+            are covered, rather than pixels whose center is inside it.
+            Ignored when masks are given. Defaults to False.
+        fractional (bool, optional): Whether to weight pixels by their
+            covered fraction. Ignored when masks are given. Defaults to
+            False.
+        cache (BlockCache | None, optional): Block cache to read through.
+            Defaults to None, which reads directly from the dataset.
+
+    Returns:
+        list[dict[str, float]]: The statistics of each polygon, in order.
+    """
+    src = as_dataset(src)
+    reducers = [StreamingReducer(stats) for _ in range(len(polygons))]
+
+    if isinstance(polygons, PolygonMasks):
+        masks = polygons
+        if not masks.matches(src):
+            raise ValueError("Masks were rasterized on another pixel grid.")
+    else:
+        masks = PolygonMasks(src, polygons, all_touched, fractional)
+
+    for i, chunk, valid, position in _sweep(src, masks.windows, band, cache):
+        coverage = masks.mask(i, position)
+
+        if masks.fractional:
+            weights = np.where(valid, coverage, 0)
+            covered = weights > 0
+            reducers[i].update(chunk[covered], weights[covered])
+        else:
+            reducers[i].update(chunk[valid & coverage])
+
+    return [reducer.result() for reducer in reducers]